@@ -0,0 +1,65 @@
+"""
+Wall time of applying a large batch of renames: a bare os.rename loop, the old
+per-file Path.rename, and the apply engine with planning and its journal.
+
+Everything runs in a temporary directory. Between runs the files are renamed back.
+
+Usage:
+    python -m benchmarks.bench_apply_engine [file_count]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from lib.apply_engine import RenameJournal, RenameOp, apply_plan, plan_renames
+
+FILES_PER_FOLDER = 1_000
+
+
+def measure(file_count: int) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        pairs = []
+        for i in range(file_count):
+            folder = os.path.join(root, f"folder{i // FILES_PER_FOLDER:03d}")
+            if i % FILES_PER_FOLDER == 0:
+                os.mkdir(folder)
+            old = os.path.join(folder, f"shot{i:06d}.exr")
+            open(old, "w").close()
+            pairs.append((old, os.path.join(folder, f"SHOT_{i:06d}_v2.exr")))
+
+        def rename_back():
+            for old, new in pairs:
+                os.rename(new, old)
+
+        start = time.perf_counter()
+        for old, new in pairs:
+            os.rename(old, new)
+        bare = time.perf_counter() - start
+        rename_back()
+
+        start = time.perf_counter()
+        for old, new in pairs:
+            old_path = Path(old)
+            old_path.rename(old_path.parent / os.path.basename(new))
+        per_file = time.perf_counter() - start
+        rename_back()
+
+        journal = RenameJournal(os.path.join(root, "journal.jsonl"))
+        start = time.perf_counter()
+        ops = [RenameOp(None, old, new) for old, new in pairs]
+        plan = plan_renames(ops)
+        planned = time.perf_counter() - start
+        result = apply_plan(plan, journal, root)
+        engine = time.perf_counter() - start
+        assert len(result.renamed) == file_count and not result.failed and not result.conflicts
+
+        print(f"{file_count} renames in {-(-file_count // FILES_PER_FOLDER)} folders")
+        print(f"{'bare os.rename':<24}{bare:>8.2f}s")
+        print(f"{'Path.rename per file':<24}{per_file:>8.2f}s  {per_file / bare:>5.2f}x")
+        print(f"{'apply engine':<24}{engine:>8.2f}s  {engine / bare:>5.2f}x  (planning {planned:.2f}s)")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,59 @@
+"""
+Throughput of the batch functions of the simple commands against calling the scalar
+rename function once per name, and a check that both give the same names.
+
+Usage:
+    python -m benchmarks.bench_batch_transforms [name_count]
+"""
+import sys
+import time
+
+from lib.command.pipeline import PipelineCompiler
+
+COMMANDS = [
+    ("prefix", ["x_"]),
+    ("suffix", ["_v2"]),
+    ("replace", ["plate", "PL"]),
+    ("remove-numbers", []),
+    ("case", ["upper"]),
+    ("case", ["lower"]),
+    ("replace-ext", ["exr", "png"]),
+    ("zeros", ["add", "4"]),
+    ("zeros", ["remove"]),
+]
+
+# Names where splitting off the extension has edge cases
+ODD_NAMES = [
+    "", ".", "..", ".bashrc", "..hidden.txt", "a.", "a..b", "no_extension", "a.b.c.exr",
+    "dir/file.exr", "dir.d/file", "back\\slash.exr", "line\n.exr", "x.exr\n", "007.exr",
+]
+
+
+def measure(name_count: int) -> None:
+    names = [f"Shot{i % 50:03d} BG plate {i} Final.{('exr', 'png', 'tif')[i % 3]}" for i in range(name_count)]
+
+    print(f"{name_count} names")
+    print(f"{'command':<24}{'scalar':>10}{'batch':>10}{'speedup':>10}")
+    for ignore_extension in (False, True):
+        compiler = PipelineCompiler()
+        for command_name, values in COMMANDS:
+            step = compiler.compile([(command_name, values)], ignore_extension=ignore_extension).steps[0]
+            assert step.batch is not None, command_name
+            assert step.batch(ODD_NAMES) == [step.func(name) for name in ODD_NAMES], command_name
+
+            func = step.func
+            start = time.perf_counter()
+            expected = [func(name) for name in names]
+            scalar = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = step.batch(names)
+            batch = time.perf_counter() - start
+            assert result == expected, command_name
+
+            label = " ".join([command_name] + values) + (" (ie)" if ignore_extension else "")
+            print(f"{label:<24}{scalar:>9.2f}s{batch:>9.2f}s{scalar / batch:>9.1f}x")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
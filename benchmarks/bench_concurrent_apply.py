@@ -0,0 +1,71 @@
+"""
+Wall time of applying renames one at a time and with the concurrent apply mode, on a
+local directory made to behave like a network share: every os.rename first waits a
+fixed round trip.
+
+The renames are spread over several folders and include chains and swaps, so lanes
+have to keep their order. The speedup is bounded by the worker count and by the
+largest folder's share of the renames.
+
+Usage:
+    python -m benchmarks.bench_concurrent_apply [file_count] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from lib import apply_engine
+from lib.apply_engine import RenameOp, apply_plan, plan_renames
+
+FOLDERS = 8
+WORKER_COUNTS = (1, 4, 8, 16, 32)
+
+
+def measure(file_count: int, latency_ms: float) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        folders = [os.path.join(root, f"folder{i}") for i in range(FOLDERS)]
+        pairs = []
+        for i in range(file_count):
+            folder = folders[i % FOLDERS]
+            if i < FOLDERS:
+                os.mkdir(folder)
+            name = f"shot{i:05d}.exr"
+            open(os.path.join(folder, name), "w").close()
+            # Every tenth file takes the name of the one after it, which forms chains
+            new_name = f"shot{i + FOLDERS:05d}.exr" if i % 10 == 0 and i + FOLDERS < file_count else f"SHOT_{i:05d}.exr"
+            pairs.append((os.path.join(folder, name), os.path.join(folder, new_name)))
+
+        real_rename = os.rename
+
+        def slow_rename(src, dst):
+            time.sleep(latency_ms / 1000)
+            real_rename(src, dst)
+
+        print(f"{file_count} renames in {FOLDERS} folders, {latency_ms:g}ms per rename")
+        sequential = None
+        for workers in WORKER_COUNTS:
+            ops = [RenameOp(None, src, dst, os.lstat(src).st_ino) for src, dst in pairs]
+            plan = plan_renames(ops)
+            apply_engine.os.rename = slow_rename
+            try:
+                start = time.perf_counter()
+                result = apply_plan(plan, workers=workers)
+                elapsed = time.perf_counter() - start
+            finally:
+                apply_engine.os.rename = real_rename
+            assert len(result.renamed) == file_count and not result.failed and not result.conflicts
+
+            sequential = sequential or elapsed
+            slowest = max((stats.seconds for stats in result.directories.values()), default=elapsed)
+            print(f"{workers:>3} workers{elapsed:>8.2f}s  {sequential / elapsed:>5.1f}x  (slowest folder {slowest:.2f}s)")
+
+            for step in reversed(plan.steps):
+                real_rename(step[1], step[0])
+
+
+if __name__ == "__main__":
+    measure(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 4_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 2.0,
+    )
@@ -0,0 +1,64 @@
+"""
+Time to pick the files a command runs on: FileFilter.filter per file, which joins the
+absolute path to read the extension, against filter_batch over each folder, which
+checks the extension the model already has against a set.
+
+Usage:
+    python -m benchmarks.bench_file_filter [file_count]
+"""
+import datetime
+import sys
+import time
+
+from lib.data_manager import File
+from lib.file_filter import FileFilter
+
+FOLDERS = 50
+EXTENSIONS = (".exr", ".png", ".tga", ".txt", ".json")
+CASES = (
+    ("ext", {"ext": ["png", ".tga"]}),
+    ("ext+prefix", {"ext": ["exr"], "prefix": "shot"}),
+    ("regex", {"regex": r"_v\d{3}"}),
+    ("size+date", {"size": (1_000, None), "date": (datetime.datetime(2021, 1, 1), None)}),
+)
+
+
+class _Folder:
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        self.files = []
+
+
+def measure(file_count: int) -> None:
+    folders = [_Folder(f"/projects/show/seq{i:03d}/renders") for i in range(FOLDERS)]
+    for i in range(file_count):
+        folder = folders[i % FOLDERS]
+        prefix = "shot" if i % 3 else "plate"
+        file = File(f"{prefix}_{i:06d}_v{i % 1000:03d}{EXTENSIONS[i % len(EXTENSIONS)]}", folder)
+        file.size = i * 37 % 5_000
+        file.mtime = 1.6e9 + i * 1_000
+        folder.files.append(file)
+
+    print(f"{file_count} files in {FOLDERS} folders")
+    for label, filters in CASES:
+        file_filter = FileFilter(filters)
+
+        start = time.perf_counter()
+        per_file = [
+            file.id
+            for folder in folders
+            for file in folder.files
+            if file_filter.filter(file.abs_path, file.new_name, size=file.size, mtime=file.mtime)
+        ]
+        per_file_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = [file_id for folder in folders for file_id in file_filter.filter_batch(folder.files)]
+        batch_time = time.perf_counter() - start
+
+        assert batched == per_file, label
+        print(f"{label:<12}{per_file_time * 1000:>9.1f}ms{batch_time * 1000:>9.1f}ms  {per_file_time / batch_time:>5.1f}x")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
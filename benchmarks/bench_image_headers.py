@@ -0,0 +1,91 @@
+"""
+Time to learn the size and channel layout of large textures: decoding them the way
+image_info used to (imageio for TGA/DDS, an OpenEXR.InputFile for EXR) against reading
+only the header.
+
+Usage:
+    python -m benchmarks.bench_image_headers [size]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import imageio.v3 as iio
+import Imath
+import OpenEXR
+from PIL import Image
+
+from lib.image_headers import read_dds_header, read_exr_header, read_tga_header
+
+
+def _write_exr(path: str, size: int) -> None:
+    header = OpenEXR.Header(size, size)
+    header["channels"] = {channel: Imath.Channel(Imath.PixelType(Imath.PixelType.HALF)) for channel in "RGBA"}
+    exr = OpenEXR.OutputFile(path, header)
+    exr.writePixels({channel: bytes(size * size * 2) for channel in "RGBA"})
+    exr.close()
+
+
+def _decode(path: str) -> tuple:
+    img = iio.imread(path)
+    return img.shape[1], img.shape[0]
+
+
+def _open_exr(path: str) -> tuple:
+    header = OpenEXR.InputFile(path).header()
+    window = header["displayWindow"]
+    return window.max.x - window.min.x + 1, window.max.y - window.min.y + 1
+
+
+def _header(read_header):
+    def read(path: str) -> tuple:
+        with open(path, "rb") as file:
+            return read_header(file)[:2]
+    return read
+
+
+def _timed(read, path: str, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = read(path)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def measure(size: int) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        image = Image.new("RGBA", (size, size), (10, 20, 30, 255))
+        cases = []
+
+        path = os.path.join(root, "texture.tga")
+        image.save(path)
+        cases.append(("TGA RGBA", path, _decode, _header(read_tga_header)))
+
+        path = os.path.join(root, "texture_dxt5.dds")
+        image.save(path, pixel_format="DXT5")
+        cases.append(("DDS DXT5", path, _decode, _header(read_dds_header)))
+
+        # Pillow decodes uncompressed DDS in Python, a small one is slow enough
+        path = os.path.join(root, "texture_rgba.dds")
+        image.resize((size // 8, size // 8)).save(path)
+        cases.append((f"DDS RGBA {size // 8}", path, _decode, _header(read_dds_header)))
+
+        path = os.path.join(root, "texture.exr")
+        _write_exr(path, size)
+        cases.append(("EXR half RGBA", path, _open_exr, _header(read_exr_header)))
+
+        print(f"{size}x{size} textures")
+        print(f"{'format':<16}{'MB':>8}{'full read':>12}{'header':>12}{'speedup':>10}")
+        for label, path, full, header in cases:
+            full_time, full_result = _timed(full, path, 1)
+            header_time, header_result = _timed(header, path, 100)
+            assert full_result == header_result, label
+            megabytes = os.path.getsize(path) / 1e6
+            print(
+                f"{label:<16}{megabytes:>8.1f}{full_time * 1000:>10.2f}ms{header_time * 1000:>10.3f}ms"
+                f"{full_time / header_time:>9.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 4096)
@@ -0,0 +1,73 @@
+"""
+Wall time of running resolution-add and img-info-add over a folder of images with a
+cold probe cache, probing one file at a time inside the steps as before, and with the
+headers prefetched on a thread pool first. Every header read first waits a fixed
+round trip, as on a network share.
+
+Usage:
+    python -m benchmarks.bench_image_prefetch [image_count] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from lib import image_info
+from lib.command.pipeline import PipelineCompiler, run_columns
+from lib.image_info import prefetched_probes
+from lib.image_probe import ProbeCache, set_probe_cache
+
+WORKER_COUNTS = (4, 16, 32)
+
+
+def measure(image_count: int, latency_ms: float) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        names, paths = [], []
+        for i in range(image_count):
+            name = f"texture{i:04d}.png"
+            path = os.path.join(root, name)
+            Image.new("RGBA" if i % 2 else "RGB", (64 + i % 7, 64)).save(path)
+            names.append(name)
+            paths.append(path)
+
+        pipeline = PipelineCompiler().compile([("resolution-add", ["tag"]), ("img-info-add", [])])
+        real_probe = image_info._probe_pil
+
+        def slow_probe(image_path):
+            time.sleep(latency_ms / 1000)
+            return real_probe(image_path)
+
+        runs = [("serial", None)] + [(f"prefetch {workers:>2}", workers) for workers in WORKER_COUNTS]
+        print(f"{image_count} images, {latency_ms:g}ms per header read")
+        image_info._probe_pil = slow_probe
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")  # The commands print skipped files
+        timings, expected = [], None
+        try:
+            for label, workers in runs:
+                set_probe_cache(ProbeCache())
+                start = time.perf_counter()
+                if workers is None:
+                    result = list(run_columns(pipeline, names, paths, names)[-1])
+                else:
+                    with prefetched_probes(paths, workers):
+                        result = list(run_columns(pipeline, names, paths, names)[-1])
+                timings.append((label, time.perf_counter() - start))
+                expected = expected or result
+                assert result == expected, label
+        finally:
+            sys.stdout = stdout
+            image_info._probe_pil = real_probe
+            set_probe_cache(ProbeCache())
+
+        baseline = timings[0][1]
+        for label, elapsed in timings:
+            print(f"{label:<12}{elapsed:>8.2f}s  {baseline / elapsed:>5.1f}x")
+
+
+if __name__ == "__main__":
+    measure(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 2.0,
+    )
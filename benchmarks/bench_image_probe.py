@@ -0,0 +1,82 @@
+"""
+Wall time of running resolution-add and img-info-add over a folder of textures without
+the probe cache (every command opens every image, as before), with a cold cache, a
+warm one, and one read back from SQLite as in a new session.
+
+Usage:
+    python -m benchmarks.bench_image_probe [image_count] [size]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from lib import image_probe
+from lib.image_info import add_image_info, add_resolution
+from lib.image_probe import ProbeCache, set_probe_cache
+
+FORMATS = (".tga", ".png", ".tiff")
+
+
+class NoCache(ProbeCache):
+    def put(self, key, probe) -> None:
+        pass
+
+
+def run_commands(paths: list) -> list:
+    names = []
+    for path in paths:
+        name = add_resolution(path.name, ["tag"], False, path)
+        names.append(add_image_info(name, [], False, path))
+    return names
+
+
+def measure(image_count: int, size: int) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        paths = []
+        for i in range(image_count):
+            path = Path(root) / f"texture{i:04d}{FORMATS[i % len(FORMATS)]}"
+            Image.new("RGBA", (size, size), (i % 256, 0, 0, 255)).save(path)
+            paths.append(path)
+
+        db_path = os.path.join(root, "probes.sqlite3")
+        caches = [
+            ("no cache", NoCache()),
+            ("cold cache", ProbeCache(db_path)),
+            ("warm cache", None),  # The cold one again
+            ("new session", None),  # Read back from the database
+        ]
+        print(f"{image_count} images of {size}x{size}, {', '.join(FORMATS)}")
+
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")  # The commands print skipped files
+        timings, expected = [], None
+        try:
+            for label, cache in caches:
+                if label == "warm cache":
+                    cache = image_probe.probe_cache()
+                    cache.flush()
+                elif label == "new session":
+                    cache = ProbeCache(db_path)
+                set_probe_cache(cache)
+                start = time.perf_counter()
+                names = run_commands(paths)
+                timings.append((label, time.perf_counter() - start))
+                expected = expected or names
+                assert names == expected, label
+        finally:
+            sys.stdout = stdout
+            set_probe_cache(ProbeCache())
+
+        baseline = timings[0][1]
+        for label, elapsed in timings:
+            print(f"{label:<14}{elapsed:>8.3f}s  {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    measure(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 150,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1024,
+    )
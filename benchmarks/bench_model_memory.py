@@ -0,0 +1,40 @@
+"""
+Measure the memory cost of the File/Folder model.
+
+Usage:
+    python -m benchmarks.bench_model_memory [file_count]
+"""
+import sys
+import tracemalloc
+
+from lib.data_manager import File, Folder
+
+
+def measure(file_count: int, files_per_folder: int = 100) -> None:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    root = Folder("root", None, root_path="/tmp/root")
+    folders = [root]
+    for i in range(file_count // files_per_folder):
+        folder = Folder(f"folder_{i}", root)
+        root.add_folder(folder)
+        folders.append(folder)
+    folder_memory, _ = tracemalloc.get_traced_memory()
+
+    for i in range(file_count):
+        folder = folders[1 + i // files_per_folder] if len(folders) > 1 else root
+        # Names are built per file so their strings are counted like real scan results
+        folder.add_file(File(f"texture_{i:07d}_diffuse.png", folder))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    folder_count = len(folders)
+    print(f"Folders:          {folder_count}")
+    print(f"Files:            {file_count}")
+    print(f"Bytes per folder: {(folder_memory - before) / folder_count:.1f}")
+    print(f"Bytes per file:   {(after - folder_memory) / file_count:.1f} (including the name string)")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,49 @@
+"""
+Wall time of running a compiled pipeline over a large batch of names serially and
+through ParallelRunner with different worker counts.
+
+The parallel timings include sending the names to the workers and the results back,
+but not starting the pool, which DataManager keeps alive between runs. The speedup is
+bounded by the number of cores on the machine.
+
+Usage:
+    python -m benchmarks.bench_parallel_pipeline [name_count]
+"""
+import os
+import sys
+import time
+
+from lib.command.pipeline import PipelineCompiler, run_columns
+from lib.parallel import ParallelRunner
+
+COMMANDS = [
+    ("case", ["snake"]),
+    ("remove-repeating-words", []),
+    ("normalize", []),
+]
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def measure(name_count: int) -> None:
+    names = [f"Shot{i % 50:03d} BG plate plate {i} Final Comp.exr" for i in range(name_count)]
+    pipeline = PipelineCompiler().compile(COMMANDS, split_numbers=True)
+
+    start = time.perf_counter()
+    expected = run_columns(pipeline, names, current_names=names)
+    serial = time.perf_counter() - start
+    print(f"{name_count} names, {os.cpu_count()} cores")
+    print(f"{'serial':<12}{serial:>8.2f}s")
+
+    for workers in WORKER_COUNTS:
+        runner = ParallelRunner(max_workers=workers, threshold=0)
+        runner.map(pipeline, names[:workers], current_names=names[:workers])  # Start the pool outside the timing
+        start = time.perf_counter()
+        results = runner.map(pipeline, names, current_names=names)
+        elapsed = time.perf_counter() - start
+        runner.shutdown()
+        assert [list(column) for column in results] == [list(column) for column in expected]
+        print(f"{workers} workers{'':<3}{elapsed:>8.2f}s  {serial / elapsed:>5.2f}x")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
@@ -0,0 +1,99 @@
+"""
+Per-name cost of the regex-heavy rename functions, with precompiled patterns versus
+patterns passed to re.sub as strings.
+
+The "thrashed" columns clear re's internal cache before every name, which is what
+happens when a pipeline and the user's own patterns use more patterns than the cache
+holds. Precompiled patterns are not affected.
+
+Usage:
+    python -m benchmarks.bench_rename_functions [name_count]
+"""
+import os
+import re
+import sys
+import time
+
+from lib.command.rename_functions import clean_filename, remove_leading, to_snake_case, regex_replace_in_filenames
+from lib.regex_cache import compiled_pattern
+
+
+# Reference versions with string patterns, as the functions were written before
+def clean_filename_uncompiled(name, ignore_extension):
+    base_name, ext = os.path.splitext(name)
+    new_base_name = re.sub(r'[_\s]+', '_', base_name)
+    new_base_name = re.sub(r'[^a-zA-Z0-9._-]', '', new_base_name)
+    new_base_name = re.sub(r'\s?-\s?', '_', new_base_name)
+    new_base_name = re.sub(r'_{2,}', '_', new_base_name)
+    new_base_name = re.sub(r'(?<=\d)\s+', '', new_base_name)
+    return new_base_name + ext
+
+
+def to_snake_case_uncompiled(name, ignore_extension, preserve_caps=False, split_numbers=False):
+    name, ext = os.path.splitext(name)
+    name = name.replace('_', ' ').replace('-', ' ').replace('.', ' ').replace('/', ' ')
+    name = re.sub(r'([a-z])([A-Z])', r'\1 \2', name)
+    if split_numbers:
+        name = re.sub(r'([A-Za-z])(\d)', r'\1 \2', name)
+        name = re.sub(r'(\d)([A-Za-z])', r'\1 \2', name)
+    words = [word for word in re.split(r'\s+', name.strip()) if word]
+    return '_'.join(word.lower() for word in words) + ext
+
+
+def remove_leading_uncompiled(name, values, ignore_extension):
+    char = values[0]
+    base_name, ext = os.path.splitext(name)
+    return re.sub(f'^{re.escape(char)}+', '', base_name) + ext
+
+
+def regex_replace_uncompiled(name, pattern, replacement, ignore_extension):
+    base_name, ext = os.path.splitext(name)
+    return re.sub(pattern, replacement, base_name) + ext
+
+
+USER_PATTERN = r'(\d+)_v(\d+)'
+
+CASES = [
+    ("clean", clean_filename_uncompiled, clean_filename, (False,)),
+    ("case snake", lambda n: to_snake_case_uncompiled(n, False, split_numbers=True), lambda n: to_snake_case(n, False, split_numbers=True), ()),
+    ("remove-leading", remove_leading_uncompiled, remove_leading, (["__"], False)),
+    (
+        "replace-regex",
+        lambda n: regex_replace_uncompiled(n, USER_PATTERN, r'\2_\1', False),
+        lambda n, pattern=compiled_pattern(USER_PATTERN): regex_replace_in_filenames(n, pattern, r'\2_\1', False),
+        (),
+    ),
+]
+
+
+def time_per_name(func, names, args, thrash: bool) -> float:
+    start = time.perf_counter()
+    if thrash:
+        for name in names:
+            re.purge()
+            func(name, *args)
+    else:
+        for name in names:
+            func(name, *args)
+    elapsed = time.perf_counter() - start
+
+    if thrash:
+        # Take out the cost of re.purge() itself
+        start = time.perf_counter()
+        for _ in names:
+            re.purge()
+        elapsed -= time.perf_counter() - start
+    return elapsed / len(names) * 1e9
+
+
+def measure(name_count: int) -> None:
+    names = [f"__Shot{i % 50:03d} - BG_plate  {i}_v{i % 7}.Final-Comp.exr" for i in range(name_count)]
+
+    print(f"{'ns per name':<16}{'string':>10}{'compiled':>10}{'string, thrashed':>18}{'compiled, thrashed':>20}")
+    for label, uncompiled, compiled, args in CASES:
+        row = [time_per_name(func, names, args, thrash) for thrash in (False, True) for func in (uncompiled, compiled)]
+        print(f"{label:<16}{row[0]:>10.0f}{row[1]:>10.0f}{row[2]:>18.0f}{row[3]:>20.0f}")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
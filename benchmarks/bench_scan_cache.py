@@ -0,0 +1,54 @@
+"""
+Compare a cold directory scan with a scan served from the persistent scan cache.
+
+Usage:
+    python -m benchmarks.bench_scan_cache [file_count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from lib.scan_cache import ScanCache
+from lib.scanner import DirectoryScanner
+
+
+def build_tree(root: str, file_count: int, files_per_folder: int = 200) -> None:
+    for i in range(max(1, file_count // files_per_folder)):
+        folder = os.path.join(root, f"shot_{i:04d}", "renders")
+        os.makedirs(folder)
+        for j in range(files_per_folder):
+            open(os.path.join(folder, f"frame_{j:05d}.exr"), "wb").close()
+
+    # Listings are only cached once a directory is a few seconds old
+    past = time.time() - 60
+    for folder, _, _ in os.walk(root):
+        os.utime(folder, (past, past))
+
+
+def timed_scan(root: str, cache: ScanCache) -> tuple:
+    start = time.perf_counter()
+    folders = files = 0
+    for batch in DirectoryScanner(cache=cache).scan(root):
+        folders += 1
+        files += len(batch.files)
+    return time.perf_counter() - start, folders, files
+
+
+def measure(file_count: int) -> None:
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as cache_dir:
+        build_tree(root, file_count)
+
+        cold, folders, files = timed_scan(root, ScanCache(root, cache_dir=cache_dir))
+        # A new ScanCache instance loads from the database like a fresh launch would
+        warm_cache = ScanCache(root, cache_dir=cache_dir)
+        warm, _, _ = timed_scan(root, warm_cache)
+
+        print(f"Folders:    {folders}")
+        print(f"Files:      {files}")
+        print(f"Cold scan:  {cold:.3f}s")
+        print(f"Warm scan:  {warm:.3f}s ({warm_cache.hits} hits, {warm_cache.misses} misses)")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,66 @@
+"""
+Wall time of run_columns over a pipeline of steps that only change the base of each
+name, splitting every name once for the whole run of steps against splitting and
+joining it again in every step.
+
+Usage:
+    python -m benchmarks.bench_split_once [name_count]
+"""
+import sys
+import time
+
+from lib.command.pipeline import CompiledPipeline, PipelineCompiler, PipelineStep, run_columns
+from lib.command.transform_cache import shared_cache
+
+PIPELINES = {
+    "batch steps": [
+        ("replace", ["plate", "PL"]),
+        ("remove-numbers", []),
+        ("case", ["upper"]),
+        ("suffix", ["_v2"]),
+    ],
+    "mixed steps": [
+        ("case", ["snake"]),
+        ("remove-repeating-words", []),
+        ("zeros", ["add", "4"]),
+        ("normalize", []),
+    ],
+}
+
+
+def split_per_step(pipeline: CompiledPipeline) -> CompiledPipeline:
+    """The same pipeline without base steps, so every step splits the names itself."""
+    steps = []
+    for step in pipeline.steps:
+        copy = PipelineStep(step.command_name, step.func, step.needs_path, step.needs_current_name)
+        copy.signature = step.signature
+        copy.batch = step.batch
+        steps.append(copy)
+    return CompiledPipeline(steps, pipeline.signature)
+
+
+def measure(name_count: int) -> None:
+    names = [f"Shot{i % 50:03d} BG plate {i} Final.{('exr', 'png', 'tif')[i % 3]}" for i in range(name_count)]
+
+    print(f"{name_count} names")
+    print(f"{'pipeline':<16}{'per step':>10}{'once':>10}{'speedup':>10}")
+    for label, commands in PIPELINES.items():
+        pipeline = PipelineCompiler().compile(commands)
+        baseline = split_per_step(pipeline)
+
+        shared_cache.clear()
+        start = time.perf_counter()
+        expected = run_columns(baseline, names)[-1]
+        per_step = time.perf_counter() - start
+
+        shared_cache.clear()
+        start = time.perf_counter()
+        result = list(run_columns(pipeline, names)[-1])  # Including the join at the end
+        once = time.perf_counter() - start
+        assert result == expected, label
+
+        print(f"{label:<16}{per_step:>9.2f}s{once:>9.2f}s{per_step / once:>9.1f}x")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
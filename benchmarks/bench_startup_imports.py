@@ -0,0 +1,57 @@
+"""
+Import time of the app at startup, read from python -X importtime in a fresh
+interpreter, and what the first image command adds when it loads the image backends.
+
+The packages listed under "heavy" are the ones startup should not pay for; a plain
+rename session imports none of them.
+
+Usage:
+    python -m benchmarks.bench_startup_imports [repeat]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("numpy", "PIL", "imageio", "OpenEXR", "Imath")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(code: str) -> tuple:
+    """(total microseconds of the top level imports, heavy packages imported) for one run of code."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total, imported = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # One space: imported by the code itself, not by another module
+            total += int(cumulative)
+        imported.add(name.strip().split(".")[0])
+    return total, sorted(imported.intersection(HEAVY_MODULES))
+
+
+def measure(repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        image_path = os.path.join(root, "texture.png")
+        subprocess.run(
+            [sys.executable, "-c", f"from PIL import Image; Image.new('RGB', (4, 4)).save({image_path!r})"],
+            check=True,
+        )
+        cases = [
+            ("startup", "import main"),
+            ("first image", f"import main; from lib.image_info import probe_image; probe_image({image_path!r})"),
+        ]
+        print(f"best of {repeat} runs")
+        for label, code in cases:
+            runs = [import_times(code) for _ in range(repeat)]
+            total = min(run[0] for run in runs)
+            heavy = runs[0][1]
+            print(f"{label:<14}{total / 1000:>8.1f}ms  heavy: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -11,6 +11,7 @@ from .remove import (
 )
 
 from .data_manager import DataManager
+from .watcher import FolderWatcher
 from .toggle_tree import ToggleTree
 from .info_display import InfoDisplay, OutputDisplay
 from .file_table import FileTable, EditCellRequested
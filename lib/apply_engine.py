@@ -0,0 +1,616 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from .scan_cache import user_cache_dir
+
+JOURNAL_FILE_NAME = "apply_journal-{root}.jsonl"  # One per root folder, named by a hash of its path
+JOURNAL_FLUSH_EVERY = 500  # Renames between progress records, resume checks the ones after the last record on disk
+TEMP_NAME = ".{name}.namnbyte-{index}"  # Where the first item of a rename cycle waits
+DEFAULT_APPLY_WORKERS = 8  # Renames in flight at once in a concurrent apply
+
+
+class RenameOp:
+    """One item to rename: a File or Folder, the path it has and the path it gets."""
+    __slots__ = ("item", "src", "dst", "inode")
+
+    def __init__(self, item, src: str, dst: str, inode: int = 0):
+        self.item = item
+        self.src = src
+        self.dst = dst
+        self.inode = inode
+
+    def __repr__(self):
+        return f"RenameOp({self.src!r} -> {self.dst!r})"
+
+
+class RenamePlan:
+    """
+    Every rename of one apply, checked and ordered so the steps can run one after another.
+
+    A rename whose target is taken by a file that isn't moving, by another rename's target,
+    or by a rename that can't run is left out and listed in conflicts.
+
+    steps are (src, dst, inode, final, op) tuples, one os.rename each; plain tuples because
+    a plan holds one per file. A rename in a cycle takes two steps through a temporary
+    name, and only the second is final.
+    """
+
+    def __init__(self, steps: list, conflicts: list, cycles: int = 0):
+        self.steps = steps
+        self.conflicts = conflicts  # (op, reason)
+        self.cycles = cycles
+
+
+class DirectoryStats:
+    """How the renames in one directory went in a concurrent apply."""
+    __slots__ = ("directory", "renamed", "failed", "started", "finished")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.renamed = 0
+        self.failed = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started if self.started is not None else 0.0
+
+    @property
+    def rate(self) -> float:
+        """Renames per second."""
+        return self.renamed / self.seconds if self.seconds > 0 else 0.0
+
+
+class ApplyResult:
+    def __init__(self, renamed: list = None, failed: list = None, conflicts: list = None):
+        self.renamed = renamed if renamed is not None else []  # Ops whose item has its new name on disk
+        self.failed = failed if failed is not None else []  # (op, or (src, dst) without one, error message)
+        self.conflicts = conflicts if conflicts is not None else []
+        self.directories = {}  # directory -> DirectoryStats, filled by a concurrent apply
+
+
+_case_insensitive_dirs = {}  # directory -> True if it matches names case-insensitively, probed once
+
+
+def _probe_case_insensitive(directory: str) -> bool:
+    """
+    True if directory finds a name however its case is written, as on Windows and by
+    default on macOS. Looks up an entry under its case-swapped name; without an entry
+    to try, its own name is looked up in its parent, then the platform default is used.
+    """
+    candidates = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.swapcase() != entry.name and entry.name.swapcase().swapcase() == entry.name:
+                    candidates.append((entry.path, os.path.join(directory, entry.name.swapcase())))
+                    break
+    except OSError:
+        pass
+    parent, name = os.path.split(directory)
+    if name and name.swapcase() != name:
+        candidates.append((directory, os.path.join(parent, name.swapcase())))
+
+    for path, swapped in candidates:
+        try:
+            stat_result = os.lstat(path)
+        except OSError:
+            continue
+        try:
+            return os.path.samestat(stat_result, os.lstat(swapped))
+        except OSError:
+            return False  # The swapped name isn't there
+    return os.name == "nt" or sys.platform == "darwin"
+
+
+def _name_key(directory: str):
+    """The function that turns a name or path in directory into the key the filesystem compares."""
+    if os.name == "nt":
+        return os.path.normcase
+    folds = _case_insensitive_dirs.get(directory)
+    if folds is None:
+        folds = _case_insensitive_dirs[directory] = _probe_case_insensitive(directory)
+    return str.casefold if folds else str
+
+
+def _key(path: str) -> str:
+    """path as its directory compares it, case-folded where the directory ignores case."""
+    return _name_key(path.rpartition(os.sep)[0])(path)
+
+
+def _same_item(path: str, other: str) -> bool:
+    try:
+        return os.path.samestat(os.lstat(path), os.lstat(other))
+    except OSError:
+        return False
+
+
+def _list_names(directory: str) -> set:
+    key = _name_key(directory)
+    try:
+        return {key(name) for name in os.listdir(directory)}
+    except OSError:
+        return set()  # The renames into it fail and are reported then
+
+
+def plan_renames(ops: list) -> RenamePlan:
+    """
+    Check a list of RenameOps against each other and the disk, and order them.
+
+    Each target directory is listed once instead of checking every target. Folders are
+    renamed deepest first so the paths of the ones above stay valid. When renames form
+    a chain, the one whose target is still taken waits for the rename that frees it;
+    a cycle such as a -> b, b -> a is broken by moving one item to a temporary name first.
+    """
+    blocked = {}  # op -> reason
+    sep, altsep = os.sep, os.altsep
+
+    by_source = {_key(op.src): op for op in ops}
+    by_target = {}
+    duplicates = {}  # target -> every op renamed to it, when there is more than one
+    for op in ops:
+        target_key = _key(op.dst)
+        other = by_target.setdefault(target_key, op)
+        if other is not op:
+            duplicates.setdefault(target_key, [other]).append(op)
+    for same_target in duplicates.values():
+        for op in same_target:
+            blocked[op] = f"{len(same_target)} items get the name {os.path.basename(op.dst)}"
+
+    names_in = {}
+    for op in ops:
+        directory, _, name = op.dst.rpartition(sep)
+        if not name or name == "." or name == "..":
+            blocked.setdefault(op, "empty name")
+            continue
+        if directory != op.src.rpartition(sep)[0] or (altsep and altsep in name):
+            blocked.setdefault(op, "name contains a path separator")
+            continue
+        if op in blocked or _key(op.dst) in by_source:
+            continue  # Taken by an item that is renamed too, or only the case changes
+        names = names_in.get(directory)
+        if names is None:
+            names = names_in[directory] = _list_names(directory)
+        if _name_key(directory)(name) in names:
+            blocked[op] = f"{name} already exists"
+
+    # A rename into the place of an item that stays put can't run either
+    pending = list(blocked)
+    while pending:
+        op = pending.pop()
+        source_key = _key(op.src)
+        waiting = by_target.get(source_key)
+        for waiting in duplicates.get(source_key) or ((waiting,) if waiting is not None else ()):
+            if waiting not in blocked:
+                blocked[waiting] = f"{os.path.basename(op.src)} is not renamed"
+                pending.append(waiting)
+
+    conflicts = [(op, blocked[op]) for op in ops if op in blocked]
+    runnable = [op for op in ops if op not in blocked] if blocked else list(ops)
+
+    # Deepest paths first, so a folder is renamed after everything inside it
+    runnable.sort(key=lambda op: op.src.count(sep), reverse=True)
+    frees = {}  # op -> the op that has to move away before op's target is free
+    for op in runnable:
+        blocker = by_source.get(_key(op.dst))
+        if blocker is not None and blocker is not op:
+            frees[op] = blocker
+
+    steps = []
+    if not frees:
+        steps = [(op.src, op.dst, op.inode, True, op) for op in runnable]  # No renames wait for each other
+        return RenamePlan(steps, conflicts)
+
+    done = set()
+    cycles = 0
+    for op in runnable:
+        if op in done:
+            continue
+        chain = []
+        on_chain = set()
+        current = op
+        while current is not None and current not in done and current not in on_chain:
+            chain.append(current)
+            on_chain.add(current)
+            current = frees.get(current)
+
+        cycle_start = current if current is not None and current in on_chain else None
+        if cycle_start is not None:
+            cycles += 1
+            directory, name = os.path.split(cycle_start.src)
+            names = names_in.get(directory)
+            if names is None:
+                names = names_in[directory] = _list_names(directory)
+            key = _name_key(directory)
+            index = 0
+            temp = os.path.join(directory, TEMP_NAME.format(name=name, index=index))
+            while key(os.path.basename(temp)) in names or key(temp) in by_target:
+                index += 1
+                temp = os.path.join(directory, TEMP_NAME.format(name=name, index=index))
+            names.add(key(os.path.basename(temp)))
+            steps.append((cycle_start.src, temp, cycle_start.inode, False, cycle_start))
+
+        # The end of the chain frees the target of the one before it, and so on back to op
+        for chain_op in reversed(chain):
+            src = temp if chain_op is cycle_start else chain_op.src
+            steps.append((src, chain_op.dst, chain_op.inode, True, chain_op))
+            done.add(chain_op)
+
+    return RenamePlan(steps, conflicts, cycles)
+
+
+def plan_lanes(steps: list, nested: bool = False, width: int = DEFAULT_APPLY_WORKERS) -> list:
+    """
+    Split the steps of a plan into lanes of step indexes that can run at the same time.
+
+    Steps that share a path, as the links of a chain or a cycle do, stay in one lane in
+    plan order. The independent steps of a directory are spread over up to width lanes.
+    With nested, for folders, the lanes come in waves by depth, deepest first; a wave
+    starts once the one before it finished, so a folder is still renamed after
+    everything inside it. Returns the waves, each a list of lanes.
+    """
+    sep = os.sep
+    parent = {}  # Union-find over path keys, the steps of a chain end up with one root
+
+    def find(key):
+        while True:
+            up = parent.setdefault(key, key)
+            if up == key:
+                return key
+            parent[key] = key = parent.setdefault(up, up)
+
+    sources = {_key(step[0]) for step in steps}
+    linked = any(_key(step[1]) in sources for step in steps)
+    if linked:
+        for src, dst, *_ in steps:
+            src_root, dst_root = find(_key(src)), find(_key(dst))
+            if src_root != dst_root:
+                parent[dst_root] = src_root
+
+    groups = {}  # (depth, directory) -> {chain root -> [step indexes]}
+    for index, step in enumerate(steps):
+        src = step[0]
+        directory = src.rpartition(sep)[0]
+        depth = src.count(sep) if nested else 0
+        root = find(_key(src)) if linked else index
+        groups.setdefault((depth, directory), {}).setdefault(root, []).append(index)
+
+    waves = {}
+    for (depth, directory), chains in groups.items():
+        lanes = [[] for _ in range(min(width, len(chains)))]
+        for number, chain in enumerate(chains.values()):
+            lanes[number % len(lanes)].extend(chain)
+        waves.setdefault(depth, []).extend(lanes)
+    return [waves[depth] for depth in sorted(waves, reverse=True)]
+
+
+def _holds(path: str, inode: int) -> bool:
+    """True if the item with inode is at path. An unknown inode (0) matches anything there."""
+    try:
+        stat_result = os.lstat(path)
+    except OSError:
+        return False
+    return not inode or stat_result.st_ino == inode
+
+
+class RenameJournal:
+    """
+    Append-only record of the last apply: the planned steps, then how far it got.
+
+    The steps are written and synced before the first rename, with the lanes they run in
+    for a concurrent apply. The indexes of the steps that ran are appended every
+    JOURNAL_FLUSH_EVERY renames, and the inode of every item is kept, so after a crash the
+    steps of each lane since the last record are checked on disk. An apply that didn't
+    finish can then be resumed or rolled back.
+
+    Without a path the journal is kept in the user cache directory, one file per root, so
+    an apply in another folder never overwrites the journal of this one.
+    """
+
+    def __init__(self, path: Path = None, root: str = ""):
+        if path is None:
+            digest = hashlib.sha1(os.path.abspath(root).encode("utf-8", "surrogatepass")).hexdigest()[:16]
+            path = user_cache_dir() / JOURNAL_FILE_NAME.format(root=digest)
+        self.path = Path(path)
+        self._file = None
+
+    def start(self, steps: list, root: str = "", lanes: list = None) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"started": time.time(), "root": root, "steps": len(steps)}) + "\n")
+        self._file.write(json.dumps([step[:4] for step in steps]) + "\n")
+        if lanes is not None:
+            self._file.write(json.dumps({"lanes": lanes}) + "\n")
+        self._sync()
+
+    def record_ran(self, indexes: list) -> None:
+        self._write({"ran": indexes})
+
+    def record_failure(self, index: int, error: str) -> None:
+        self._write({"failed": index, "error": error})
+
+    def finish(self, event: str = "finished") -> None:
+        self._write({event: time.time()})
+        self._sync()
+        self._file.close()
+        self._file = None
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def load(self) -> dict:
+        """
+        Read the journal back. Returns None if there is none, otherwise a dict with the
+        header, the steps as (src, dst, inode, final), the lanes or None, the indexes of
+        the steps that ran and that failed, and whether it finished or was rolled back.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as journal_file:
+                lines = journal_file.read().splitlines()
+        except OSError:
+            return None
+        if not lines:
+            return None
+
+        state = {
+            "header": None, "steps": [], "lanes": None, "ran": set(), "failed": set(),
+            "closed": False, "rolled_back": False,
+        }
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # Cut off by a crash while it was written
+            if isinstance(record, list):
+                try:
+                    state["steps"] = [tuple(step) for step in record]
+                except TypeError:
+                    return None  # Not a journal this version wrote
+            elif state["header"] is None:
+                state["header"] = record
+            elif "ran" in record:
+                state["ran"].update(record["ran"])
+            elif "lanes" in record:
+                state["lanes"] = record["lanes"]
+            elif "failed" in record:
+                state["failed"].add(record["failed"])
+            elif "finished" in record:
+                state["closed"] = True
+            elif "rolled_back" in record:
+                state["closed"] = state["rolled_back"] = True
+        if state["header"] is None or len(state["steps"]) < state["header"].get("steps", 0):
+            return None  # The plan itself is incomplete, nothing was renamed yet
+        return state
+
+    def pending(self) -> dict:
+        """The loaded journal if it holds an apply that didn't finish, else None."""
+        state = self.load()
+        return state if state is not None and not state["closed"] else None
+
+    def reopen(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+
+
+def _remaining_steps(state: dict) -> list:
+    """
+    Indexes of the steps that didn't run, in plan order.
+
+    A lane runs its steps in order, so in each lane the steps after the last record are
+    checked on disk up to the first one whose item is still at its old path.
+    """
+    if state["closed"]:
+        return []
+    steps = state["steps"]
+    ran, recorded = state["ran"], state["ran"] | state["failed"]
+    remaining = []
+    for lane in state["lanes"] or [range(len(steps))]:
+        for position, index in enumerate(lane):
+            if index in recorded:
+                continue
+            src, dst, inode, final = steps[index]
+            if _holds(src, inode):
+                remaining.extend(index for index in lane[position:] if index not in ran)
+                break
+    remaining.sort()
+    return remaining
+
+
+class _Progress:
+    """Collects the indexes of the steps that ran and appends them to the journal in batches, from any thread."""
+
+    def __init__(self, journal: RenameJournal = None):
+        self.journal = journal
+        self._ran = []
+        self._lock = threading.Lock()
+
+    def ran(self, index: int) -> None:
+        with self._lock:
+            self._ran.append(index)
+            if len(self._ran) >= JOURNAL_FLUSH_EVERY:
+                self.journal.record_ran(self._ran)
+                self._ran = []
+
+    def failed(self, index: int, error: str) -> None:
+        with self._lock:
+            self.journal.record_failure(index, error)
+
+    def finish(self) -> None:
+        if self._ran:
+            self.journal.record_ran(self._ran)
+            self._ran = []
+        self.journal.finish()
+
+
+def _run_lane(steps: list, indexes, progress: _Progress = None, verify: bool = False) -> ApplyResult:
+    """Run the given steps one after another. See execute_steps."""
+    result = ApplyResult()
+    stuck = set()  # Paths still taken because their rename failed or was skipped
+    rename = os.rename
+    for index in indexes:
+        src, dst, inode, final, op = steps[index]
+        if stuck and _key(dst) in stuck:
+            error = f"{os.path.basename(dst)} is still taken"
+        elif verify and not _holds(src, inode):
+            error = f"{os.path.basename(src)} is not where it was"
+        elif os.path.lexists(dst) and _key(dst) != _key(src) and not _same_item(src, dst):
+            # Checked right before the rename too: on POSIX os.rename replaces what is there
+            error = f"{os.path.basename(dst)} already exists"
+        else:
+            try:
+                rename(src, dst)
+                error = None
+            except OSError as e:
+                error = e.strerror or str(e)
+
+        if error is None:
+            if final:
+                result.renamed.append(op if op is not None else (src, dst))
+            if progress is not None:
+                progress.ran(index)
+        else:
+            stuck.add(_key(src))
+            result.failed.append((op if op is not None else (src, dst), error))
+            if progress is not None:
+                progress.failed(index, error)
+    return result
+
+
+def execute_steps(steps: list, journal: RenameJournal = None, indexes=None, verify: bool = False) -> ApplyResult:
+    """
+    Run the steps of a plan in order with one os.rename each, all of them or the given indexes.
+
+    A step whose target is the source of a step that failed is skipped, so a failure
+    never lets a later rename overwrite an item that didn't move, and so is a step whose
+    target exists when it runs. With verify, every step first checks that its item is
+    still there, for a resumed plan that was made before the disk could have changed.
+    """
+    progress = _Progress(journal) if journal is not None else None
+    result = _run_lane(steps, range(len(steps)) if indexes is None else indexes, progress, verify)
+    if progress is not None:
+        progress.finish()
+    return result
+
+
+def _run_timed_lane(steps: list, progress: _Progress, lane: list) -> tuple:
+    started = time.perf_counter()
+    result = _run_lane(steps, lane, progress)
+    return lane, result, started, time.perf_counter()
+
+
+def execute_concurrent(
+    steps: list, waves: list, journal: RenameJournal = None, max_workers: int = DEFAULT_APPLY_WORKERS
+) -> ApplyResult:
+    """
+    Run the lanes of each wave from plan_lanes on a pool of threads, one wave after another.
+
+    Meant for network shares, where every rename waits on a round trip and the waits of
+    independent renames can overlap. The result counts the renames, failures and wall
+    time of every directory.
+    """
+    result = ApplyResult()
+    progress = _Progress(journal) if journal is not None else None
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="apply") as pool:
+        for lanes in waves:
+            for lane, lane_result, started, finished in pool.map(partial(_run_timed_lane, steps, progress), lanes):
+                result.renamed.extend(lane_result.renamed)
+                result.failed.extend(lane_result.failed)
+
+                directory = os.path.dirname(steps[lane[0]][0])
+                stats = result.directories.get(directory)
+                if stats is None:
+                    stats = result.directories[directory] = DirectoryStats(directory)
+                stats.renamed += len(lane_result.renamed)
+                stats.failed += len(lane_result.failed)
+                stats.started = started if stats.started is None else min(stats.started, started)
+                stats.finished = finished if stats.finished is None else max(stats.finished, finished)
+    if progress is not None:
+        progress.finish()
+    return result
+
+
+def apply_plan(
+    plan: RenamePlan, journal: RenameJournal = None, root: str = "", workers: int = 1, nested: bool = False
+) -> ApplyResult:
+    """
+    Journal and run a plan. Without a journal the renames still run, they just can't be resumed.
+
+    With more than one worker the independent steps run concurrently, see execute_concurrent;
+    nested keeps folders renamed after everything inside them.
+    """
+    waves = plan_lanes(plan.steps, nested, workers) if workers > 1 and len(plan.steps) > 1 else None
+    if journal is not None and plan.steps:
+        try:
+            journal.start(plan.steps, root, [lane for lanes in waves for lane in lanes] if waves else None)
+        except OSError as e:
+            print(f"Apply journal disabled: {e}")
+            journal = None
+    journal = journal if plan.steps else None
+    if waves:
+        result = execute_concurrent(plan.steps, waves, journal, workers)
+    else:
+        result = execute_steps(plan.steps, journal)
+    result.conflicts = plan.conflicts
+    return result
+
+
+def resume_journal(journal: RenameJournal) -> ApplyResult:
+    """Run the rest of an interrupted apply. Returns None if there is nothing to resume."""
+    state = journal.pending()
+    if state is None:
+        return None
+    remaining = _remaining_steps(state)
+    steps = [(src, dst, inode, final, None) for src, dst, inode, final in state["steps"]]
+    journal.reopen()
+    return execute_steps(steps, journal, remaining, verify=True)
+
+
+def rollback_journal(journal: RenameJournal) -> ApplyResult:
+    """
+    Undo the steps of the last apply that ran, newest first.
+
+    Works for an interrupted apply and for one that finished. An item is only moved
+    back if it is still at its new path and its old path is free.
+    """
+    state = journal.load()
+    if state is None or state["rolled_back"]:
+        return None
+    remaining = set(_remaining_steps(state))
+    result = ApplyResult()
+    journal.reopen()
+    for index in reversed(range(len(state["steps"]))):
+        if index in remaining or (index in state["failed"] and index not in state["ran"]):
+            continue  # Never ran, or failed and wasn't retried by a resume
+        src, dst, inode, final = state["steps"][index]
+        if not _holds(dst, inode):
+            result.failed.append(((dst, src), "not found at its new path"))
+            continue
+        if os.path.lexists(src):
+            result.failed.append(((dst, src), f"{os.path.basename(src)} is taken"))
+            continue
+        try:
+            os.rename(dst, src)
+        except OSError as e:
+            result.failed.append(((dst, src), e.strerror or str(e)))
+            continue
+        if final:
+            result.renamed.append((dst, src))
+    journal.finish("rolled_back")
+    return result
+
+
+def journal_directories(state: dict) -> set:
+    """The directories an apply touched, to bring the model up to date after a resume or rollback."""
+    return {os.path.dirname(step[0]) for step in state["steps"]}
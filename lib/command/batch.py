@@ -0,0 +1,166 @@
+import os
+import re
+from functools import partial
+
+from .rename_functions import _DIGITS
+from ..regex_cache import compiled_pattern
+
+
+def split_extensions(names: list) -> tuple:
+    """
+    Split a column of names into bases and extensions, the same way os.path.splitext does.
+
+    Plain file names take a fast path; anything with a path separator in it goes through
+    os.path.splitext itself.
+    """
+    bases, exts = [], []
+    add_base, add_ext = bases.append, exts.append
+    splitext = os.path.splitext
+    for name in names:
+        dot = name.rfind(".")
+        if "/" in name or "\\" in name:
+            base, ext = splitext(name)
+        elif dot > 0 and (name[0] != "." or name[:dot].lstrip(".")):
+            base, ext = name[:dot], name[dot:]
+        else:
+            base, ext = name, ""  # No dot, or only leading dots as in ".bashrc"
+        add_base(base)
+        add_ext(ext)
+    return bases, exts
+
+
+def resplit_extensions(bases: list, exts: list) -> tuple:
+    """
+    Split names given as bases and extensions again where a step may have moved the boundary.
+
+    Only a base that is empty or has a dot or path separator in it can do that, as in
+    "" + ".txt" or "a.b" + "". Returns (bases, exts), the same lists if every split still
+    holds. bases is updated in place, exts is copied first.
+    """
+    joined = "".join(bases)
+    if "." not in joined and "/" not in joined and "\\" not in joined and "" not in bases:
+        return bases, exts
+
+    indexes = [i for i, base in enumerate(bases) if not base or "." in base or "/" in base or "\\" in base]
+    split_bases, split_exts = split_extensions([bases[i] + exts[i] for i in indexes])
+    exts = exts.copy()
+    for i, base, ext in zip(indexes, split_bases, split_exts):
+        bases[i] = base
+        exts[i] = ext
+    return bases, exts
+
+
+def batch_prefix(names, prefix, ignore_extension):
+    # The prefix goes in front of the base, which is also the front of the whole name
+    return [prefix + name for name in names]
+
+
+def batch_suffix(names, suffix, ignore_extension):
+    if ignore_extension:
+        return [name + suffix for name in names]
+    bases, exts = split_extensions(names)
+    return [base + suffix + ext for base, ext in zip(bases, exts)]
+
+
+def batch_replace(names, old, new, ignore_extension):
+    if ignore_extension:
+        return [name.replace(old, new) for name in names]
+    bases, exts = split_extensions(names)
+    return [base.replace(old, new) + ext for base, ext in zip(bases, exts)]
+
+
+def batch_upper(names, ignore_extension):
+    if ignore_extension:
+        return [name.upper() for name in names]
+    bases, exts = split_extensions(names)
+    return [base.upper() + ext for base, ext in zip(bases, exts)]
+
+
+def batch_lower(names, ignore_extension):
+    if ignore_extension:
+        return [name.lower() for name in names]
+    bases, exts = split_extensions(names)
+    return [base.lower() + ext for base, ext in zip(bases, exts)]
+
+
+def batch_remove_numbers(names, ignore_extension):
+    sub = _DIGITS.sub
+    if ignore_extension:
+        return [sub("", name) for name in names]
+    bases, exts = split_extensions(names)
+    return [sub("", base) + ext for base, ext in zip(bases, exts)]
+
+
+def batch_replace_ext(names, old_ext, new_ext, pattern):
+    # Same as substituting pattern, r'\.old$', with '.new': only the final extension changes.
+    # "$" also matches before a trailing newline, those rare names go through the regex.
+    old_ext, new_ext = "." + old_ext, "." + new_ext
+    cut = len(old_ext)
+    return [
+        name[:-cut] + new_ext if name.endswith(old_ext)
+        else pattern.sub(new_ext, name) if name.endswith("\n")
+        else name
+        for name in names
+    ]
+
+
+def batch_zeros_add(names, total_digits, ignore_extension):
+    def pad(match):
+        return match.group(0).zfill(total_digits)
+
+    sub = _DIGITS.sub
+    if ignore_extension:
+        return [sub(pad, name) for name in names]
+    bases, exts = split_extensions(names)
+    return [sub(pad, base) + ext for base, ext in zip(bases, exts)]
+
+
+def batch_zeros_remove(names, ignore_extension):
+    def strip_zeros(match):
+        return str(int(match.group()))
+
+    sub = _DIGITS.sub
+    if ignore_extension:
+        return [sub(strip_zeros, name) for name in names]
+    bases, exts = split_extensions(names)
+    return [sub(strip_zeros, base) + ext for base, ext in zip(bases, exts)]
+
+
+def compile_batch_step(command_name: str, values, ignore_extension=False, preserve_caps=False):
+    """
+    Return a function that applies the command to a whole list of names, or None.
+
+    Only commands that are plain per-name string maps have one, and only for arguments
+    where the result is exactly what the scalar rename function returns.
+    """
+    if command_name == "prefix":
+        return partial(batch_prefix, prefix=values[0], ignore_extension=ignore_extension)
+    if command_name == "suffix":
+        return partial(batch_suffix, suffix=values[0], ignore_extension=ignore_extension)
+    if command_name == "replace":
+        return partial(batch_replace, old=values[0], new=values[1], ignore_extension=ignore_extension)
+    if command_name == "remove-numbers":
+        return partial(batch_remove_numbers, ignore_extension=ignore_extension)
+    if command_name == "case":
+        style = values[0].lower()
+        if style == "upper":
+            return partial(batch_upper, ignore_extension=ignore_extension)
+        if style == "lower" and not preserve_caps:
+            return partial(batch_lower, ignore_extension=ignore_extension)
+        return None
+    if command_name == "replace-ext":
+        if "\\" in values[1]:
+            return None  # The scalar version expands it as a regex template
+        pattern = compiled_pattern(r'\.' + re.escape(values[0]) + '$')
+        return partial(batch_replace_ext, old_ext=values[0], new_ext=values[1], pattern=pattern)
+    if command_name == "zeros":
+        style = values[0].lower()
+        if style == "add":
+            try:
+                total_digits = int(values[1])
+            except ValueError:
+                return None
+            return partial(batch_zeros_add, total_digits=total_digits, ignore_extension=ignore_extension)
+        if style == "remove":
+            return partial(batch_zeros_remove, ignore_extension=ignore_extension)
+    return None
@@ -1,5 +1,6 @@
 import shlex
 from .rename_functions import *
+from .pipeline import PipelineCompiler, CompiledPipeline
 from ..signal import Signal, InformationSignal
 import datetime
 
@@ -207,6 +208,7 @@ flags = {
     "split-numbers": {"args": []},
     "apply": {"args": []},
     "apply-all": {"args": []},
+    "apply-workers": {"args": [{"name": "workers", "required": True}]},
     "enable-pattern": {"args": [{"name": "*_pattern*", "required": True}]},
     "disable-pattern": {"args": [{"name": "*_pattern*", "required": True}]},
     "enable-regex": {"args": [{"name": "regex", "required": True}]},
@@ -216,6 +218,13 @@ flags = {
     "enable-all": {"args": []},
     "disable-all": {"args": []},
     "reset-all": {"args": []},
+    "rescan": {"args": []},
+    "purge-cache": {"args": []},
+    "preview": {"args": []},
+    "compute-all": {"args": []},
+    "revise": {"args": []},
+    "resume-apply": {"args": []},
+    "rollback-apply": {"args": []},
 }
 
 flags_info = {
@@ -269,6 +278,11 @@ flags_info = {
         "usage": "",
         "example": "",
     },
+    "apply-workers": {
+        "description": "Rename this many independent items at once when applying. Speeds up applies on network shares.",
+        "usage": "--apply-workers <workers>",
+        "example": "--apply --apply-workers 16",
+    },
     "enable-pattern": {
         "description": "",
         "usage": "",
@@ -314,6 +328,41 @@ flags_info = {
         "usage": "",
         "example": "",
     },
+    "rescan": {
+        "description": "Re-read file sizes and modification dates from disk before filtering.",
+        "usage": "--rescan",
+        "example": "-prefix old_ --size 1000 --rescan",
+    },
+    "purge-cache": {
+        "description": "Delete the cached folder listings for the current root and the cached image headers. The next scan and image commands read everything from disk.",
+        "usage": "--purge-cache",
+        "example": "--purge-cache",
+    },
+    "preview": {
+        "description": "Only compute new names for the rows in view. Nothing is changed until --compute-all or --apply.",
+        "usage": "--preview",
+        "example": "-case snake --preview",
+    },
+    "compute-all": {
+        "description": "Process every file with the command that is being previewed.",
+        "usage": "--compute-all",
+        "example": "--compute-all",
+    },
+    "revise": {
+        "description": "Replace the last run with this command instead of applying it on top of the current names. The steps it shares with the start of the last command are not run again.",
+        "usage": "--revise",
+        "example": "-case upper -prefix y_ --revise",
+    },
+    "resume-apply": {
+        "description": "Finish an apply that was interrupted, from its journal.",
+        "usage": "--resume-apply",
+        "example": "--resume-apply",
+    },
+    "rollback-apply": {
+        "description": "Give the files of the last apply their old names back, also if it was interrupted.",
+        "usage": "--rollback-apply",
+        "example": "--rollback-apply",
+    },
 }
 
 
@@ -434,7 +483,9 @@ class CommandPipelineHandler:
         self.command_history = []
         self.history_index = -1
         self.flags = set()
-        self.process_steps = []
+        self.commands_args = []  # (command_name, filled_args) of the last parsed input
+        self.pipeline_compiler = PipelineCompiler()
+        self.pipeline = CompiledPipeline([])
         self.information_signal = InformationSignal()
         self.task_request_signal = Signal()
 
@@ -447,7 +498,8 @@ class CommandPipelineHandler:
         if input_command != "" and (len(self.command_history) == 0 or self.command_history[-1] != input_command):
             self.command_history.append(input_command)
             self.history_index = len(self.command_history)
-        self.process_steps = []
+        self.commands_args = []
+        self.pipeline = CompiledPipeline([])
         
         # Try parsing and preparing the pipeline, and validate
         try:
@@ -492,11 +544,9 @@ class CommandPipelineHandler:
 
                 expected_args = commands[command_name]["args"]
                 filled_args = self._fill_arguments(args, expected_args)
+                self.commands_args.append((command_name, filled_args))
 
-                step = self._create_process_step(command_name, filled_args)
-                self.process_steps.append(step)
-
-            if not self.process_steps:
+            if not self.commands_args:
                 self.information_signal.emit_error(f"No command entered")
 
         except ValueError as e:
@@ -582,134 +632,34 @@ class CommandPipelineHandler:
         return filled_args
 
 
-    def _create_process_step(self, command_name, args):
-        def step(filename, path, current_name, state):
-            return self._process_filename(filename, command_name, args, path, current_name, state)
-        return step
-
-    # TODO: Validate input
-    def _process_filename(self, name, command_name, values, path=None, current_name="", state="file"):
-        ignore_extension = "ignore-extension" in self.flags
-        preserve_caps = "preserve-caps" in self.flags
-        split_numbers = "split-numbers" in self.flags
-
-        if state == "folder":
-            ignore_extension = True
-
-        if values is None:
-            self.information_signal.emit_error(f"Error: Invalid arguments for command '{command_name}'. Skipping file processing.")
-            print(f"Error: Invalid arguments for command '{command_name}'. Skipping file processing.")
-            return name
-
-        try:
-            if command_name == "case":
-                style = values[0].lower()
-                if style == "upper":
-                    return to_uppercase(name, ignore_extension)
-                elif style == "lower":
-                    return to_lowercase(name, ignore_extension, preserve_caps)
-                elif style == "snake":
-                    return to_snake_case(name, ignore_extension, preserve_caps, split_numbers=split_numbers)
-                elif style == "camel":
-                    return to_camel_case(name, ignore_extension, preserve_caps, split_numbers=split_numbers)
-                elif style == "pascal":
-                    return to_pascal_case(name, ignore_extension, preserve_caps, split_numbers=split_numbers)
-                elif style == "kebab":
-                    return to_kebab_case(name, ignore_extension, preserve_caps, split_numbers=split_numbers)
-                elif style == "title":
-                    return to_title_case(name, ignore_extension, preserve_caps, split_numbers=split_numbers)
-                elif style == "flip":
-                    return flip_case(name, ignore_extension)
-                elif style == "capitalize":
-                    return to_capitalize(name, ignore_extension, preserve_caps)
-                elif style == "dot":
-                    return to_dot_case(name, ignore_extension, preserve_caps, split_numbers=split_numbers)
-                # elif style == "train":
-                #     return to_train_case(name, ignore_extension, preserve_caps)
-                elif style == "title-snake":
-                    return to_capitalized_snake_case(name, ignore_extension, preserve_caps, split_numbers=split_numbers)
-
-            elif command_name == "zeros":
-                style = values[0].lower()
-                if style == "add":
-                    return add_leading_zeros_to_number(name,values[1], ignore_extension)
-                elif style == "remove":
-                    return remove_leading_zeros(name, ignore_extension)
-                
-            elif command_name == "prefix":
-                return prefix_add(name, values[0], ignore_extension)
-            elif command_name == "suffix":
-                return suffix_add(name, values[0], ignore_extension)
-            
-            elif command_name == "clean":
-                return clean_filename(name, ignore_extension)
-
-            elif command_name == "replace":
-                old_text, new_text = values
-                return replace_in_filename(name, old_text, new_text, ignore_extension)
-            elif command_name == "replace-separator":
-                new_separator = values[0]
-                return replace_separator(name, new_separator, ignore_extension)
-            elif command_name == "replace-regex":
-                pattern = values[0]
-                replacement = values[1]
-                return regex_replace_in_filenames(name, pattern, replacement, ignore_extension)
-            elif command_name == "replace-ext":
-                return regex_replace_in_filenames(name, r'\.' + re.escape(values[0]) + '$', '.' + values[1], True)
-            elif command_name == "replace-index":
-                return replace_word_by_index(name, values[0], int(values[1]), values[2], ignore_extension)
-            elif command_name == "swap":
-                return swap_words(name, values[0], values[1], ignore_extension)
-
-            elif command_name == "remove":
-                if isinstance(values[0], list):
-                    values = values[0]
-                return remove_in_filename(name, values, ignore_extension)
-            elif command_name == "remove-repeating-connected":
-                if isinstance(values[0], list):
-                    values = values[0]
-                return remove_connected_repeating_input(name, values, ignore_extension)
-            elif command_name == "remove-numbers":
-                return remove_numbers(name, ignore_extension)
-            elif command_name == "remove-special":
-                return remove_special_characters(name, ignore_extension)
-            elif command_name == "remove-non-ascii":
-                return remove_non_ascii(name, ignore_extension)
-            elif command_name == "remove-leading":
-                return remove_leading(name, values, ignore_extension)
-            elif command_name == "remove-trailing":
-                return remove_trailing(name, values, ignore_extension)
-            elif command_name == "remove-repeating-words":
-                return remove_duplicate_words(name, ignore_extension)
-            
-            elif command_name == "reverse":
-                return reverse_string(name, ignore_extension)
-            
-            elif command_name == "add-timestamp":
-                return add_timestamp(name=name, granularity=values[0], separator=values[1], ignore_extension=ignore_extension)
-            elif command_name == "add-separators":
-                return add_separators(name=name, separator=values[0], ignore_extension=ignore_extension, split_numbers=split_numbers)
-            
-            elif command_name == "resolution-add":
-                return add_resolution(name=name, values=values, ignore_extension=ignore_extension, path=path)
-            elif command_name == "resolution-remove":
-                return remove_resolution(file_name=name, type=values, ignore_extension=ignore_extension)
-            elif command_name == "img-info-add":
-                return add_image_info(name=name, values=values, ignore_extension=ignore_extension, path=path)
-            
-            elif command_name == "reset":
-                return current_name
-            elif command_name == "normalize":
-                return normalize_filename(name=name, ignore_extension=ignore_extension)
-            elif command_name == "limit-length":
-                return limit_filename_length(name=name, max_length=int(values[0]), ignore_extension=ignore_extension)
-            return name
-        except Exception as e:
-            self.information_signal.emit_error(f"{e}")
-            raise
+    def compile_pipeline(self, state) -> CompiledPipeline:
+        """Resolve the parsed commands and current flags into a pipeline, reusing a cached one if possible."""
+        pipeline = self.pipeline_compiler.compile(
+            self.commands_args,
+            ignore_extension="ignore-extension" in self.flags or state == "folder",
+            preserve_caps="preserve-caps" in self.flags,
+            split_numbers="split-numbers" in self.flags,
+        )
+        for error in pipeline.errors:
+            self.information_signal.emit_error(f"Error: {error}. Skipping this step.")
+            print(f"Error: {error}. Skipping this step.")
+        return pipeline
 
     def process_file_names(self, state):
         filters = self._extract_filters_from_flags()
+        self.pipeline = self.compile_pipeline(state)
+
+        # Settle an interrupted apply before anything else looks at the names on disk
+        if "resume-apply" in self.flags:
+            self.task_request_signal.emit({"type": "resume-apply", "state": state})
+        elif "rollback-apply" in self.flags:
+            self.task_request_signal.emit({"type": "rollback-apply", "state": state})
+
+        # Refresh the cached file stats first so --size/--date filters see current values
+        if "purge-cache" in self.flags:
+            self.task_request_signal.emit({"type": "purge-cache", "state": state})
+        if "rescan" in self.flags:
+            self.task_request_signal.emit({"type": "rescan", "state": state})
 
         # Handle the "enable-all" and "disable-all" directly through flags.
         if "enable-all" in self.flags:
@@ -742,18 +692,32 @@ class CommandPipelineHandler:
             ext = self.flags["disable-ext"][0]
             self.task_request_signal.emit({"type": "disable-ext", "extension": ext, "state": state})
 
-        self.task_request_signal.emit({"type": "process-file-names", "filters": filters, "pipeline": self._pipeline_callable, "state": state})
+        if "compute-all" in self.flags:
+            self.task_request_signal.emit({"type": "compute-preview", "state": state})
+
+        if "preview" in self.flags and state == "file":
+            self.task_request_signal.emit({"type": "preview-file-names", "filters": filters, "compiled_pipeline": self.pipeline, "needs_path": self.pipeline.needs_path, "state": state})
+        elif self.commands_args or "compute-all" not in self.flags:
+            self.task_request_signal.emit({"type": "process-file-names", "filters": filters, "pipeline": self._pipeline_callable, "compiled_pipeline": self.pipeline, "needs_path": self.pipeline.needs_path, "revise": "revise" in self.flags, "state": state})
 
-        if "apply-all" in self.flags:
-            self.task_request_signal.emit({"type": "request_apply_names", "scope": "all", "state": state})
-        elif "apply" in self.flags:
-            self.task_request_signal.emit({"type": "request_apply_names", "scope": "enabled", "state": state})
+        apply_scope = "all" if "apply-all" in self.flags else "enabled" if "apply" in self.flags else None
+        if apply_scope is not None:
+            task = {"type": "request_apply_names", "scope": apply_scope, "state": state}
+            if "apply-workers" in self.flags:
+                try:
+                    task["workers"] = max(1, int(self.flags["apply-workers"][0]))
+                except ValueError:
+                    self.information_signal.emit_error("--apply-workers needs a number")
+                    return
+            self.task_request_signal.emit(task)
 
 
     def _pipeline_callable(self, new_name, abs_path, current_name, state):
-        for step in self.process_steps:
-            new_name = step(new_name, abs_path, current_name, state)
-        return new_name
+        try:
+            return self.pipeline(new_name, abs_path, current_name)
+        except Exception as e:
+            self.information_signal.emit_error(f"{e}")
+            raise
     
     def _extract_filters_from_flags(self):
         filters = {}
@@ -775,16 +739,16 @@ class CommandPipelineHandler:
 
         # Check for the "size" flag (supports size filtering as a tuple of (min_size, max_size))
         if "size" in self.flags:
-            size_values = self.flags["size"]
+            size_values = self.flags["size"] + [None, None]  # Both bounds are optional
             min_size = int(size_values[0]) if size_values[0] else None
             max_size = int(size_values[1]) if size_values[1] else None
             filters["size"] = (min_size, max_size)
 
         # Check for the "date" flag (supports date filtering)
         if "date" in self.flags:
-            date_values = self.flags["date"]
-            min_date = datetime.strptime(date_values[0], "%Y-%m-%d") if date_values[0] else None
-            max_date = datetime.strptime(date_values[1], "%Y-%m-%d") if date_values[1] else None
+            date_values = self.flags["date"] + [None, None]  # Both bounds are optional
+            min_date = datetime.datetime.strptime(date_values[0], "%Y-%m-%d") if date_values[0] else None
+            max_date = datetime.datetime.strptime(date_values[1], "%Y-%m-%d") if date_values[1] else None
             filters["date"] = (min_date, max_date)
 
         # Add other flag-based filters as needed (e.g., file name patterns, date filters, etc.)
@@ -0,0 +1,396 @@
+from collections import OrderedDict
+from functools import partial
+from operator import add
+from pathlib import Path
+
+from .rename_functions import *
+from ..regex_cache import compiled_pattern
+from .transform_cache import shared_cache
+from .token_set import token_set
+from .batch import compile_batch_step, resplit_extensions, split_extensions
+
+PIPELINE_CACHE_SIZE = 32
+
+# Steps whose output depends on more than the input name and their arguments
+UNCACHEABLE_COMMANDS = {"add-timestamp"}
+
+# Steps that only change the base of a name and leave its extension as it is. Without
+# ignore_extension they do the same as their ignore_extension form applied to the base
+# alone, so consecutive ones can share one split of the names.
+BASE_ONLY_COMMANDS = {
+    "case", "zeros", "prefix", "suffix", "clean", "replace", "replace-separator", "replace-regex",
+    "replace-index", "swap", "remove", "remove-repeating-connected", "remove-numbers",
+    "remove-special", "remove-non-ascii", "remove-leading", "remove-trailing",
+    "remove-repeating-words", "reverse", "add-timestamp", "add-separators", "resolution-remove",
+    "normalize",
+}
+# Commands that read the image header of every file, which a run can prefetch for them
+IMAGE_PROBE_COMMANDS = {"resolution-add", "img-info-add"}
+
+CASE_STYLES = {
+    "upper": (to_uppercase, False, False),  # (function, takes preserve_caps, takes split_numbers)
+    "lower": (to_lowercase, True, False),
+    "snake": (to_snake_case, True, True),
+    "camel": (to_camel_case, True, True),
+    "pascal": (to_pascal_case, True, True),
+    "kebab": (to_kebab_case, True, True),
+    "title": (to_title_case, True, True),
+    "flip": (flip_case, False, False),
+    "capitalize": (to_capitalize, True, False),
+    "dot": (to_dot_case, True, True),
+    "title-snake": (to_capitalized_snake_case, True, True),
+}
+
+
+def reset_name(name, current_name):
+    return current_name
+
+
+class PipelineStep:
+    """One parsed command with its arguments and flags bound to a rename function."""
+    __slots__ = ("command_name", "func", "needs_path", "needs_current_name", "signature", "batch", "base_step")
+
+    def __init__(self, command_name: str, func, needs_path: bool = False, needs_current_name: bool = False):
+        self.command_name = command_name
+        self.func = func
+        self.needs_path = needs_path
+        self.needs_current_name = needs_current_name
+        self.signature = None  # (command_name, values, flags), set by PipelineCompiler
+        self.batch = None  # Same transform over a whole list of names, for the simple commands
+        self.base_step = None  # Same transform for the base of a name split from its extension
+
+    @property
+    def cacheable(self) -> bool:
+        """True if the output only depends on the input name, so it can be memoized."""
+        return (
+            self.signature is not None
+            and not self.needs_path
+            and not self.needs_current_name
+            and self.command_name not in UNCACHEABLE_COMMANDS
+        )
+
+    def __call__(self, name, path=None, current_name=""):
+        if self.needs_path:
+            return self.func(name, path=path)
+        if self.needs_current_name:
+            return self.func(name, current_name)
+        return self.func(name)
+
+    def __repr__(self):
+        return f"PipelineStep({self.command_name!r})"
+
+
+class CachedSegment:
+    """
+    A run of consecutive cacheable steps, looked up in the transform cache as one unit.
+
+    The cache is module level rather than an attribute, so pickling a pipeline for the
+    worker processes doesn't copy it; every process keeps its own.
+    """
+    __slots__ = ("steps", "signature")
+
+    def __init__(self, steps: list):
+        self.steps = steps
+        self.signature = tuple(step.signature for step in steps)
+
+    def __call__(self, name, path=None, current_name=""):
+        key = (self.signature, name)
+        result = shared_cache.get(key)
+        if result is None:
+            result = name
+            for step in self.steps:
+                result = step.func(result)
+            shared_cache.put(key, result)
+        return result
+
+
+def build_stages(steps: list) -> list:
+    """Group consecutive cacheable steps into CachedSegments, other steps run as they are."""
+    stages, segment = [], []
+    for step in steps:
+        if step.cacheable:
+            segment.append(step)
+            continue
+        if segment:
+            stages.append(CachedSegment(segment))
+            segment = []
+        stages.append(step)
+    if segment:
+        stages.append(CachedSegment(segment))
+    return stages
+
+
+def _step_stage(step: PipelineStep):
+    return CachedSegment([step]) if step.cacheable else step
+
+
+class CompiledPipeline:
+    """
+    The steps of one command line, resolved once and applied to every name.
+
+    Steps are partials of module level functions, so a compiled pipeline can be
+    pickled and sent to other processes. Pure steps are grouped into cached segments.
+    errors holds the messages of the steps that could not be compiled and were left out.
+    """
+    __slots__ = ("steps", "signature", "stages", "step_stages", "base_stages", "errors")
+
+    def __init__(self, steps: list, signature: tuple = (), errors: tuple = ()):
+        self.steps = steps
+        self.signature = signature
+        self.errors = errors
+        self.stages = build_stages(steps)
+        # One stage per step for run_columns, which keeps the output of every step
+        self.step_stages = [_step_stage(step) for step in steps]
+        self.base_stages = [_step_stage(step.base_step) if step.base_step is not None else None for step in steps]
+
+    @property
+    def needs_path(self) -> bool:
+        return any(step.needs_path for step in self.steps)
+
+    def probes_images(self, start: int = 0) -> bool:
+        """True if a step from start on reads image headers."""
+        return any(step.command_name in IMAGE_PROBE_COMMANDS for step in self.steps[start:])
+
+    def __call__(self, name, path=None, current_name=""):
+        for stage in self.stages:
+            name = stage(name, path, current_name)
+        return name
+
+    def __len__(self):
+        return len(self.steps)
+
+
+class NameColumn:
+    """
+    A column of names kept split into bases and extensions.
+
+    run_columns splits the names once before a run of steps that only change the base,
+    and joins them again only when a step needs whole names. Iterating gives the whole
+    names, so a NameColumn can be read wherever a list of names is.
+    """
+    __slots__ = ("bases", "exts")
+
+    def __init__(self, bases: list, exts: list):
+        self.bases = bases
+        self.exts = exts
+
+    def __len__(self):
+        return len(self.bases)
+
+    def __iter__(self):
+        return map(add, self.bases, self.exts)
+
+    def __getitem__(self, index: slice) -> "NameColumn":
+        return NameColumn(self.bases[index], self.exts[index])
+
+    def copy(self) -> "NameColumn":
+        return NameColumn(self.bases.copy(), self.exts.copy())
+
+    def extend(self, other: "NameColumn") -> None:
+        self.bases.extend(other.bases)
+        self.exts.extend(other.exts)
+
+
+def extend_columns(columns: list, chunk_columns: list) -> None:
+    """Append the step columns of one chunk to the columns of a whole run, in place."""
+    for index, chunk_column in enumerate(chunk_columns):
+        if index < len(columns):
+            columns[index].extend(chunk_column)
+        else:
+            columns.append(chunk_column.copy())
+
+
+def _run_step(step: PipelineStep, stage, names: list, paths: list, current_names: list) -> list:
+    if step.batch is not None:
+        return step.batch(names)  # A list comprehension beats a cache lookup per name
+    if step.needs_path:
+        return [stage(name, Path(path)) for name, path in zip(names, paths)]
+    if step.needs_current_name:
+        return [stage(name, None, current_name) for name, current_name in zip(names, current_names)]
+    return [stage(name) for name in names]
+
+
+def run_columns(pipeline: CompiledPipeline, names, paths: list = None, current_names: list = None, start: int = 0) -> list:
+    """
+    Apply the steps from start on to a whole column of names, one step at a time.
+
+    names is a list or a NameColumn. Returns one column per step that was run, the last
+    one holding the final names. Steps that only change the base work on a NameColumn
+    that shares the extensions with the column before, and a name a step leaves unchanged
+    is the same object as in the column before, so keeping every column costs little
+    more than the names that changed. A base step's output is split again only where
+    the new base moves the extension, so the names are the same as the scalar steps give.
+    """
+    columns = []
+    split = names if isinstance(names, NameColumn) else None
+    steps = zip(pipeline.steps[start:], pipeline.step_stages[start:], pipeline.base_stages[start:])
+    for step, stage, base_stage in steps:
+        if base_stage is not None:
+            if split is None:
+                split = NameColumn(*split_extensions(names))
+            bases = _run_step(step.base_step, base_stage, split.bases, paths, current_names)
+            split = NameColumn(*resplit_extensions(bases, split.exts))
+            columns.append(split)
+            continue
+        if split is not None:
+            names = list(split)
+            split = None
+        names = _run_step(step, stage, names, paths, current_names)
+        columns.append(names)
+    return columns
+
+
+def compile_step(command_name: str, values, ignore_extension=False, preserve_caps=False, split_numbers=False):
+    """Resolve a command and its arguments into a PipelineStep. Returns None for a step that does nothing."""
+    if values is None:
+        raise ValueError(f"Invalid arguments for command '{command_name}'")
+
+    if command_name == "case":
+        style = values[0].lower()
+        if style not in CASE_STYLES:
+            raise ValueError(f"Unknown case style: {values[0]}")
+        func, takes_preserve_caps, takes_split_numbers = CASE_STYLES[style]
+        kwargs = {"ignore_extension": ignore_extension}
+        if takes_preserve_caps:
+            kwargs["preserve_caps"] = preserve_caps
+        if takes_split_numbers:
+            kwargs["split_numbers"] = split_numbers
+        return PipelineStep(command_name, partial(func, **kwargs))
+
+    if command_name == "zeros":
+        style = values[0].lower()
+        if style == "add":
+            return PipelineStep(command_name, partial(add_leading_zeros_to_number, total_digits=values[1], ignore_extension=ignore_extension))
+        if style == "remove":
+            return PipelineStep(command_name, partial(remove_leading_zeros, ignore_extension=ignore_extension))
+        raise ValueError(f"Unknown zeros mode: {values[0]}")
+
+    if command_name == "prefix":
+        func = partial(prefix_add, prefix=values[0], ignore_extension=ignore_extension)
+    elif command_name == "suffix":
+        func = partial(suffix_add, suffix=values[0], ignore_extension=ignore_extension)
+    elif command_name == "clean":
+        func = partial(clean_filename, ignore_extension=ignore_extension)
+    elif command_name == "replace":
+        old_text, new_text = values
+        func = partial(replace_in_filename, old=old_text, new=new_text, ignore_extension=ignore_extension)
+    elif command_name == "replace-separator":
+        func = partial(replace_separator, new_separator=values[0], ignore_extension=ignore_extension)
+    elif command_name == "replace-regex":
+        # Compiled here so a bad pattern is reported once and every name reuses it
+        func = partial(regex_replace_in_filenames, pattern=compiled_pattern(values[0]), replacement=values[1], ignore_extension=ignore_extension)
+    elif command_name == "replace-ext":
+        func = partial(regex_replace_in_filenames, pattern=compiled_pattern(r'\.' + re.escape(values[0]) + '$'), replacement='.' + values[1], ignore_extension=True)
+    elif command_name == "replace-index":
+        func = partial(replace_word_by_index, separator=values[0], index=int(values[1]), new_text=values[2], ignore_extension=ignore_extension)
+    elif command_name == "swap":
+        func = partial(swap_words, word1=values[0], word2=values[1], ignore_extension=ignore_extension)
+
+    elif command_name == "remove":
+        # One scan per name finds which of the values occur, instead of one pass per value
+        tokens = token_set(tuple(values[0] if isinstance(values[0], list) else values))
+        func = partial(remove_in_filename, values=tokens, ignore_extension=ignore_extension)
+    elif command_name == "remove-repeating-connected":
+        tokens = repeated_token_set(tuple(values[0] if isinstance(values[0], list) else values))
+        func = partial(remove_connected_repeating_input, values=tokens, ignore_extension=ignore_extension)
+    elif command_name == "remove-numbers":
+        func = partial(remove_numbers, ignore_extension=ignore_extension)
+    elif command_name == "remove-special":
+        func = partial(remove_special_characters, ignore_extension=ignore_extension)
+    elif command_name == "remove-non-ascii":
+        func = partial(remove_non_ascii, ignore_extension=ignore_extension)
+    elif command_name == "remove-leading":
+        func = partial(remove_leading, values=values, ignore_extension=ignore_extension)
+    elif command_name == "remove-trailing":
+        func = partial(remove_trailing, values=values, ignore_extension=ignore_extension)
+    elif command_name == "remove-repeating-words":
+        func = partial(remove_duplicate_words, ignore_extension=ignore_extension)
+
+    elif command_name == "reverse":
+        func = partial(reverse_string, ignore_extension=ignore_extension)
+    elif command_name == "add-timestamp":
+        func = partial(add_timestamp, granularity=values[0], separator=values[1], ignore_extension=ignore_extension)
+    elif command_name == "add-separators":
+        func = partial(add_separators, separator=values[0], ignore_extension=ignore_extension, split_numbers=split_numbers)
+
+    elif command_name == "resolution-add":
+        return PipelineStep(command_name, partial(add_resolution, values=values, ignore_extension=ignore_extension), needs_path=True)
+    elif command_name == "resolution-remove":
+        func = partial(remove_resolution, type=values, ignore_extension=ignore_extension)
+    elif command_name == "img-info-add":
+        return PipelineStep(command_name, partial(add_image_info, values=values, ignore_extension=ignore_extension), needs_path=True)
+
+    elif command_name == "reset":
+        return PipelineStep(command_name, reset_name, needs_current_name=True)
+    elif command_name == "normalize":
+        func = partial(normalize_filename, ignore_extension=ignore_extension)
+    elif command_name == "limit-length":
+        func = partial(limit_filename_length, max_length=int(values[0]), ignore_extension=ignore_extension)
+    else:
+        return None
+
+    return PipelineStep(command_name, func)
+
+
+def _freeze(values):
+    if isinstance(values, list):
+        return tuple(_freeze(value) for value in values)
+    return values
+
+
+def pipeline_signature(commands_args, ignore_extension=False, preserve_caps=False, split_numbers=False) -> tuple:
+    """Hashable key for a list of (command_name, values) and the flags that change their behavior."""
+    return (
+        tuple((command_name, _freeze(values)) for command_name, values in commands_args),
+        ignore_extension,
+        preserve_caps,
+        split_numbers,
+    )
+
+
+class PipelineCompiler:
+    """
+    Compiles parsed commands and keeps recently used pipelines for reuse.
+
+    With batch set, the simple string commands also get a batch function that run_columns
+    applies to a whole column of names at once. Steps in BASE_ONLY_COMMANDS also get a
+    base_step, their ignore_extension form, for run_columns to apply to split names.
+    """
+
+    def __init__(self, cache_size: int = PIPELINE_CACHE_SIZE, batch: bool = True):
+        self.cache_size = cache_size
+        self.batch = batch
+        self._cache = OrderedDict()
+
+    def compile(self, commands_args, ignore_extension=False, preserve_caps=False, split_numbers=False) -> CompiledPipeline:
+        signature = pipeline_signature(commands_args, ignore_extension, preserve_caps, split_numbers)
+        pipeline = self._cache.get(signature)
+        if pipeline is not None:
+            self._cache.move_to_end(signature)
+            return pipeline
+
+        steps, errors = [], []
+        for command_name, values in commands_args:
+            try:
+                step = self._compile_step(command_name, values, ignore_extension, preserve_caps, split_numbers)
+            except ValueError as e:
+                errors.append(str(e))  # Skip the bad step, the others still run
+                continue
+            if step is not None:
+                if not ignore_extension and command_name in BASE_ONLY_COMMANDS:
+                    step.base_step = self._compile_step(command_name, values, True, preserve_caps, split_numbers)
+                steps.append(step)
+
+        pipeline = CompiledPipeline(steps, signature, tuple(errors))
+        self._cache[signature] = pipeline
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return pipeline
+
+    def _compile_step(self, command_name: str, values, ignore_extension, preserve_caps, split_numbers):
+        step = compile_step(command_name, values, ignore_extension, preserve_caps, split_numbers)
+        if step is not None:
+            step.signature = (command_name, _freeze(values), ignore_extension, preserve_caps, split_numbers)
+            if self.batch:
+                step.batch = compile_batch_step(command_name, values, ignore_extension, preserve_caps)
+        return step
@@ -1,11 +1,14 @@
 from .parser import create_parser
 from argparse import ArgumentError, ArgumentParser
-from ..data_manager import DataManager
+from typing import TYPE_CHECKING
 from .rename_functions import *
 import shlex
 
+if TYPE_CHECKING:  # data_manager imports the pipeline from this package
+    from ..data_manager import DataManager
 
-def process_names(input_command, data_manager: DataManager):
+
+def process_names(input_command, data_manager: "DataManager"):
     try:
         pipeline_callable = _build_process_pipeline(input_command)
     except (ArgumentError, SystemExit) as e:
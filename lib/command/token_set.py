@@ -0,0 +1,82 @@
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+TOKEN_SET_CACHE_SIZE = 64
+
+
+def _trie_regex(node: dict) -> str:
+    """Regex for the tokens below a trie node, preferring the longest one."""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    regex = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        regex = "(?:" + regex + ")?"  # A shorter token ends here
+    return regex
+
+
+class TokenSet:
+    """
+    An ordered list of literal tokens with one prebuilt regex that finds which of them occur in a text.
+
+    The regex is a trie of the tokens matched at every position of the text, so one scan
+    tells which tokens are present instead of one search per token. Commands that apply
+    their tokens one after another use next_present to skip straight to the next token
+    that would change the text.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tuple(tokens)
+        self._indexes = {}  # token -> its positions in tokens, a token can be listed twice
+        for index, token in enumerate(self.tokens):
+            if token:
+                self._indexes.setdefault(token, []).append(index)
+
+        # The scan reports the longest token at each position, the shorter ones there are its prefixes
+        self._prefixes = {
+            token: [other for other in self._indexes if token.startswith(other)] for token in self._indexes
+        }
+
+        trie = {}
+        for token in self._indexes:
+            node = trie
+            for char in token:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        regex = _trie_regex(trie)
+        self._search = re.compile(regex).search if trie else None  # Finds the first position a token starts at
+        self._pattern = re.compile(f"(?=({regex}))") if trie else None  # The longest token at every position
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __getitem__(self, index: int) -> str:
+        return self.tokens[index]
+
+    def present(self, text: str) -> set:
+        """Return the tokens that occur in text."""
+        first = self._search(text) if self._search is not None else None
+        if first is None:
+            return set()  # Most names have none of the tokens, a plain search is cheapest for those
+
+        found = set()
+        for match in self._pattern.finditer(text, first.start()):
+            found.update(self._prefixes[match.group(1)])
+        return found
+
+    def next_present(self, text: str, start: int = 0):
+        """Return the lowest index from start on whose token occurs in text, or None."""
+        best = None
+        for token in self.present(text):
+            indexes = self._indexes[token]
+            position = bisect_left(indexes, start)
+            if position < len(indexes) and (best is None or indexes[position] < best):
+                best = indexes[position]
+        return best
+
+
+@lru_cache(maxsize=TOKEN_SET_CACHE_SIZE)
+def token_set(tokens: tuple) -> TokenSet:
+    """Build a TokenSet once per distinct list of tokens."""
+    return TokenSet(tokens)
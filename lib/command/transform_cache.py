@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+TRANSFORM_CACHE_SIZE = 65_536  # Entries, roughly 20 MB with typical names
+
+
+class TransformCache:
+    """
+    Bounded LRU cache from (segment signature, input name) to output name.
+
+    Trees repeat the same file names in many folders, and a command is often run again
+    with small changes, so the pure parts of a pipeline are looked up here before they
+    are computed. Shared by every pipeline in the process and safe to use from the scan
+    and pipeline worker threads. Worker processes have their own cache, ParallelRunner
+    adds their hits and misses to the counts of this one with add_counts.
+    """
+
+    def __init__(self, max_entries: int = TRANSFORM_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached output name, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add_counts(self, hits: int, misses: int) -> None:
+        """Count lookups made elsewhere, e.g. in a worker process's cache."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+shared_cache = TransformCache()
@@ -1,55 +1,181 @@
 # folder_data_manager.py
 import re, os
+import sqlite3
 import time
-import uuid
+from itertools import count
 from pathlib import Path
 from typing import Dict, List, Any
 from collections import defaultdict, deque
 from typing import List
 from .file_filter import FileFilter
+from .names import name_extension
 from .signal import Signal, InformationSignal
-from copy import deepcopy
+from .history import History, DEFAULT_MEMORY_BUDGET
+from .scanner import DirectoryScanner, ScanBatch, scan_directory
+from .scan_cache import ScanCache
+from .image_probe import open_probe_cache, set_probe_cache
+from .image_info import prefetched_probes
+from .parallel import ParallelRunner, DEFAULT_PARALLEL_THRESHOLD
+from .name_run import NameRun, NamePreview, RunCheckpoints, BACKGROUND_RUN_THRESHOLD
+from .command.pipeline import extend_columns, run_columns
+from .apply_engine import RenameOp, RenameJournal, plan_renames, apply_plan, resume_journal, rollback_journal, journal_directories
 
 ENABLED_FOLDER = f"[#A3BE8C]✓[/#A3BE8C]"
 DISABLED_FOLDER = f"[#BF616A]✗[/#BF616A]"
+SCAN_REFRESH_INTERVAL = 0.5  # Seconds between view refreshes while a background scan runs
+NAME_RUN_PROGRESS_INTERVAL = 0.25  # Seconds between progress messages while names are processed
+
+# Files and folders share one counter so an id is unique across the whole model
+_next_id = count(1)
+
+def _as_id(value) -> int:
+    """Normalize an id coming from the UI (table cells hold strings) to the integer model id."""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class FolderRegistry:
+    """Index of every known folder by id and by absolute path."""
+    def __init__(self):
+        self.by_id = {}
+        self.by_path = {}
+        self._path_of = {}
+
+    def register(self, folder: "Folder") -> None:
+        """Add a folder to both indexes, keyed by its current path."""
+        folder.registry = self
+        self.by_id[folder.id] = folder
+        self._index_path(folder)
+
+    def unregister(self, folder: "Folder") -> None:
+        """Remove a folder and its whole subtree from both indexes."""
+        stack = [folder]
+        while stack:
+            current = stack.pop()
+            self.by_id.pop(current.id, None)
+            folder_path = self._path_of.pop(current.id, None)
+            if folder_path is not None and self.by_path.get(folder_path) is current:
+                del self.by_path[folder_path]
+            stack.extend(current.folders)
+
+    def get(self, folder_id) -> "Folder":
+        return self.by_id.get(_as_id(folder_id))
+
+    def get_by_path(self, folder_path: str) -> "Folder":
+        return self.by_path.get(str(folder_path))
+
+    def reindex(self, folder: "Folder") -> None:
+        """Refresh the path index for a folder and its subtree after a rename."""
+        stack = [folder]
+        while stack:
+            current = stack.pop()
+            if current.id in self.by_id:
+                self._index_path(current)
+            stack.extend(current.folders)
+
+    def _index_path(self, folder: "Folder") -> None:
+        old_path = self._path_of.get(folder.id)
+        if old_path is not None and self.by_path.get(old_path) is folder:
+            del self.by_path[old_path]
+        folder_path = folder.folder_path
+        self.by_path[folder_path] = folder
+        self._path_of[folder.id] = folder_path
+
 
 class Folder:
+    __slots__ = (
+        "id", "current_name", "new_name", "parent", "_root_path", "is_enabled",
+        "subfolders_populated", "files_populated", "is_populated", "files", "folders", "registry",
+        "_path", "_rel_path",
+    )
+
     def __init__(self, folder_name: str, parent: "Folder", root_path: str = None):
-        print("Creating folder")
-        self.id = str(uuid.uuid4())
+        self.id = next(_next_id)
         self.current_name = folder_name
         self.new_name = folder_name
         self.parent = parent
-        self.root_path = root_path if root_path else (parent.root_path if parent else None)
+        self._root_path = root_path if root_path else (parent.root_path if parent else None)
         self.is_enabled = True
         self.subfolders_populated = False
         self.files_populated = False
         self.is_populated = False
         self.files = []
         self.folders = []
+        self.registry = parent.registry if parent else None
+        self._path = None
+        self._rel_path = None
+
+    @property
+    def root_path(self) -> str:
+        """Root path of the tree; only the root folder stores it."""
+        if self.parent:
+            return self.parent.root_path
+        return self._root_path
+
+    @root_path.setter
+    def root_path(self, value: str) -> None:
+        self._root_path = value
 
     @property
     def folder_path(self) -> str:
-        """Dynamically construct the folder path based on the hierarchy."""
-        if self.parent and self.parent.folder_path:
-            return str(Path(self.parent.folder_path) / self.current_name)
+        """Absolute folder path, built from the hierarchy and cached until an ancestor is renamed."""
+        path = self._path
+        if path is None:
+            parent_path = self.parent.folder_path if self.parent else ""
+            if parent_path:
+                path = os.path.join(parent_path, self.current_name)
+            else:
+                # Ensure a valid root path is always returned
+                path = self.root_path or ""
+            self._path = path
+        return path
 
-        # Ensure a valid root path is always returned
-        return self.root_path or ""
+    @property
+    def rel_path(self) -> str:
+        """Folder path relative to the root folder, in posix form ("" for the root)."""
+        rel_path = self._rel_path
+        if rel_path is None:
+            parent_rel_path = self.parent.rel_path if self.parent else None
+            if parent_rel_path:
+                rel_path = f"{parent_rel_path}/{self.current_name}"
+            elif parent_rel_path is not None:
+                rel_path = self.current_name
+            else:
+                rel_path = ""
+            self._rel_path = rel_path
+        return rel_path
+
+    def invalidate_paths(self) -> None:
+        """Drop the cached paths of this folder and everything below it."""
+        stack = [self]
+        while stack:
+            folder = stack.pop()
+            folder._path = None
+            folder._rel_path = None
+            stack.extend(folder.folders)
 
     def add_file(self, file: 'File'):
         self.files.append(file)
 
+    def get_file(self, file_id) -> 'File':
+        """Return the file in this folder with the given id, if any."""
+        file_id = _as_id(file_id)
+        return next((f for f in self.files if f.id == file_id), None)
+
     def add_folder(self, folder: 'Folder'):
         """Properly link child folders and ensure root_path inheritance."""
         folder.parent = self  # Set the parent reference
-
-        # Ensure subfolder correctly inherits root_path from parent
-        if not folder.root_path:
-            folder.root_path = self.root_path
+        folder.invalidate_paths()  # Paths may have been cached before the folder was linked
 
         self.folders.append(folder)
 
+        # Keep the id/path index in sync with the hierarchy
+        if self.registry is not None:
+            self.registry.register(folder)
+
 
     def rename_folder(self, new_name: str):
         """Helper method to rename folder and update paths of files and subfolders"""
@@ -59,6 +185,9 @@ class Folder:
         try:
             old_folder_path.rename(new_folder_path)  # Rename the folder on disk
             self.current_name = new_name
+            self.invalidate_paths()
+            if self.registry is not None:
+                self.registry.reindex(self)
             return True
             print(f"[DEBUG] Successfully renamed folder {self.current_name} → {new_name}")
         except Exception as e:
@@ -69,39 +198,51 @@ class Folder:
         self.current_name = new_name
 
     def update_subfolder_paths(self):
-        """Recursively update the folder paths for all child folders."""
-        for subfolder in self.folders:
-            # Update each subfolder's folder path
-            subfolder.root_path = self.root_path  # Update the root path reference
-            subfolder.update_subfolder_paths()  # Recursively update paths of subfolders
-
-        for file in self.files:
-            file.folder = self
+        """Invalidate the cached paths of this folder's subtree after the root moved."""
+        self.invalidate_paths()
 
     
 
 class File:
+    __slots__ = ("id", "current_name", "new_name", "folder", "is_enabled", "size", "mtime", "inode")
+
     def __init__(self, file_name: str, folder: 'Folder'):
-        self.id = str(uuid.uuid4())
+        self.id = next(_next_id)
         self.current_name = file_name
         self.new_name = file_name
         self.folder = folder
-        # folder_path = self.folder.folder_path or self.folder.root_path
         self.is_enabled = True
-        self.file_ext = Path(file_name).suffix  # Extract actual file extension
         self.size = 0
-        # if not folder_path:
-        #     print(f"[WARNING] File {file_name} is missing a valid folder path!")
+        self.mtime = 0.0
+        self.inode = 0
+
+    def set_stat(self, entry: os.DirEntry) -> None:
+        """Store size, modification time and inode from a scandir entry."""
+        try:
+            stat_result = entry.stat()  # Cached on the entry, the scanner already paid for it
+        except OSError:
+            return
+        self.size = stat_result.st_size
+        self.mtime = stat_result.st_mtime
+        self.inode = entry.inode()
+
+    @property
+    def file_ext(self) -> str:
+        """Extension of the current name, same rules as Path.suffix."""
+        return name_extension(self.current_name)
 
     @property
     def abs_path(self) -> str:
-        """Dynamically compute the absolute path based on the folder reference."""
-        return str(Path(self.folder.folder_path) / self.current_name)
+        """Absolute path, joined onto the folder's cached path."""
+        return os.path.join(self.folder.folder_path, self.current_name)
 
     @property
     def rel_path(self) -> str:
-        """Dynamically compute the relative path based on the root folder."""
-        return Path(self.abs_path).relative_to(self.folder.root_path).as_posix()
+        """Path relative to the root folder, joined onto the folder's cached relative path."""
+        folder_rel_path = self.folder.rel_path
+        if folder_rel_path:
+            return f"{folder_rel_path}/{self.current_name}"
+        return self.current_name
     
     @property
     def folder_path(self) -> str:
@@ -128,12 +269,21 @@ class File:
         self.new_name = new_name
 
     @property
-    def parent_id(self) -> str:
+    def parent_id(self) -> int:
         """Return the ID of the parent folder."""
         return self.folder.id if self.folder else None
 
 class DataManager:
-    def __init__(self, current_directory: Path):
+    def __init__(
+        self,
+        current_directory: Path,
+        history_memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        use_scan_cache: bool = True,
+        parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD,
+        use_apply_journal: bool = True,
+        apply_workers: int = 1,
+        use_probe_cache: bool = True,
+    ):
         self.current_directory = current_directory
         self.data_changed_signal = Signal()
         self.apply_name_signal = Signal()
@@ -144,9 +294,11 @@ class DataManager:
         self.task_execution_signal = Signal()
         self.task_execution_signal.connect(self.on_task_execution)
         
+        registry = FolderRegistry()
         self.data = {
             "root_path": self.root_folder_path,
-            "folders": defaultdict(Folder),
+            "registry": registry,
+            "folders": registry.by_id,
             "summary": {
                 "folders_count": 0,
                 "enabled_folders_count": 0,
@@ -155,69 +307,92 @@ class DataManager:
                 "total_size": 0,
             }
         }
-        self._undo_limit = 50
+        self.history = History(memory_budget=history_memory_budget)
         self.batch_update_mode = False
-        self.undo_stack = deque()
-        self.redo_stack = deque()
 
-    def _clone_data(self):
-        """Clone current data structure for undo/redo."""
-        return deepcopy(self.data)
-    
-    # Undo/Redo
-    def _save_history(self, custom=None):
-        print("Im going to save history")
-        data_to_append = self._clone_data() if not custom else custom
+        self.scan_cache = None
+        if use_scan_cache:
+            try:
+                self.scan_cache = ScanCache(self.root_folder_path)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Scan cache disabled: {e}")
+        self.scanner = DirectoryScanner(cache=self.scan_cache)
+        # Image headers read by resolution-add and img-info-add, kept across sessions
+        self.probe_cache = None
+        if use_probe_cache:
+            try:
+                self.probe_cache = open_probe_cache()
+                set_probe_cache(self.probe_cache)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Image probe cache disabled: {e}")
+        self.apply_journal = RenameJournal(root=self.root_folder_path) if use_apply_journal else None
+        self.apply_workers = apply_workers  # More than one renames independent items concurrently, for network shares
+        self.parallel_runner = ParallelRunner(threshold=parallel_threshold)
+        self.scan_progress = {"folders": 0, "files": 0}
+        self._last_scan_refresh = 0.0
+
+        # Large pipeline runs are handed to whoever listens on name_run_signal (the app runs
+        # them on a worker) when background_runs is set. Tasks arriving meanwhile are queued.
+        self.name_run_signal = Signal()
+        self.background_runs = False
+        self.name_run = None
+        self._queued_tasks = []
+        self.preview = None  # NamePreview of the last --preview command, until it's materialized
+        self.checkpoints = None  # RunCheckpoints of the last file run, to resume a revised command
 
-        if data_to_append is None:
-            return
-        
-        self.redo_stack.clear()
-        
-        self.undo_stack.append(data_to_append)
-        if len(self.undo_stack) > self._undo_limit:  # Limit the history size (adjust as needed)
-            self.undo_stack.popleft()
-    
+    @property
+    def registry(self) -> FolderRegistry:
+        """Folder index belonging to the current data snapshot."""
+        return self.data["registry"]
+
+    @property
+    def undo_stack(self):
+        return self.history.undo_stack
+
+    @property
+    def redo_stack(self):
+        return self.history.redo_stack
+
+    # Undo/Redo
     def undo(self):
-        if not self.undo_stack:
+        if self.name_run is not None:
+            self.information_signal.emit_warning("Names are being processed, press Esc to cancel", context="undo")
+            return
+        if not self.history.undo():
             print("No undo stack")
             return
-        previous_state = self.undo_stack.pop()
-        self.redo_stack.append(self._clone_data())
-        self.data = previous_state
         self.data_changed_signal.emit({
                 "data_type": "undo_done",
                 "folders_data": self.data["folders"]
                 })
-        # self.data_changed_signal.emit({"undo_done": True})
         self.recalculate_summary()
 
     def redo(self):
         """Redo the last undone change."""
-        if not self.redo_stack:
+        if self.name_run is not None:
+            self.information_signal.emit_warning("Names are being processed, press Esc to cancel", context="redo")
+            return
+        if not self.history.redo():
             return  # Nothing to redo
-        next_state = self.redo_stack.pop()
-        self.undo_stack.append(self._clone_data())  # Save current state to undo stack
-        self.data = next_state  # Apply the next state
         self.data_changed_signal.emit({
                 "data_type": "redo_done",
                 "folders_data": self.data["folders"]
                 })
-        # self.data_changed_signal.emit({"redo_done": True})
         self.recalculate_summary()  # Recalculate the summary after redo
 
     def clear_history(self):
-        self.undo_stack.clear()
-        self.redo_stack.clear()
+        self.history.clear()
 
     def start_batch_update(self):
         """Call this method to start a batch update."""
         self.batch_update_mode = True
+        self.history.begin("batch update")
         self.data_changed_signal.suppress()
 
     def end_batch_update(self):
         """Call this method to end a batch update and notify observers."""
         self.batch_update_mode = False
+        self.history.commit()
         self.recalculate_summary()
         self.data_changed_signal.resume({
                 "data_type": "batch_update_done",
@@ -285,13 +460,12 @@ class DataManager:
     # --- Data Setters ---
     def set_folder_enabled(self, folder_id: str, is_enabled: bool) -> None:
         """Enable or disable a folder."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
-            self._save_history()
-
-            folder.is_enabled = is_enabled
-            for file in folder.files:
-                file.is_enabled = is_enabled
+            with self.history.transaction("set folder enabled"):
+                self.history.set(folder, "is_enabled", is_enabled)
+                for file in folder.files:
+                    self.history.set(file, "is_enabled", is_enabled)
             
             self.data_changed_signal.emit({
                 "data_type": "folder",
@@ -303,7 +477,7 @@ class DataManager:
             self.recalculate_summary(updated_data={"folder": folder})
     
     def toggle_folder_enabled(self, folder_id: str) -> None:
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         folder.is_enabled = not folder.is_enabled
         if folder.is_enabled:
             self.populate_files_for_folder(folder)
@@ -318,13 +492,11 @@ class DataManager:
     
     def toggle_file_enabled(self, folder_id: str, file_id: str) -> None:
         """Toggle the 'is_enabled' status of a specific file within a folder using IDs."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
-            file_instance = next((f for f in folder.files if f.id == file_id), None)
+            file_instance = folder.get_file(file_id)
             if file_instance:
-                self._save_history()
-
-                file_instance.is_enabled = not file_instance.is_enabled
+                self.history.set(file_instance, "is_enabled", not file_instance.is_enabled)
                 self.data_changed_signal.emit({
                     "data_type": "file",
                     "file_data": file_instance,
@@ -337,12 +509,11 @@ class DataManager:
 
     def set_file_enabled(self, folder_id: str, file_id: str, is_enabled: bool) -> None:
         """Enable or disable a specific file within a folder using IDs."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
-            file = next((f for f in folder.files if f.id == file_id), None)
+            file = folder.get_file(file_id)
             if file:
-                self._save_history()
-                file.is_enabled = is_enabled  # Update the `is_enabled` attribute directly
+                self.history.set(file, "is_enabled", is_enabled)
                 
                 self.data_changed_signal.emit({
                     "data_type": "file",
@@ -353,7 +524,7 @@ class DataManager:
 
     def set_folder_name(self, folder_id: str, new_name: str) -> None:
         """Change the name of a file."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
                 folder.new_name = new_name
                 
@@ -367,13 +538,11 @@ class DataManager:
     
     def set_file_name(self, folder_id: str, file_id: str, new_name: str) -> None:
         """Change the name of a file."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
-            file_instance = next((f for f in folder.files if f.id == file_id), None)
+            file_instance = folder.get_file(file_id)
             if file_instance:
-                self._save_history()
-
-                file_instance.new_name = new_name
+                self.history.set(file_instance, "new_name", new_name)
                 
                 self.data_changed_signal.emit({
                     "data_type": "file",
@@ -385,13 +554,12 @@ class DataManager:
     
     def reset_file_name(self, folder_id: str, file_id: str) -> None:
         """Reset the new name of a specific file to its current name."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
-            file = next((f for f in folder.files if f.id == file_id), None)
+            file = folder.get_file(file_id)
             if file:
-                self._save_history()
                 # Reset the new name to the current name
-                file.new_name = file.current_name
+                self.history.set(file, "new_name", file.current_name)
                 self.data_changed_signal.emit({
                     "data_type": "file",
                     "file_data": file,
@@ -402,7 +570,7 @@ class DataManager:
 
     def reset_folder_name(self, folder_id: str) -> None:
         """Change the name of a file."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
                 folder.new_name = folder.current_name
                 
@@ -417,9 +585,9 @@ class DataManager:
 
     def rename_file(self, folder_id: str, file_id: str, new_name: str) -> None:
         """Emit signal to rename a file."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
-            file_instance = next((f for f in folder.files if f.id == file_id), None)
+            file_instance = folder.get_file(file_id)
             if file_instance:
                 if file_instance.rename_file(new_name):
                     self.data_changed_signal.emit({
@@ -432,7 +600,7 @@ class DataManager:
 
     def rename_folder(self, folder_id: str, new_name: str) -> None:
         """Emit signal to rename a file."""
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
             if folder.rename_folder(new_name):
                 if folder.id == self.root_folder_id:
@@ -440,6 +608,7 @@ class DataManager:
                     self.root_folder_path = new_root_folder_path
                     folder.root_path = new_root_folder_path
                     folder.update_subfolder_paths()
+                    self.registry.reindex(folder)
 
                 self.data_changed_signal.emit({
                     "data_type": "rename_folder_done",
@@ -449,65 +618,152 @@ class DataManager:
             else:
                 print(f"[ERROR] Rename operation failed for folder {folder.current_name}")
 
-    def rename_all_files(self, data, option):
-        """Rename all files based on the specified option."""
-        self.start_batch_update()
-        for folder_id, folder_data in data["folders"].items():
-            folder = folder_data  # Assuming folder_data is already an instance of Folder
+    def rename_all_files(self, data, option, workers: int = None):
+        """Rename all files based on the specified option, planned and journaled as one apply."""
+        ops = []
+        for folder in data["folders"].values():
             if not folder.is_enabled and option == "enabled":
                 continue
+            folder_path = folder.folder_path
+            for file in folder.files:
+                if (file.is_enabled or option != "enabled") and file.new_name != file.current_name:
+                    src = os.path.join(folder_path, file.current_name)
+                    ops.append(RenameOp(file, src, os.path.join(folder_path, file.new_name), file.inode))
 
-            for file in folder.files:  # Iterating through File objects
-                if not file.is_enabled and option == "enabled":
-                    continue
-
-                # Directly rename the file by calling the rename_file method
-                self.rename_file(folder_id, file.id, file.new_name)
+        self.start_batch_update()
+        result = self._apply_renames(ops, "files", workers)
+        for op in result.renamed:
+            op.item.current_name = op.item.new_name
         self.clear_history()
         self.end_batch_update()
 
-    def rename_all_folders(self, data, option):
-        """Rename all files based on the specified option."""
-        self.start_batch_update()
-        for folder_id, folder_data in data["folders"].items():
-            folder = folder_data
+    def rename_all_folders(self, data, option, workers: int = None):
+        """Rename all folders based on the specified option, deepest first, as one apply."""
+        ops = []
+        for folder in data["folders"].values():
             if not folder.is_enabled and option == "enabled":
                 continue
+            if folder.new_name != folder.current_name:
+                src = folder.folder_path
+                try:
+                    inode = os.lstat(src).st_ino
+                except OSError:
+                    inode = 0
+                ops.append(RenameOp(folder, src, os.path.join(os.path.dirname(src), folder.new_name), inode))
 
-            self.rename_folder(folder_id, folder.new_name)
-
+        self.start_batch_update()
+        result = self._apply_renames(ops, "folders", workers, nested=True)
+        for op in result.renamed:
+            folder = op.item
+            folder.current_name = folder.new_name
+            if folder.id == self.root_folder_id:
+                self.root_folder_path = op.dst
+                folder.root_path = op.dst
+        for op in result.renamed:
+            op.item.invalidate_paths()  # Once every name is updated, the paths below are rebuilt from them
+            self.registry.reindex(op.item)
         self.clear_history()
         self.end_batch_update()
 
+    def _apply_renames(self, ops: list, kind: str, workers: int = None, nested: bool = False):
+        plan = plan_renames(ops)
+        workers = workers if workers is not None else self.apply_workers
+        result = apply_plan(plan, self.apply_journal, self.root_folder_path, workers, nested)
+        self._report_apply(result, kind)
+        return result
+
+    def _report_apply(self, result, kind: str) -> None:
+        for op, reason in result.conflicts:
+            print(f"[APPLY] Skipped {op.src} -> {op.dst}: {reason}")
+        for item, error in result.failed:
+            print(f"[APPLY] Failed {item}: {error}")
+        for stats in sorted(result.directories.values(), key=lambda stats: stats.directory):
+            print(
+                f"[APPLY] {stats.directory}: {stats.renamed} renamed, {stats.failed} failed "
+                f"in {stats.seconds:.2f}s ({stats.rate:.0f}/s)"
+            )
+
+        if result.renamed or not (result.conflicts or result.failed):
+            self.information_signal.emit_success(f"Renamed {len(result.renamed)} {kind}", context="apply")
+        if result.conflicts:
+            op, reason = result.conflicts[0]
+            more = f" and {len(result.conflicts) - 1} more" if len(result.conflicts) > 1 else ""
+            self.information_signal.emit_warning(
+                f"Skipped {len(result.conflicts)} {kind} with conflicting names: {os.path.basename(op.src)} ({reason}){more}",
+                context="apply",
+            )
+        if result.failed:
+            item, error = result.failed[0]
+            failed_in = sum(1 for stats in result.directories.values() if stats.failed)
+            where = f" in {failed_in} folders" if failed_in > 1 else ""
+            self.information_signal.emit_error(
+                f"{len(result.failed)} renames failed{where}, first: {error}", context="apply"
+            )
+
+    def check_interrupted_apply(self) -> None:
+        """Tell the user if the last apply was interrupted, so it can be resumed or rolled back."""
+        state = self.apply_journal.pending() if self.apply_journal is not None else None
+        if state is not None:
+            root = state["header"].get("root", "")
+            self.information_signal.emit_warning(
+                f"An apply in {root} was interrupted. Finish it with --resume-apply or undo it with --rollback-apply",
+                context="apply",
+            )
+
+    def resume_apply(self) -> None:
+        """Run the rest of an interrupted apply from its journal, then re-read the folders it touched."""
+        state = self.apply_journal.pending() if self.apply_journal is not None else None
+        if state is None:
+            self.information_signal.emit_info("No interrupted apply to resume", context="apply")
+            return
+        result = resume_journal(self.apply_journal)
+        self.clear_history()
+        self.sync_directories(journal_directories(state))
+        self._report_apply(result, "items")
+
+    def rollback_apply(self) -> None:
+        """Move the items of the last apply back to their old names, then re-read the folders it touched."""
+        state = self.apply_journal.load() if self.apply_journal is not None else None
+        result = rollback_journal(self.apply_journal) if state is not None else None
+        if result is None:
+            self.information_signal.emit_info("No apply to roll back", context="apply")
+            return
+        self.clear_history()
+        self.sync_directories(journal_directories(state))
+        self._report_apply(result, "items back")
+
 
     def request_apply_names(self, option):
         self.rename_all_files(self.data, option)
         # self.apply_name_signal.emit(self.data, option)
 
-    def process_folder_names(self, process_folder_name_callable: callable, filters: dict = None, state = "file") -> None:
+    def process_folder_names(self, process_folder_name_callable: callable, filters: dict = None, state = "file", needs_path: bool = True) -> None:
         file_filter = FileFilter(filters)
 
-        initial_state = self._clone_data()
         any_changes = False
-        for folder in self.data["folders"].values():
-            if not folder.is_enabled:
-                continue
+        self.history.begin("process folder names")
+        try:
+            for folder in self.data["folders"].values():
+                if not folder.is_enabled:
+                    continue
 
-            abs_path = folder.folder_path
-            folder_name = folder.new_name
-            current_name = folder.current_name
-            path_obj = Path(abs_path)
+                abs_path = folder.folder_path
+                folder_name = folder.new_name
+                current_name = folder.current_name
+                path_obj = Path(abs_path) if needs_path else None
             
-            if not file_filter.filter(abs_path, folder_name):
-                continue
+                if not file_filter.filter(abs_path, folder_name):
+                    continue
 
-            new_name = process_folder_name_callable(folder_name, path_obj, current_name, state)
-            if new_name != folder.new_name:  # Only save history if the name is actually changed
-                folder.new_name = new_name
-                any_changes = True
+                new_name = process_folder_name_callable(folder_name, path_obj, current_name, state)
+                if self.history.set(folder, "new_name", new_name):  # Only recorded if the name actually changed
+                    any_changes = True
+        except Exception:
+            self.history.rollback()  # Leave the names as they were if a step fails midway
+            raise
+        self.history.commit()
 
         if any_changes:
-            self._save_history(custom=initial_state)
             self.data_changed_signal.emit({
                 "data_type": "name_processing_done",
                 "folders_data": self.data["folders"]
@@ -515,33 +771,89 @@ class DataManager:
             self.information_signal.emit_info("Processed names")
             self.recalculate_summary()
 
-    def process_file_names(self, process_file_name_callable: callable, filters: dict = None, state = "file") -> None:
-        file_filter = FileFilter(filters)
+    def process_file_names(self, process_file_name_callable: callable, filters: dict = None, state = "file", needs_path: bool = True, compiled_pipeline=None, file_filter: FileFilter = None, revise: bool = False) -> None:
+        file_filter = file_filter or FileFilter(filters)
 
-        initial_state = self._clone_data()
-        any_changes = False
+        files = []
         for folder in self.data["folders"].values():
             if not folder.is_enabled:
                 continue  # Skip disabled folders
+            # Skip disabled files and the ones that don't pass the filter conditions, a folder at a time
+            files.extend(file_filter.select_files([file for file in folder.files if file.is_enabled]))
 
-            for file in folder.files:
-                if not file.is_enabled:
-                    continue  # Skip disabled files
-
-                abs_path = file.abs_path
-                file_name = file.new_name
-                current_name = file.current_name
-                path_obj = Path(abs_path)
-                if not file_filter.filter(abs_path, file_name):
-                    continue  # Skip if the file doesn't pass the filter conditions
-
-                new_name = process_file_name_callable(file_name, path_obj, current_name, state)
-                if new_name != file.new_name:  # Only save history if the name is actually changed
-                    file.new_name = new_name
+        if compiled_pipeline is None:
+            self._process_file_names_with(process_file_name_callable, files, state, needs_path)
+            return
+
+        # With --revise the command replaces the last run, continuing from the names its
+        # shared steps produced last time. Otherwise it runs on top of the current names
+        checkpoints = self.checkpoints
+        start = checkpoints.resume_point(compiled_pipeline, files, self.history) if checkpoints and revise else 0
+        if revise and not start:
+            self.information_signal.emit_info("Nothing to revise, applying the command on top of the current names", context="names")
+        inputs = checkpoints.inputs if start else [file.new_name for file in files]
+        names = checkpoints.columns[start - 1] if start else inputs
+        self.checkpoints = None
+
+        if self.background_runs and len(files) >= BACKGROUND_RUN_THRESHOLD:
+            run = NameRun(files, compiled_pipeline, needs_path, self.parallel_runner, inputs=names, start=start)
+            if start:
+                run.original_inputs = inputs
+                run.checkpoint_columns = checkpoints.columns[:start]
+                run.revised = self._revise_last_run(checkpoints, start, len(compiled_pipeline))
+            self.start_name_run(run)
+            return
+
+        revised = self._revise_last_run(checkpoints, start, len(compiled_pipeline)) if start else None
+        any_changes = revised is not None
+        self.history.begin("process file names")
+        try:
+            paths = [file.abs_path for file in files] if needs_path else None
+            current_names = [file.current_name for file in files]
+            if needs_path and compiled_pipeline.probes_images(start):
+                # Read the image headers on a pool of threads first, the steps then run from memory
+                with prefetched_probes(paths):
+                    columns = run_columns(compiled_pipeline, names, paths, current_names, start)
+            elif self.parallel_runner.should_run(len(files)):
+                # Large batch: run the picklable pipeline in worker processes and merge the results
+                columns = self.parallel_runner.map(compiled_pipeline, names, paths, current_names, start)
+            else:
+                # Use the pipeline this task was created with, it may have been queued behind a run
+                columns = run_columns(compiled_pipeline, names, paths, current_names, start)
+
+            for file, new_name in zip(files, columns[-1] if columns else names):
+                if self.history.set(file, "new_name", new_name):  # Only recorded if the name actually changed
                     any_changes = True  # Mark that we have made a change
+        except Exception:
+            self.history.rollback()  # Leave the names as they were if a step fails midway
+            if revised is not None:
+                self.history.redo()  # Put the revised run's names back as well
+            raise
+        top = self.history.undo_stack[-1] if self.history.undo_stack else None
+        self.history.commit()
+        self._keep_checkpoints(files, inputs, compiled_pipeline, (checkpoints.columns[:start] if start else []) + columns, top)
+        self._flush_probe_cache()
+
+        if any_changes:
+            self.data_changed_signal.emit({
+                "data_type": "name_processing_done",
+                "folders_data": self.data["folders"]
+            })
+            self.information_signal.emit_info("Processed names")
+            self.recalculate_summary()
+
+
+    def _process_file_names_with(self, process_file_name_callable: callable, files: list, state, needs_path: bool) -> None:
+        """Run a plain callable over files, for callers that don't pass a compiled pipeline."""
+        any_changes = False
+        with self.history.transaction("process file names"):
+            for file in files:
+                # Only image steps read the file, so only they get a Path
+                new_name = process_file_name_callable(file.new_name, Path(file.abs_path) if needs_path else None, file.current_name, state)
+                if self.history.set(file, "new_name", new_name):
+                    any_changes = True
 
         if any_changes:
-            self._save_history(custom=initial_state)
             self.data_changed_signal.emit({
                 "data_type": "name_processing_done",
                 "folders_data": self.data["folders"]
@@ -549,15 +861,148 @@ class DataManager:
             self.information_signal.emit_info("Processed names")
             self.recalculate_summary()
 
+    def _revise_last_run(self, checkpoints: RunCheckpoints, start: int, step_count: int):
+        """Undo the run that is being revised, so the new one is recorded as a replacement for it."""
+        self.information_signal.emit_info(f"Revising the last run, reusing {start} of {step_count} steps", context="names")
+        if checkpoints.transaction is None:
+            return None
+        self.history.undo()
+        return checkpoints.transaction
+
+    def _keep_checkpoints(self, files: list, inputs: list, pipeline, columns: list, previous_top) -> None:
+        """Keep the step columns of a finished run, with the undo step it was recorded as."""
+        top = self.history.undo_stack[-1] if self.history.undo_stack else None
+        transaction = top if top is not previous_top else None
+        signatures = [step.signature for step in pipeline.steps]
+        self.checkpoints = RunCheckpoints(files, inputs, signatures, columns, transaction)
+
+    def start_name_run(self, run: NameRun) -> None:
+        """Hand a pipeline run to the background worker. Names are merged as chunks complete."""
+        self.name_run = run
+        if self.parallel_runner.should_run(run.total):
+            self.parallel_runner.start()  # On this thread, the run's thread can't spawn the workers
+        self.information_signal.emit_info(f"Processing {run.total} names... (Esc to cancel)", context="names")
+        self.name_run_signal.emit(run)
+
+    def apply_name_chunk(self, run: NameRun, files: list, new_names: list, columns: list = ()) -> None:
+        """Write one computed chunk to the model. Called on the UI thread."""
+        if run is not self.name_run or run.cancelled:
+            return
+
+        extend_columns(run.columns, columns)
+
+        first_change = len(run.changes)
+        for file, new_name in zip(files, new_names):
+            old_name = file.new_name
+            if old_name != new_name:
+                run.changes.append((file, old_name, new_name))
+                file.new_name = new_name
+        is_preview = run.done == 0
+        run.done += len(files)
+
+        if is_preview:
+            # Show the first page of results right away, the tables are refreshed once at the end
+            for file, _, _ in run.changes[first_change:]:
+                self.data_changed_signal.emit({
+                    "data_type": "file",
+                    "file_data": file,
+                    "folders_data": self.data["folders"]
+                })
+
+        now = time.monotonic()
+        if now - run.last_progress >= NAME_RUN_PROGRESS_INTERVAL:
+            run.last_progress = now
+            self.information_signal.emit_info(
+                f"Processing names... {run.done}/{run.total} ({run.rate:.0f}/s, Esc to cancel)",
+                context="names",
+            )
+
+    def finish_name_run(self, run: NameRun, error: Exception = None) -> None:
+        """Record a finished run as one undo step, or restore the names if it was cancelled or failed."""
+        if run is not self.name_run:
+            return
+        self.name_run = None
+
+        aborted = run.cancelled or error is not None
+        if aborted:
+            for file, old_name, _ in reversed(run.changes):
+                file.new_name = old_name
+            if run.revised is not None:
+                self.history.redo()  # Put the revised run's names back as well
+            if error is not None:
+                self.information_signal.emit_error(f"Error while processing file names: {error}")
+            else:
+                self.information_signal.emit_warning(f"Cancelled after {run.done}/{run.total} names, nothing was changed", context="names")
+        else:
+            top = self.history.undo_stack[-1] if self.history.undo_stack else None
+            with self.history.transaction("process file names"):
+                for file, old_name, new_name in run.changes:
+                    self.history.record(file, "new_name", old_name, new_name)
+            self._keep_checkpoints(run.files, run.original_inputs, run.pipeline, run.checkpoint_columns + run.columns, top)
+            self.information_signal.emit_success(f"Processed {run.total} names ({run.rate:.0f}/s)", context="names")
+        self._flush_probe_cache()
+
+        if run.changes or run.revised is not None:
+            self.data_changed_signal.emit({
+                "data_type": "name_processing_done",
+                "folders_data": self.data["folders"]
+            })
+            self.recalculate_summary()
+
+        # Run what was requested meanwhile; an apply that followed a cancelled run is dropped
+        queued, self._queued_tasks = self._queued_tasks, []
+        for task in queued:
+            if aborted and task["type"] == "request_apply_names":
+                continue
+            try:
+                self.on_task_execution(task)
+            except Exception as e:
+                self.information_signal.emit_error(f"Error while running {task['type']}: {e}")
+
+    def preview_file_names(self, compiled_pipeline, filters: dict = None, needs_path: bool = True) -> None:
+        """Keep the pipeline as a pending transform; the file table computes names for the rows in view."""
+        self.preview = NamePreview(compiled_pipeline, FileFilter(filters), needs_path)
+        self.data_changed_signal.emit({
+            "data_type": "preview",
+            "preview": self.preview,
+            "folders_data": self.data["folders"]
+        })
+        self.information_signal.emit_info("Previewing names, use --compute-all or --apply to process every file", context="preview")
+
+    def clear_preview(self) -> None:
+        if self.preview is None:
+            return
+        self.preview = None
+        self.data_changed_signal.emit({
+            "data_type": "preview",
+            "preview": None,
+            "folders_data": self.data["folders"]
+        })
+
+    def materialize_preview(self) -> None:
+        """Run the previewed pipeline over every enabled file that passes its filter."""
+        preview = self.preview
+        if preview is None:
+            self.information_signal.emit_warning("Nothing to compute, run a command with --preview first", context="preview")
+            return
+        self.clear_preview()
+        self.process_file_names(None, state="file", needs_path=preview.needs_path, compiled_pipeline=preview.pipeline, file_filter=preview.file_filter)
+
+    def cancel_name_run(self) -> bool:
+        """Cancel the running pipeline run. Returns False if nothing is running."""
+        if self.name_run is None:
+            return False
+        self.name_run.cancel()
+        return True
 
     def reset_all_file_names(self) -> None:
         """Reset all file new names to current names."""
-        for folder in self.data["folders"].values():
-            for file in folder.files:
-                # Reset the new name to the current name
-                file.new_name = file.current_name
+        with self.history.transaction("reset file names"):
+            for folder in self.data["folders"].values():
+                for file in folder.files:
+                    # Reset the new name to the current name
+                    self.history.set(file, "new_name", file.current_name)
 
-        self._save_history()
         self.data_changed_signal.emit({
             "data_type": "name_processing_done",
             "folders_data": self.data["folders"]
@@ -568,10 +1013,10 @@ class DataManager:
     
     def reset_all_folder_names(self) -> None:
         """Reset all file new names to current names."""
-        for folder in self.data["folders"].values():
-            folder.new_name = folder.current_name
+        with self.history.transaction("reset folder names"):
+            for folder in self.data["folders"].values():
+                self.history.set(folder, "new_name", folder.current_name)
 
-        self._save_history()
         self.data_changed_signal.emit({
             "data_type": "name_processing_done",
             "folders_data": self.data["folders"]
@@ -580,15 +1025,223 @@ class DataManager:
         self.recalculate_summary()
 
 
+    def refresh_file_stats(self) -> None:
+        """
+        Re-read size, modification time and inode for every loaded file.
+
+        Each folder is read with a single scandir pass. Files that are no longer on disk
+        keep their last known values.
+        """
+        refreshed = 0
+        for folder in self.data["folders"].values():
+            if not folder.files_populated:
+                continue
+            try:
+                batch = scan_directory(folder.folder_path, self.scan_cache, refresh=True)
+            except OSError:
+                continue
+            entries = {entry.name: entry for entry in batch.files}
+            for file in folder.files:
+                entry = entries.get(file.current_name)
+                if entry is not None:
+                    file.set_stat(entry)
+                    refreshed += 1
+
+        self.data_changed_signal.emit({
+            "data_type": "batch_update_done",
+            "folders_data": self.data["folders"]
+        })
+        self._flush_scan_cache()
+        self.information_signal.emit_info(f"Rescanned {refreshed} files", context="scan")
+        self.recalculate_summary()
+
+    def sync_directories(self, paths) -> None:
+        """
+        Bring the model in line with directories that changed on disk.
+
+        Only the given directories are read. Parents are synced before their children so
+        a removed subtree is dropped before anything below it is looked at.
+        """
+        changed = 0
+        for path in sorted(paths, key=len):
+            if self.sync_directory(path):
+                changed += 1
+
+        if changed:
+            self._flush_scan_cache()
+            self.information_signal.emit_info(f"Updated {changed} folders from disk", context="watch")
+            self.recalculate_summary()
+            self.data_changed_signal.emit({
+                "data_type": "summary",
+                "summary_data": self.data["summary"],
+                "folders_data": self.data["folders"]
+            })
+
+    def sync_directory(self, path: str) -> bool:
+        """Apply added, removed and renamed entries of one loaded directory. Returns True if anything changed."""
+        folder = self.registry.get_by_path(path)
+        if folder is None or not (folder.files_populated or folder.subfolders_populated):
+            return False  # Not loaded yet, it will be read when it's opened
+        try:
+            # An event means the directory changed under the cache, and a file rewritten in
+            # place leaves the directory mtime the cache is keyed by as it was
+            batch = scan_directory(path, self.scan_cache, refresh=True)
+        except OSError:
+            return False  # Gone, the parent directory reports the removal
+
+        changed = False
+        if folder.files_populated:
+            changed |= self._sync_files(folder, batch.files)
+        if folder.subfolders_populated:
+            changed |= self._sync_subfolders(folder, batch.folders)
+        return changed
+
+    def _sync_files(self, folder: Folder, entries) -> bool:
+        on_disk = {entry.name: entry for entry in entries}
+        known = {file.current_name: file for file in folder.files}
+        removed = [file for name, file in known.items() if name not in on_disk]
+        added = [entry for name, entry in on_disk.items() if name not in known]
+
+        changed = bool(removed or added)
+
+        # A rename shows up as one removed and one added name sharing an inode
+        added_by_inode = {entry.inode(): entry for entry in added if entry.inode()}
+        renamed = []
+        for file in list(removed):
+            entry = added_by_inode.pop(file.inode, None) if file.inode else None
+            if entry is None:
+                continue
+            renamed.append(file)
+            removed.remove(file)
+            added.remove(entry)
+            if file.new_name == file.current_name:
+                file.new_name = entry.name
+            file.current_name = entry.name
+            file.set_stat(entry)
+            self.data_changed_signal.emit({
+                "data_type": "file",
+                "file_data": file,
+                "folders_data": self.data["folders"]
+            })
+
+        if renamed or removed:
+            # Their recorded names were relative to a current name that is gone, undoing them
+            # would queue a rename back to a stale name
+            self.history.forget(renamed + removed)
+            self.checkpoints = None
+
+        for file in removed:
+            folder.files.remove(file)
+            self.data["summary"]["files_count"] -= 1
+            self.data_changed_signal.emit({
+                "data_type": "file_removed",
+                "file_data": file,
+                "folders_data": self.data["folders"]
+            })
+
+        for entry in added:
+            file = File(file_name=entry.name, folder=folder)
+            file.set_stat(entry)
+            folder.files.append(file)
+            self.data["summary"]["files_count"] += 1
+            self.data_changed_signal.emit({
+                "data_type": "file_added",
+                "file_data": file,
+                "folders_data": self.data["folders"]
+            })
+
+        # Files that stayed put may have been rewritten
+        for name, file in known.items():
+            entry = on_disk.get(name)
+            if entry is None:
+                continue
+            size, mtime = file.size, file.mtime
+            file.set_stat(entry)
+            if (file.size, file.mtime) != (size, mtime):
+                changed = True
+                self.data_changed_signal.emit({
+                    "data_type": "file",
+                    "file_data": file,
+                    "folders_data": self.data["folders"]
+                })
+
+        return changed
+
+    def _sync_subfolders(self, folder: Folder, entries) -> bool:
+        on_disk = {entry.name for entry in entries}
+        known = {subfolder.current_name: subfolder for subfolder in folder.folders}
+
+        removed = [subfolder for name, subfolder in known.items() if name not in on_disk]
+        for subfolder in removed:
+            folder.folders.remove(subfolder)
+            self.data["summary"]["files_count"] -= self._count_files(subfolder)
+            self.registry.unregister(subfolder)
+            self.data_changed_signal.emit({
+                "data_type": "folder_removed",
+                "folder_data": subfolder,
+                "folders_data": self.data["folders"]
+            })
+
+        added = [name for name in on_disk if name not in known]
+        for name in sorted(added):
+            subfolder = Folder(name, folder, self.root_folder_path)
+            subfolder.is_enabled = False
+            folder.add_folder(subfolder)
+            self.data_changed_signal.emit({
+                "data_type": "folder_added",
+                "folder_data": subfolder,
+                "folders_data": self.data["folders"]
+            })
+
+        return bool(removed or added)
+
+    @staticmethod
+    def _count_files(folder: Folder) -> int:
+        count, stack = 0, [folder]
+        while stack:
+            current = stack.pop()
+            count += len(current.files)
+            stack.extend(current.folders)
+        return count
+
+    def shutdown(self) -> None:
+        """Stop background workers and write out pending cache entries."""
+        self.scanner.cancel()
+        self.cancel_name_run()
+        self.parallel_runner.shutdown()
+        self._flush_scan_cache()
+        self._flush_probe_cache()
+
+    def purge_scan_cache(self) -> None:
+        """Drop the cached directory listings for this root so the next scan reads the disk."""
+        if self.scan_cache is None:
+            self.information_signal.emit_warning("Scan cache is disabled", context="scan")
+            return
+        removed = self.scan_cache.purge()
+        self.information_signal.emit_success(f"Purged {removed} cached folders", context="scan")
+
+    def purge_probe_cache(self) -> None:
+        """Drop the stored image probes, so resolution-add and img-info-add read every header again."""
+        if self.probe_cache is None:
+            return
+        removed = self.probe_cache.purge()
+        self.information_signal.emit_success(f"Purged {removed} cached image probes", context="scan")
+
+    def _flush_scan_cache(self) -> None:
+        if self.scan_cache is not None:
+            self.scan_cache.flush()
+
+    def _flush_probe_cache(self) -> None:
+        if self.probe_cache is not None:
+            self.probe_cache.flush()
+
     def update_folder_data(self, node: Any) -> None:
         """Toggle folder and file states based on node status."""
         folder_id = node.data.get("folder_id", "")
-        folder = self.data["folders"].get(folder_id)
+        folder = self.registry.get(folder_id)
         if folder:
             self.populate_files_for_folder(folder)
-            self._save_history()
-
-            folder.is_enabled = node.is_enabled
+            self.history.set(folder, "is_enabled", node.is_enabled)
             self.data_changed_signal.emit({
                 "data_type": "folder",
                 "folder_data": folder,
@@ -604,6 +1257,9 @@ class DataManager:
 
         if not updated_data:
             # Full recalculation
+            new_summary["enabled_folders_count"] = 0
+            new_summary["enabled_files_count"] = 0
+            new_summary["total_size"] = 0
             for folder in self.data["folders"].values():
                 if folder.is_enabled:
                     new_summary["enabled_folders_count"] += 1
@@ -652,8 +1308,6 @@ class DataManager:
                 self.root_folder_id = folder.id
                 self.populate_files_for_folder(folder)
 
-            total_files = 0
-
             # Use os.scandir() for faster iteration
             with os.scandir(current_path) as it:
                 for entry in it:
@@ -664,21 +1318,20 @@ class DataManager:
                         folder_node.path = Path(entry.path)
 
                         new_folder = Folder(entry.name, folder, self.root_folder_path)
-                        self.data["folders"][new_folder.id] = new_folder
+                        folder.add_folder(new_folder)
 
                         new_folder.is_enabled = recursive
                         folder_node.is_enabled = recursive
                         folder_node.data = {
                             "folder_id": new_folder.id
                         }
+                        folder_node.tree.register_folder_node(folder_node)
 
                         # Instead of recursion, add the folder to the stack
                         stack.append((folder_node, Path(entry.path)))
                         if folder_node.is_enabled:
                             self.populate_files_for_folder(new_folder)
 
-            folder.files_count = total_files  # Store the total file count for this folder
-
         self.recalculate_summary()
 
     def populate_tree(self, node, path: Path, recursive: bool = True) -> None:
@@ -686,33 +1339,16 @@ class DataManager:
         
         is_root = not node.data.get("folder_id")
         folder = self._add_folder(path)
+        batch = scan_directory(path, self.scan_cache)
 
         if is_root:
             node.data["folder_id"] = folder.id
             self.root_folder_id = folder.id
-            self.populate_files_for_folder(folder)
+            self._add_scanned_files(folder, batch.files)
 
-        with os.scandir(path) as it:
-            for entry in it:
-                if entry.is_dir():
-                    folder_icon = DISABLED_FOLDER
-                    folder_node = node.add(f"{folder_icon} {entry.name}")
-                    folder_node.auto_expand = False
-                    folder_node.path = Path(entry.path)
-
-                    new_folder = self._add_folder(folder_node.path)
-                    # new_folder = Folder(entry.name, folder, self.root_folder_path)
-                    self.data["folders"][new_folder.id] = new_folder
-
-                    new_folder.is_enabled = False
-                    folder_node.is_enabled = False
-                    folder_node.data = {"folder_id": new_folder.id}
-
-                    # Populate files for the subfolder only if it's enabled
-                    if new_folder.is_enabled:
-                        self.populate_files_for_folder(new_folder)
-            
+        self._add_subfolder_nodes(node, folder, batch.folders)
         folder.subfolders_populated = True
+        self._flush_scan_cache()
         self.recalculate_summary()
 
 
@@ -722,25 +1358,15 @@ class DataManager:
             if folder_id is None:
                 raise ValueError("Either 'folder' or 'folder_id' must be provided.")
 
-            folder = self.data.get("folders", {}).get(folder_id)
+            folder = self.registry.get(folder_id)
             if folder is None:
                 raise ValueError(f"Folder with ID '{folder_id}' not found.")
             
         if folder.files_populated:
             return
 
-        folder_path = Path(folder.folder_path)
-
-        for file in folder_path.iterdir():
-            if file.is_file():
-                self._add_file(Path(file))
-                # new_file = File(file.name, folder)
-                # self.data["folders"][folder.id].files.append(new_file)
-                self.data["summary"]["files_count"] += 1
-                if folder.is_enabled:
-                    self.data["summary"]["enabled_files_count"] += 1
-
-        folder.files_populated = True
+        self._add_scanned_files(folder, scan_directory(folder.folder_path, self.scan_cache).files)
+        self._flush_scan_cache()
 
     
     def populate_subfolders(self, node, folder: Folder = None, folder_id: str = None) -> None:
@@ -749,7 +1375,7 @@ class DataManager:
             if folder_id is None:
                 raise ValueError("Either 'folder' or 'folder_id' must be provided.")
 
-            folder = self.data.get("folders", {}).get(folder_id)
+            folder = self.registry.get(folder_id)
             if folder is None:
                 raise ValueError(f"Folder with ID '{folder_id}' not found.")
             
@@ -758,31 +1384,93 @@ class DataManager:
                 self.populate_files_for_folder(folder)
             return
             
-        folder_path = Path(folder.folder_path)
-        
-        if not folder_path.exists() or not folder_path.is_dir():
-            return  # Safety check
-        
-        with os.scandir(folder_path) as it:
-            for entry in it:
-                if entry.is_dir():
-                    folder_icon = DISABLED_FOLDER
-                    folder_node = node.add(f"{folder_icon} {entry.name}")
-                    folder_node.auto_expand = False
-                    folder_node.path = Path(entry.path)
+        try:
+            batch = scan_directory(folder.folder_path, self.scan_cache)
+        except OSError:
+            return  # Safety check, the folder is gone or unreadable
 
-                    new_folder = Folder(entry.name, folder, self.root_folder_path)
-                    self.data["folders"][new_folder.id] = new_folder
+        self._add_subfolder_nodes(node, folder, batch.folders)
+        folder.subfolders_populated = True
+        self._flush_scan_cache()
 
-                    new_folder.is_enabled = False
-                    folder_node.is_enabled = False
-                    folder_node.data = {"folder_id": new_folder.id}
+    def apply_scan_batch(self, node, batch: ScanBatch, enabled: bool = False) -> None:
+        """Merge one directory read by the background scanner into the model and the tree."""
+        folder = self.registry.get_by_path(batch.path)
+        if folder is None:
+            return
 
-                    # Populate files for the subfolder when enabled
-                    if new_folder.is_enabled:
-                        self.populate_files_for_folder(new_folder)
+        if not folder.subfolders_populated:
+            self._add_subfolder_nodes(node, folder, batch.folders, enabled=enabled)
+            folder.subfolders_populated = True
+        self._add_scanned_files(folder, batch.files)
+
+        self.scan_progress["folders"] += 1
+        self.scan_progress["files"] += len(batch.files)
+
+        # Refresh the views periodically so the tree and tables fill in while the scan runs
+        now = time.monotonic()
+        if now - self._last_scan_refresh >= SCAN_REFRESH_INTERVAL:
+            self._last_scan_refresh = now
+            self.information_signal.emit_info(
+                f"Scanning... {self.scan_progress['folders']} folders, {self.scan_progress['files']} files",
+                context="scan",
+            )
+            self.recalculate_summary()
+            self.data_changed_signal.emit({
+                "data_type": "batch_update_done",
+                "folders_data": self.data["folders"]
+            })
 
-        folder.subfolders_populated = True
+    def start_scan(self) -> None:
+        """Reset the progress counters before a background scan."""
+        self.scan_progress = {"folders": 0, "files": 0}
+        self._last_scan_refresh = time.monotonic()
+
+    def finish_scan(self, cancelled: bool = False) -> None:
+        """Report the result of a background scan and refresh the views."""
+        folders, files = self.scan_progress["folders"], self.scan_progress["files"]
+        if cancelled:
+            self.information_signal.emit_warning(f"Scan cancelled after {folders} folders, {files} files", context="scan")
+        else:
+            self.information_signal.emit_success(f"Scan complete: {folders} folders, {files} files", context="scan")
+        self.recalculate_summary()
+        self.data_changed_signal.emit({
+            "data_type": "batch_update_done",
+            "folders_data": self.data["folders"]
+        })
+
+    def _add_subfolder_nodes(self, node, folder: Folder, entries, enabled: bool = False) -> None:
+        """Create folders and tree nodes for the directory entries found under folder."""
+        folder_icon = ENABLED_FOLDER if enabled else DISABLED_FOLDER
+        for entry in entries:
+            folder_node = node.add(f"{folder_icon} {entry.name}")
+            folder_node.auto_expand = False
+            folder_node.path = Path(entry.path)
+
+            new_folder = self.registry.get_by_path(entry.path)
+            if new_folder is None:
+                new_folder = Folder(entry.name, folder, self.root_folder_path)
+                folder.add_folder(new_folder)
+
+            new_folder.is_enabled = enabled
+            folder_node.is_enabled = enabled
+            folder_node.data = {"folder_id": new_folder.id}
+            folder_node.tree.register_folder_node(folder_node)
+
+    def _add_scanned_files(self, folder: Folder, entries) -> None:
+        """Create files for the directory entries found in folder."""
+        if folder.files_populated:
+            return
+
+        for entry in entries:
+            file = File(file_name=entry.name, folder=folder)
+            file.set_stat(entry)
+            folder.files.append(file)
+        self.data["summary"]["files_count"] += len(entries)
+        if folder.is_enabled:
+            self.data["summary"]["enabled_files_count"] += len(entries)
+
+        folder.files_populated = True
 
 
 
@@ -790,28 +1478,28 @@ class DataManager:
         """Ensure a folder exists in the data structure and return its reference."""
         folder_path = str(path)
 
-        # Check if the folder already exists using its ID
-        existing_folder = next((f for f in self.data["folders"].values() if f.folder_path == folder_path), None)
+        # Check if the folder already exists using the path index
+        existing_folder = self.registry.get_by_path(folder_path)
 
         if existing_folder:
             return existing_folder  # Return the existing folder
 
         # If folder doesn't exist, create a new one
-        parent_folder = next((f for f in self.data["folders"].values() if f.folder_path == str(path.parent)), None)
+        parent_folder = self.registry.get_by_path(str(path.parent))
         folder = Folder(folder_name=path.name, parent=parent_folder, root_path=self.root_folder_path)
 
         if parent_folder:
             parent_folder.add_folder(folder)
+        else:
+            self.registry.register(folder)
 
-        # Store the folder using its ID instead of folder_path
-        self.data["folders"][folder.id] = folder
-        
         return folder
 
 
-    def _add_file(self, file: Path) -> None:
+    def _add_file(self, file: Path, parent_folder: Folder = None) -> None:
         """Add a file to its parent folder in the data structure."""
-        parent_folder = self._add_folder(file.parent)
+        if parent_folder is None:
+            parent_folder = self._add_folder(file.parent)
         file_instance = File(file_name=file.name, folder=parent_folder)
         parent_folder.files.append(file_instance)
 
@@ -827,7 +1515,7 @@ class DataManager:
     def is_folder_enabled(self, file_abs_path: str) -> bool:
         """Check if the folder containing the given file is enabled."""
         folder_path = str(Path(file_abs_path).parent)
-        folder = self.data["folders"].get(folder_path)
+        folder = self.registry.get_by_path(folder_path)
         if folder is None:
             return False
         return folder.is_enabled
@@ -1003,6 +1691,11 @@ class DataManager:
         task_type = data["type"]
         state = data["state"]
 
+        if self.name_run is not None:
+            # Keep the order of requests, they run once the current pipeline run is done
+            self._queued_tasks.append(data)
+            return
+
         if task_type == "enable-all":
             if state == "file":
                 self.enable_all_files(True)
@@ -1056,20 +1749,44 @@ class DataManager:
             if state == "file":
                 self.enable_files_by_ext(ext, False)
 
+        elif task_type == "rescan":
+            self.refresh_file_stats()
+        elif task_type == "purge-cache":
+            self.purge_scan_cache()
+            self.purge_probe_cache()
+        elif task_type == "resume-apply":
+            self.resume_apply()
+        elif task_type == "rollback-apply":
+            self.rollback_apply()
+
+        elif task_type == "preview-file-names":
+            self.preview_file_names(data["compiled_pipeline"], data["filters"], data.get("needs_path", True))
+        elif task_type == "compute-preview":
+            self.materialize_preview()
+
         elif task_type == "request_apply_names":
+            if self.preview is not None:
+                # Apply what was previewed: compute every name first, then rename once that's done
+                self.materialize_preview()
+                if self.name_run is not None:
+                    self._queued_tasks.append(data)
+                    return
             scope = data["scope"]
+            workers = data.get("workers")
             if state == "file":
-                self.rename_all_files(self.data, scope)
+                self.rename_all_files(self.data, scope, workers)
             elif state == "folder":
-                self.rename_all_folders(self.data, scope)
+                self.rename_all_folders(self.data, scope, workers)
 
         elif task_type == "process-file-names":
             filters = data["filters"]
             pipeline = data["pipeline"]
+            needs_path = data.get("needs_path", True)
             if state == "file":
-                self.process_file_names(pipeline, filters, state)
+                self.clear_preview()  # A regular command replaces the pending preview
+                self.process_file_names(pipeline, filters, state, needs_path, data.get("compiled_pipeline"), revise=data.get("revise", False))
             elif state == "folder":
-                self.process_folder_names(pipeline, filters, state)
+                self.process_folder_names(pipeline, filters, state, needs_path)
 
         elif task_type == "rename-file":
             self.rename_file(folder_id=data["folder_id"], file_id=data["file_id"], new_name=data["new_name"])
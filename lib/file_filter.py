@@ -1,68 +1,145 @@
 import re
 import os
-from datetime import datetime
+
+from .names import name_extension
 
 
 class FileFilter:
+    """
+    The --ext, --regex, --prefix, --size and --date conditions of a command, compiled once.
+
+    The conditions are checked cheapest first, so most files are turned away by a set
+    lookup or a string compare before a regex runs. Size and date come last, they stat
+    the file when the model has no cached values.
+    """
+
     def __init__(self, filters: dict):
+        filters = filters or {}
         self.ext_filter = filters.get("ext", None)
         self.regex_filter = filters.get("regex", None)
         self.prefix_filter = filters.get("prefix", None)
         self.size_filter = filters.get("size", None)  # (min_size, max_size)
         self.date_filter = filters.get("date", None)  # (min_date, max_date)
 
-    def filter(self, abs_path, file_name):
-        if self.ext_filter and not self._filter_by_extension(abs_path):
-            return False  # Skip if the file doesn't match the extension filter
+        # Compile the user pattern once instead of once per file
+        self.regex_pattern = None
+        if self.regex_filter:
+            try:
+                self.regex_pattern = re.compile(self.regex_filter)
+            except re.error:
+                raise ValueError(f"Invalid regex pattern: {self.regex_filter}")
 
-        if self.regex_filter and not self._filter_by_regex(file_name):
-            return False  # Skip if the filename doesn't match the regex filter
+        # "png" and ".png" both mean the extension .png. Values with a dot inside, such as
+        # "tar.gz", are longer than the last suffix and are matched on the end of the name.
+        self.extensions = set()
+        self.compound_extensions = ()
+        if self.ext_filter:
+            values = [self.ext_filter] if isinstance(self.ext_filter, str) else self.ext_filter
+            compound = []
+            for value in values:
+                ext = "." + value.lstrip(".")
+                if ext == ".":
+                    continue
+                if "." in ext[1:]:
+                    compound.append(ext)
+                else:
+                    self.extensions.add(ext)
+            self.compound_extensions = tuple(compound)
 
+        self.min_size, self.max_size = self.size_filter or (None, None)
+        # Compared with the mtime as a timestamp, instead of a datetime made for every file
+        min_date, max_date = self.date_filter or (None, None)
+        self.min_mtime = min_date.timestamp() if min_date else None
+        self.max_mtime = max_date.timestamp() if max_date else None
+
+        self.checks_extension = bool(self.extensions or self.compound_extensions)
+
+    def filter(self, abs_path, file_name, size=None, mtime=None):
+        """
+        Check a file or folder against all filters.
+
+        The extension is read from the name on disk at abs_path, the other name filters
+        look at file_name. size and mtime are the values cached on the model at scan
+        time. They are only read from disk when not given, e.g. for folders.
+        """
+        if self.checks_extension and not self._filter_by_extension(os.path.basename(abs_path)):
+            return False  # Skip if the file doesn't match the extension filter
         if self.prefix_filter and not self._filter_by_prefix(file_name):
             return False  # Skip if the filename doesn't start with the prefix filter
+        if self.regex_filter and not self._filter_by_regex(file_name):
+            return False  # Skip if the filename doesn't match the regex filter
 
-        if self.size_filter and not self._filter_by_size(abs_path):
+        if self.size_filter and not self._filter_by_size(os.path.getsize(abs_path) if size is None else size):
             return False  # Skip if the file doesn't match the size filter
-
-        if self.date_filter and not self._filter_by_date(abs_path):
+        if self.date_filter and not self._filter_by_date(os.path.getmtime(abs_path) if mtime is None else mtime):
             return False  # Skip if the file doesn't match the date filter
+        return True
 
+    def filter_file(self, file, name: str = None) -> bool:
+        """Check a File of the model, with name (its new name by default) for the name filters."""
+        if name is None:
+            name = file.new_name
+        if self.checks_extension and not self._file_has_extension(file):
+            return False
+        if self.prefix_filter and not name.startswith(self.prefix_filter):
+            return False
+        if self.regex_filter and self.regex_pattern.search(name) is None:
+            return False
+        if self.size_filter and not self._filter_by_size(file.size):
+            return False
+        if self.date_filter and not self._filter_by_date(file.mtime):
+            return False
         return True
 
-    def _filter_by_extension(self, abs_path):
-        """Check if file ends with the given extension(s)"""
-        if isinstance(self.ext_filter, str):
-            return abs_path.endswith(self.ext_filter)
-        elif isinstance(self.ext_filter, list):
-            return any(abs_path.endswith(ext) for ext in self.ext_filter)
-        return False
+    def select_files(self, files: list) -> list:
+        """The files that pass, in order. Each condition runs over what the one before let through."""
+        selected = files
+        if self.checks_extension:
+            selected = [file for file in selected if self._file_has_extension(file)]
+        if self.prefix_filter:
+            prefix = self.prefix_filter
+            selected = [file for file in selected if file.new_name.startswith(prefix)]
+        if self.regex_filter:
+            search = self.regex_pattern.search
+            selected = [file for file in selected if search(file.new_name) is not None]
+        if self.size_filter:
+            selected = [file for file in selected if self._filter_by_size(file.size)]
+        if self.date_filter:
+            selected = [file for file in selected if self._filter_by_date(file.mtime)]
+        return selected
+
+    def filter_batch(self, files: list) -> list:
+        """The ids of the files that pass, e.g. for all the files of one folder."""
+        return [file.id for file in self.select_files(files)]
+
+    def _filter_by_extension(self, file_name):
+        """Check if the name has one of the given extension(s)"""
+        if name_extension(file_name) in self.extensions:
+            return True
+        return bool(self.compound_extensions) and file_name.endswith(self.compound_extensions)
+
+    def _file_has_extension(self, file):
+        """_filter_by_extension for a File, with the extension the model already splits off"""
+        if file.file_ext in self.extensions:
+            return True
+        return bool(self.compound_extensions) and file.current_name.endswith(self.compound_extensions)
 
     def _filter_by_regex(self, file_name):
         """Check if file name matches the given regex pattern"""
-        try:
-            return bool(re.search(self.regex_filter, file_name))
-        except re.error:
-            raise ValueError(f"Invalid regex pattern: {self.regex_filter}")
+        return self.regex_pattern.search(file_name) is not None
 
     def _filter_by_prefix(self, file_name):
         """Check if file name starts with the given prefix"""
         return file_name.startswith(self.prefix_filter)
 
-    def _filter_by_size(self, abs_path):
+    def _filter_by_size(self, file_size):
         """Check if file size is within the given size range (min_size, max_size)"""
-        min_size, max_size = self.size_filter
-        file_size = os.path.getsize(abs_path)
-        return (min_size is None or file_size >= min_size) and (max_size is None or file_size <= max_size)
-
-    def _filter_by_date(self, abs_path):
-        """Check if file's last modified date is within the given date range (min_date, max_date)"""
-        file_mod_time = os.path.getmtime(abs_path)
-        file_mod_date = datetime.fromtimestamp(file_mod_time)
-
-        min_date, max_date = self.date_filter
+        return (self.min_size is None or file_size >= self.min_size) and (self.max_size is None or file_size <= self.max_size)
 
-        if min_date and file_mod_date < min_date:
+    def _filter_by_date(self, file_mod_time):
+        """Check if file's last modified time is within the given date range (min_date, max_date)"""
+        if self.min_mtime is not None and file_mod_time < self.min_mtime:
             return False
-        if max_date and file_mod_date > max_date:
+        if self.max_mtime is not None and file_mod_time > self.max_mtime:
             return False
         return True
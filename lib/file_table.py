@@ -39,6 +39,9 @@ class FileTable(DataTable):
         self.row_metadata = {}
         self.column_sort_order = {}
         self.column_mapping = FileTableColumns.get_all_columns()
+        self.row_files = {}  # row key -> File
+        self.preview = None  # NamePreview whose names are shown for the rows in view
+        self._previewed_rows = set()
         self.loading = True
         self.initialize_table()
 
@@ -135,6 +138,8 @@ class FileTable(DataTable):
     def populate_table(self, folder_data):
         self.loading = True
         self.clear()
+        self.row_files = {}
+        self._previewed_rows = set()
         for folder in folder_data.values():
             if not folder.is_enabled:
                 continue
@@ -144,10 +149,12 @@ class FileTable(DataTable):
                 self.add_file_row(file_data)
         
         self.loading = False
+        self.call_after_refresh(self.refresh_visible_rows)
 
     def add_file_row(self, file_data):
         # Create a list to store the row, applying highlight changes to current_name and new_name
         row = []
+        new_name = self.display_name(file_data)
 
         # Iterate through each column in the column mapping
         for column in self.column_mapping:
@@ -157,12 +164,10 @@ class FileTable(DataTable):
             # If the column is either current_name or new_name, apply highlighting
             if column["key"] == "current_name":
                 original_name = file_data.current_name
-                new_name = file_data.new_name
                 highlighted_current, _ = highlight_changes(original_name, new_name)
                 row.append(highlighted_current)  # Add the highlighted current name
             elif column["key"] == "new_name":
                 original_name = file_data.current_name
-                new_name = file_data.new_name
                 _, highlighted_new = highlight_changes(original_name, new_name)
                 row.append(highlighted_new)  # Add the highlighted new name
             else:
@@ -172,18 +177,19 @@ class FileTable(DataTable):
         classes = []
         if not file_data.is_enabled:
             classes.append("disabled")
-        if file_data.current_name != file_data.new_name:
+        if file_data.current_name != new_name:
             classes.append("pending-change")
 
         # Add the row to the table with the appropriate classes
-        self.add_row(*row, key=file_data.id)
+        self.add_row(*row, key=str(file_data.id))
+        self.row_files[str(file_data.id)] = file_data
 
 
 
     def update_file_row(self, file_data):
         """Update a file row with highlighted changes for current_name and new_name."""
         rel_path = file_data.rel_path
-        file_id = file_data.id
+        file_id = str(file_data.id)
         print(rel_path)
         print(rel_path)
         print(rel_path)
@@ -193,6 +199,7 @@ class FileTable(DataTable):
             return
 
         # Iterate over each column to update the relevant cells
+        new_name = self.display_name(file_data)
         for column_index, column in enumerate(self.column_mapping):
             value = self.get_file_data(file_data, column["key"])
             print(value)
@@ -200,14 +207,12 @@ class FileTable(DataTable):
             # Apply highlighting to the columns that have current_name or new_name
             if column["key"] == "current_name":
                 original_name = file_data.current_name
-                new_name = file_data.new_name
                 highlighted_current, _ = highlight_changes(original_name, new_name)
                 # Use update_cell to update the current_name cell with highlighted text
                 self.update_cell(file_id, str(column_index), highlighted_current)
             
             elif column["key"] == "new_name":
                 original_name = file_data.current_name
-                new_name = file_data.new_name
                 _, highlighted_new = highlight_changes(original_name, new_name)
                 # Use update_cell to update the new_name cell with highlighted text
                 self.update_cell(file_id, str(column_index), highlighted_new)
@@ -220,6 +225,47 @@ class FileTable(DataTable):
     def remove_file_row(self, rel_path: str):
         if rel_path in self.rows:
             self.remove_row(rel_path)
+        self.row_files.pop(rel_path, None)
+        self._previewed_rows.discard(rel_path)
+
+    def display_name(self, file_data) -> str:
+        """The new name to show: the previewed one if it has been computed, otherwise the model's."""
+        if self.preview is not None:
+            name = self.preview.peek(file_data)
+            if name is not None:
+                return name
+        return file_data.new_name
+
+    def set_preview(self, preview) -> None:
+        """Show a pending preview, or drop it and restore the rows it changed when preview is None."""
+        self.preview = preview
+        previewed, self._previewed_rows = self._previewed_rows, set()
+        for row_key in previewed:
+            file_data = self.row_files.get(row_key)
+            if file_data is not None:
+                self.update_file_row(file_data)
+        self.refresh_visible_rows()
+
+    def refresh_visible_rows(self) -> None:
+        """Compute preview names for the rows in view. Rows that were already shown are memoized."""
+        if self.preview is None:
+            return
+        first_row = int(self.scroll_y)
+        for row in self.ordered_rows[first_row:first_row + self.size.height]:
+            row_key = row.key.value
+            file_data = self.row_files.get(row_key)
+            if file_data is None or row_key in self._previewed_rows:
+                continue
+            self.preview.name_for(file_data)
+            self._previewed_rows.add(row_key)
+            self.update_file_row(file_data)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self.refresh_visible_rows()
+
+    def on_resize(self, event) -> None:
+        self.refresh_visible_rows()
 
     def handle_file_rename(self, old_rel_path: str, file_data: dict):
         self.remove_file_row(old_rel_path)
@@ -232,12 +278,12 @@ class FileTable(DataTable):
             return Text("✓", style="bold #A3BE8C") if file_data.is_enabled else Text("✗", style="bold #BF616A")
         
         if key == FileTableColumns.RESET.value["key"]:
-            is_pending = file_data.current_name != file_data.new_name
+            is_pending = file_data.current_name != self.display_name(file_data)
             # Use bright cyan for reset icon (↻)
             return Text("↻", style="bold #EBCB8B") if is_pending else Text(" ")
         
         if key == FileTableColumns.APPLY.value["key"]:
-            is_pending = file_data.current_name != file_data.new_name
+            is_pending = file_data.current_name != self.display_name(file_data)
             # Use bright yellow for apply icon (⏎)
             return Text("⏎", style="bold #88C0D0") if is_pending else Text(" ")
         
@@ -289,6 +335,13 @@ class FileTable(DataTable):
             self.populate_table(data)
         elif update_type == "file_data":
             self.update_file_row(data)
+        elif update_type == "file_added":
+            if data.folder.is_enabled:
+                self.add_file_row(data)
+        elif update_type == "file_removed":
+            self.remove_file_row(str(data.id))
+        elif update_type == "preview":
+            self.set_preview(data)
 
 from textual.message import Message
 
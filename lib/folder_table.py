@@ -150,11 +150,11 @@ class FolderTable(DataTable):
         if folder_data.current_name != folder_data.new_name:
             classes.append("pending-change")
 
-        self.add_row(*row, key=folder_data.id)
+        self.add_row(*row, key=str(folder_data.id))
 
 
     def update_folder_row(self, folder_data):
-        folder_id = folder_data.id
+        folder_id = str(folder_data.id)
         if folder_id not in self.rows:
             print("No folder id in data")
             return
@@ -259,4 +259,8 @@ class FolderTable(DataTable):
             self.populate_table(data)
         elif update_type == "folder_data":
             self.update_folder_row(data)
+        elif update_type == "folder_added":
+            self.add_folder_row(data)
+        elif update_type == "folder_removed":
+            self.remove_folder_row(str(data.id))
 
@@ -0,0 +1,178 @@
+import sys
+from collections import deque
+from contextlib import contextmanager
+
+# Rough cost of one recorded change: the tuple, its list slot and the field name reference
+CHANGE_OVERHEAD = 96
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # 64 MB
+
+
+class Transaction:
+    """A group of attribute changes that are undone and redone together."""
+    __slots__ = ("label", "changes", "size")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.changes = []  # (target, field, old_value, new_value)
+        self.size = 0
+
+    def __len__(self):
+        return len(self.changes)
+
+
+class History:
+    """
+    Undo/redo history that stores deltas instead of snapshots.
+
+    Every change is recorded as (target, field, old value, new value) where the target is
+    the File or Folder instance that was modified, so undoing a transaction only touches the
+    objects it changed. The history is bounded by an approximate memory budget in bytes;
+    the oldest transactions are dropped once the budget is exceeded.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self.undo_stack = deque()
+        self.redo_stack = deque()
+        self.memory_used = 0
+        self._open = None
+        self._savepoints = []
+
+    # --- Transactions ---
+    def begin(self, label: str = "") -> None:
+        """Open a transaction. Nested calls are folded into the outermost one."""
+        if not self._savepoints:
+            self._open = Transaction(label)
+        self._savepoints.append(len(self._open.changes))
+
+    def commit(self) -> None:
+        """Close the current transaction and push it on the undo stack if it changed anything."""
+        if not self._savepoints:
+            return
+        self._savepoints.pop()
+        if self._savepoints:
+            return
+
+        transaction, self._open = self._open, None
+        if transaction.changes:
+            self._push(transaction)
+
+    def rollback(self) -> None:
+        """Revert and discard the changes recorded since the matching begin()."""
+        if not self._savepoints:
+            return
+        savepoint = self._savepoints.pop()
+        transaction = self._open
+        reverted = transaction.changes[savepoint:]
+        del transaction.changes[savepoint:]
+        for target, field, old_value, new_value in reversed(reverted):
+            setattr(target, field, old_value)
+            transaction.size -= self._change_size(old_value, new_value)
+
+        if not self._savepoints:
+            self._open = None
+            if transaction.changes:
+                self._push(transaction)
+
+    @contextmanager
+    def transaction(self, label: str = ""):
+        self.begin(label)
+        try:
+            yield self
+        finally:
+            self.commit()
+
+    # --- Recording ---
+    def set(self, target, field: str, value) -> bool:
+        """Set an attribute on target and record the change. Returns True if the value changed."""
+        old_value = getattr(target, field)
+        if old_value == value:
+            return False
+        setattr(target, field, value)
+        self.record(target, field, old_value, value)
+        return True
+
+    def record(self, target, field: str, old_value, new_value) -> None:
+        """Record a change that has already been applied to target."""
+        change = (target, field, old_value, new_value)
+        size = self._change_size(old_value, new_value)
+
+        if self._open is None:
+            # A change made outside a transaction is its own undo step
+            transaction = Transaction()
+            transaction.changes.append(change)
+            transaction.size = size
+            self._push(transaction)
+            return
+
+        self._open.changes.append(change)
+        self._open.size += size
+
+    # --- Undo/Redo ---
+    def undo(self):
+        """Revert the latest transaction. Returns it, or None if there is nothing to undo."""
+        if not self.undo_stack:
+            return None
+        transaction = self.undo_stack.pop()
+        for target, field, old_value, _ in reversed(transaction.changes):
+            setattr(target, field, old_value)
+        self.redo_stack.append(transaction)
+        return transaction
+
+    def redo(self):
+        """Re-apply the latest undone transaction. Returns it, or None if there is nothing to redo."""
+        if not self.redo_stack:
+            return None
+        transaction = self.redo_stack.pop()
+        for target, field, _, new_value in transaction.changes:
+            setattr(target, field, new_value)
+        self.undo_stack.append(transaction)
+        return transaction
+
+    def forget(self, targets) -> None:
+        """
+        Drop every recorded change of the given Files or Folders, e.g. ones renamed on disk
+        behind the history's back, so undo and redo leave them alone. Transactions left
+        without changes are removed.
+        """
+        targets = set(targets)
+        if not targets:
+            return
+        for stack in (self.undo_stack, self.redo_stack):
+            kept = deque()
+            for transaction in stack:
+                if any(change[0] in targets for change in transaction.changes):
+                    self.memory_used -= transaction.size
+                    transaction.changes = [change for change in transaction.changes if change[0] not in targets]
+                    transaction.size = sum(self._change_size(change[2], change[3]) for change in transaction.changes)
+                    self.memory_used += transaction.size
+                if transaction.changes:
+                    kept.append(transaction)
+            stack.clear()
+            stack.extend(kept)
+
+    def clear(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.memory_used = 0
+
+    @staticmethod
+    def _change_size(old_value, new_value) -> int:
+        size = CHANGE_OVERHEAD
+        if isinstance(old_value, str):
+            size += sys.getsizeof(old_value)
+        if isinstance(new_value, str):
+            size += sys.getsizeof(new_value)
+        return size
+
+    def _push(self, transaction: Transaction) -> None:
+        for dropped in self.redo_stack:
+            self.memory_used -= dropped.size
+        self.redo_stack.clear()
+
+        self.undo_stack.append(transaction)
+        self.memory_used += transaction.size
+
+        # Drop the oldest steps once over budget, but always keep the latest one
+        while self.memory_used > self.memory_budget and len(self.undo_stack) > 1:
+            self.memory_used -= self.undo_stack.popleft().size
@@ -0,0 +1,205 @@
+import struct
+from functools import lru_cache
+
+# Readers for the headers of the texture formats whose general readers decode the whole
+# image. Each takes an open binary file, reads only the header and returns
+# (width, height, channels), or None when the header is one it doesn't know, in which
+# case the caller falls back to the full reader. channels is the channel layout the
+# image has once decoded, as imageio returns it; a palette image is decoded to its
+# palette's colors.
+
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+EXR_DEEP_FLAG = 0x800
+EXR_HEADER_READ = 4096  # Bytes read at a time until the end of the header
+EXR_MAX_HEADER = 1 << 20  # A header this big is left to OpenEXR
+EXR_PIXEL_TYPES = {0: "UINT", 1: "HALF", 2: "FLOAT"}
+
+LAYOUTS = {
+    "L": ("L",),
+    "LA": ("L", "A"),
+    "RGB": ("R", "G", "B"),
+    "RGBA": ("R", "G", "B", "A"),
+}
+
+# (image type without the RLE bit, bits per pixel) -> mode, as Pillow decodes TGA
+TGA_MODES = {
+    (3, 8): "L",
+    (3, 16): "LA",
+    (2, 16): "RGBA",
+    (2, 24): "RGB",
+    (2, 32): "RGBA",
+}
+TGA_PALETTE_MODES = {16: "RGBA", 24: "RGB", 32: "RGBA"}  # Colormap entry size -> decoded mode
+
+DX10_FOURCC = int.from_bytes(b"DX10", "little")  # A DXGI format follows the header
+
+
+@lru_cache(maxsize=None)
+def _dds_formats():
+    """(DDPF, {fourcc: mode}, {DXGI format: mode}), with Pillow's names for the DDS constants."""
+    # Imported on the first DDS header, so the app starts without Pillow
+    from PIL.DdsImagePlugin import D3DFMT, DDPF, DXGI_FORMAT
+
+    fourcc_modes = {
+        D3DFMT.DXT1: "RGBA",
+        D3DFMT.DXT3: "RGBA",
+        D3DFMT.DXT5: "RGBA",
+        D3DFMT.BC4U: "L",
+        D3DFMT.ATI1: "L",
+        D3DFMT.BC5S: "RGB",
+        D3DFMT.BC5U: "RGB",
+        D3DFMT.ATI2: "RGB",
+    }
+    dxgi_modes = {
+        DXGI_FORMAT.BC1_UNORM: "RGBA",
+        DXGI_FORMAT.BC1_TYPELESS: "RGBA",
+        DXGI_FORMAT.BC2_TYPELESS: "RGBA",
+        DXGI_FORMAT.BC2_UNORM: "RGBA",
+        DXGI_FORMAT.BC3_TYPELESS: "RGBA",
+        DXGI_FORMAT.BC3_UNORM: "RGBA",
+        DXGI_FORMAT.BC4_TYPELESS: "L",
+        DXGI_FORMAT.BC4_UNORM: "L",
+        DXGI_FORMAT.BC5_TYPELESS: "RGB",
+        DXGI_FORMAT.BC5_UNORM: "RGB",
+        DXGI_FORMAT.BC5_SNORM: "RGB",
+        DXGI_FORMAT.BC6H_UF16: "RGB",
+        DXGI_FORMAT.BC6H_SF16: "RGB",
+        DXGI_FORMAT.BC7_TYPELESS: "RGBA",
+        DXGI_FORMAT.BC7_UNORM: "RGBA",
+        DXGI_FORMAT.BC7_UNORM_SRGB: "RGBA",
+        DXGI_FORMAT.R8G8B8A8_TYPELESS: "RGBA",
+        DXGI_FORMAT.R8G8B8A8_UNORM: "RGBA",
+        DXGI_FORMAT.R8G8B8A8_UNORM_SRGB: "RGBA",
+    }
+    return DDPF, fourcc_modes, dxgi_modes
+
+
+def read_tga_header(file):
+    """The 18-byte TGA header."""
+    header = file.read(18)
+    if len(header) < 18:
+        return None
+    colormap_type, image_type = header[1], header[2]
+    colormap_depth = header[7]
+    width, height = struct.unpack_from("<HH", header, 12)
+    depth = header[16]
+    if colormap_type not in (0, 1) or width <= 0 or height <= 0:
+        return None
+
+    if image_type in (1, 9):  # Color-mapped, 8-bit indexes
+        mode = TGA_PALETTE_MODES.get(colormap_depth) if colormap_type and depth == 8 else None
+    else:
+        mode = TGA_MODES.get((image_type & 7, depth)) if image_type in (2, 3, 10, 11) else None
+    if mode is None:
+        return None
+    return width, height, LAYOUTS[mode]
+
+
+def read_dds_header(file):
+    """The 128-byte DDS header and, for DXGI formats, the 20-byte DX10 extension."""
+    header = file.read(128)
+    if len(header) < 128 or header[:4] != b"DDS " or struct.unpack_from("<I", header, 4)[0] != 124:
+        return None
+    height, width = struct.unpack_from("<II", header, 12)
+    DDPF, fourcc_modes, dxgi_modes = _dds_formats()
+    pixel_flags, fourcc, bit_count = struct.unpack_from("<III", header, 80)
+
+    mode = None
+    if pixel_flags & DDPF.RGB:
+        mode = "RGBA" if pixel_flags & DDPF.ALPHAPIXELS else "RGB"
+    elif pixel_flags & DDPF.LUMINANCE:
+        if bit_count == 8:
+            mode = "L"
+        elif bit_count == 16 and pixel_flags & DDPF.ALPHAPIXELS:
+            mode = "LA"
+    elif pixel_flags & DDPF.PALETTEINDEXED8:
+        mode = "RGBA"  # The palette has RGBA entries
+    elif pixel_flags & DDPF.FOURCC:
+        if fourcc == DX10_FOURCC:
+            extension = file.read(20)
+            if len(extension) < 20:
+                return None
+            mode = dxgi_modes.get(struct.unpack_from("<I", extension)[0])
+        else:
+            mode = fourcc_modes.get(fourcc)
+    if mode is None:
+        return None
+    return width, height, LAYOUTS[mode]
+
+
+def _read_exr_attributes(file):
+    """Yield (name, type, value bytes) for the attributes of the first EXR header, read from after the version."""
+    data = file.read(EXR_HEADER_READ)
+    position = 0
+
+    def ensure(end):
+        nonlocal data
+        while len(data) < end:
+            more = file.read(EXR_HEADER_READ)
+            if not more or len(data) > EXR_MAX_HEADER:
+                raise ValueError("EXR header cut off")
+            data += more
+
+    def read_string():
+        nonlocal position
+        end = data.find(b"\0", position)
+        while end < 0:
+            ensure(len(data) + 1)
+            end = data.find(b"\0", position)
+        text = data[position:end].decode("latin-1")
+        position = end + 1
+        return text
+
+    while True:
+        name = read_string()
+        if not name:
+            return
+        attribute_type = read_string()
+        ensure(position + 4)
+        (size,) = struct.unpack_from("<i", data, position)
+        if size < 0:
+            raise ValueError("negative EXR attribute size")
+        position += 4
+        ensure(position + size)
+        yield name, attribute_type, data[position:position + size]
+        position += size
+
+
+def _parse_channels(value: bytes) -> dict:
+    channels = {}
+    position = 0
+    while value[position:position + 1] not in (b"\0", b""):
+        end = value.index(b"\0", position)
+        name = value[position:end].decode("latin-1")
+        (pixel_type,) = struct.unpack_from("<i", value, end + 1)
+        channels[name] = EXR_PIXEL_TYPES.get(pixel_type)
+        position = end + 1 + 16  # Pixel type, pLinear, three reserved bytes, x and y sampling
+    return channels
+
+
+def read_exr_header(file):
+    """
+    The attributes of the first EXR header, which is what OpenEXR.InputFile reads too.
+
+    channels is {name: "UINT" | "HALF" | "FLOAT"} in file order, which is sorted by name.
+    """
+    start = file.read(8)
+    if len(start) < 8 or start[:4] != EXR_MAGIC:
+        return None
+    (version,) = struct.unpack_from("<I", start, 4)
+    if version & EXR_DEEP_FLAG:
+        return None
+
+    width = height = channels = None
+    try:
+        for name, attribute_type, value in _read_exr_attributes(file):
+            if name == "displayWindow" and attribute_type == "box2i" and len(value) == 16:
+                x_min, y_min, x_max, y_max = struct.unpack("<4i", value)
+                width, height = x_max - x_min + 1, y_max - y_min + 1
+            elif name == "channels" and attribute_type == "chlist":
+                channels = _parse_channels(value)
+    except (ValueError, struct.error):
+        return None
+    if width is None or channels is None:
+        return None
+    return width, height, channels
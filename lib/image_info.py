@@ -1,9 +1,12 @@
-import Imath
-import imageio.v3 as iio
-import OpenEXR
 import os
 import re
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from .image_headers import read_dds_header, read_exr_header, read_tga_header
+from .image_probe import ImageProbe, probe_cache, probe_key
 
 RESOLUTION_TAGS = {
     2: "2",
@@ -21,184 +24,232 @@ RESOLUTION_TAGS = {
     8192: "8K"
 }
 
-def _get_texture_resolution(path):
-    image_path = path.resolve()
-    ext = os.path.splitext(image_path)[-1].lower()
-    # print(image_path)
+PIL_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tiff"}
+ARRAY_EXTENSIONS = {".tga", ".dds"}
+IMAGE_EXTENSIONS = PIL_EXTENSIONS | ARRAY_EXTENSIONS | {".exr"}
+
+PIL_MODE_INFO = {
+    "1": ("L", 1),  # 1-bit Black & White
+    "L": ("L", None),  # Grayscale, bits from the file
+    "P": ("P", 8),  # 8-bit Palette
+    "RGB": ("RGB", None),  # 8 bits per channel unless the file says otherwise
+    "RGBA": ("RGBA", None),
+    "I": ("I", 32),  # 32-bit Integer
+    "F": ("F", 32),  # 32-bit Float
+    "I;16": ("L", 16),
+}
+ARRAY_DTYPE_INFO = {
+    "uint8": (8, "RGB"),
+    "uint16": (16, "RGB"),
+    "float16": (16, "F16"),
+    "float32": (32, "F32"),
+}
+CHANNEL_LAYOUTS = {1: ("L",), 2: ("L", "A"), 3: ("R", "G", "B"), 4: ("R", "G", "B", "A")}
+
+PREFETCH_WORKERS = 16  # Probes in flight at once, they mostly wait on the disk
+PREFETCH_BATCH = 32  # Paths per task handed to a prefetch thread
+
+
+# The image backends pull in NumPy and native libraries, so they are imported by the
+# first probe that needs one rather than when the app starts.
+
+@lru_cache(maxsize=None)
+def _pil_image():
+    from PIL import Image
+    return Image
+
+
+@lru_cache(maxsize=None)
+def _imageio():
+    import imageio.v3 as iio
+    return iio
+
+
+@lru_cache(maxsize=None)
+def _openexr():
+    try:
+        import OpenEXR
+    except ImportError:  # Optional, EXR headers the reader doesn't know can't be read
+        return None
+    return OpenEXR
+
+
+def _probe_pil(image_path):
+    with _pil_image().open(image_path) as img:
+        img_type, bits_per_channel = PIL_MODE_INFO.get(img.mode, (None, None))
+        if img_type is not None and bits_per_channel is None:
+            bits_per_channel = img.info.get("bits", 8)  # Default to 8 if not found
+        return ImageProbe(img.width, img.height, img_type, bits_per_channel, img.getbands())
+
+
+def _read_header(image_path, read_header):
     try:
-        if ext in [".png", ".jpg", ".jpeg", ".bmp", ".tiff"]:
-            with Image.open(image_path) as img:
-                return img.width, img.height
-
-        elif ext in [".tga", ".dds"]:
-            img = iio.imread(image_path)
-            return img.shape[1], img.shape[0]  # (width, height)
-        
-        elif ext == ".exr":  # Special handling for .exr
-            # print("EXT FILE")
-            # file = OpenEXR.InputFile(image_path)
-            file = OpenEXR.InputFile(path.as_posix())
-            # print("opening file")
-            header = file.header()
-            # print(header)
-            width = header['displayWindow'].max.x - header['displayWindow'].min.x + 1
-            height = header['displayWindow'].max.y - header['displayWindow'].min.y + 1
-            # print(width)
-            # print(height)
-            return width, height
-        
+        with open(image_path, "rb") as file:
+            return read_header(file)
+    except OSError:
+        return None  # The full reader reports it
+
+
+def _probe_array(image_path, ext):
+    header = _read_header(image_path, read_tga_header if ext == ".tga" else read_dds_header)
+    if header is not None:
+        width, height, channels = header
+        # Decoded, these are always 8 bits per channel
+        return ImageProbe(width, height, "RGBA" if len(channels) == 4 else "RGB", 8, channels)
+
+    # A header the reader doesn't know: imageio decodes the whole image
+    img = _imageio().imread(image_path)
+    num_channels = img.shape[-1] if len(img.shape) > 2 else 1
+    bit_depth, img_type = ARRAY_DTYPE_INFO.get(str(img.dtype), (None, None))
+    if num_channels == 4:
+        img_type = "RGBA"  # If it's more than 3 channels, we assume it's RGBA
+    return ImageProbe(img.shape[1], img.shape[0], img_type, bit_depth, CHANNEL_LAYOUTS.get(num_channels, ()))
+
+
+def _read_exr_with_openexr(image_path):
+    OpenEXR = _openexr()
+    if OpenEXR is None:
+        raise RuntimeError(f"OpenEXR is not installed, can't read the header of '{image_path}'")
+    file = OpenEXR.InputFile(image_path)
+    try:
+        header = file.header()
+    finally:
+        file.close()
+    width = header['displayWindow'].max.x - header['displayWindow'].min.x + 1
+    height = header['displayWindow'].max.y - header['displayWindow'].min.y + 1
+    return width, height, {name: str(channel_data.type) for name, channel_data in header['channels'].items()}
+
+
+def _probe_exr(image_path):
+    header = _read_header(image_path, read_exr_header)
+    width, height, channels = header if header is not None else _read_exr_with_openexr(image_path)
+
+    bit_depth = 0
+    prefix = ""
+    for pixel_type in channels.values():
+        if pixel_type == "HALF":
+            prefix = "F"
+            bit_depth = 16
+        elif pixel_type == "FLOAT":
+            prefix = "F"
+            bit_depth = 32
+        elif pixel_type == "UINT":
+            prefix = "I"
+            bit_depth = 32
         else:
-            return "Unsupported format", None
+            bit_depth = ""
+
+    img_type = 'RGBA' if len(channels) == 4 else 'RGB'
+    if len(channels) == 1:
+        img_type = "L"  # If you have only 1 channel, it can be grayscale
+    return ImageProbe(width, height, img_type, f"{prefix}{bit_depth}", channels)
+
 
+def probe_image(path) -> ImageProbe:
+    """
+    Read the header facts of an image once per version of the file.
+
+    Both resolution-add and img-info-add go through here, so running them together opens
+    each image once, and later runs take the probe from the cache. Returns None for
+    formats the image commands don't read.
+    """
+    image_path = os.fspath(path)
+    ext = os.path.splitext(image_path)[-1].lower()
+    if ext not in IMAGE_EXTENSIONS:
+        return None
+
+    cache = probe_cache()
+    probe = cache.pinned(image_path)
+    if probe is not None:
+        return probe
+    key = probe_key(image_path, ext)
+    probe = cache.get(key) if key is not None else None
+    if probe is not None:
+        return probe
+
+    try:
+        if ext in PIL_EXTENSIONS:
+            probe = _probe_pil(image_path)
+        elif ext in ARRAY_EXTENSIONS:
+            probe = _probe_array(image_path, ext)
+        else:
+            probe = _probe_exr(image_path)
     except Exception as e:
+        return ImageProbe(error=str(e))
+
+    if key is not None:
+        cache.put(key, probe)
+    return probe
+
+
+def _probe_batch(paths: list) -> list:
+    return [(path, probe_image(path)) for path in paths]
+
+
+def prefetch_probes(paths, max_workers: int = PREFETCH_WORKERS) -> dict:
+    """
+    Probe the images among paths on a pool of threads, filling the probe cache.
+
+    Returns {path: ImageProbe}, the paths in the form the pipeline passes them.
+    """
+    image_paths = []
+    for path in paths:
+        path = os.fspath(Path(path))
+        if os.path.splitext(path)[-1].lower() in IMAGE_EXTENSIONS:
+            image_paths.append(path)
+    batches = [image_paths[i:i + PREFETCH_BATCH] for i in range(0, len(image_paths), PREFETCH_BATCH)]
+    if len(batches) <= 1:
+        return dict(_probe_batch(image_paths))
+
+    probes = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches)), thread_name_prefix="probe") as pool:
+        for batch in pool.map(_probe_batch, batches):
+            probes.update(batch)
+    return probes
+
+
+@contextmanager
+def prefetched_probes(paths, max_workers: int = PREFETCH_WORKERS):
+    """
+    Prefetch the probes of paths, then let probe_image answer for them from memory until
+    the block ends, so the steps of a run don't touch the disk again.
+    """
+    probes = prefetch_probes(paths, max_workers)
+    cache = probe_cache()
+    cache.pin(probes)
+    try:
+        yield probes
+    finally:
+        cache.unpin(probes)
+
+
+def _get_texture_resolution(path):
+    probe = probe_image(path)
+    if probe is None:
+        return "Unsupported format", None
+    if probe.error is not None:
         return None, None
-        # return "Error", str(e)
-    
+    return probe.width, probe.height
+
+
 def _get_resolution_tag(width, height):
     """Convert resolution to tag format (_512, _1K, _2K, etc.)."""
     if width == height and width in RESOLUTION_TAGS:
         return RESOLUTION_TAGS[width]
     return f"{width}x{height}"  # Fallback to exact resolution
 
-def _get_image_info(path):
-    image_path = path.resolve()
-    ext = os.path.splitext(image_path)[-1].lower()
 
-    try:
-        if ext in [".png", ".jpg", ".jpeg", ".bmp", ".tiff"]:
-            with Image.open(image_path) as img:
-                bit_depth = img.info.get("bits", 8)  # Default to 8 if not found
-                # print(f"{ext}: bit depth: {bit_depth}")
-                # print(f"{img.mode}")
-
-                mode_to_info = {
-                    "1": ("L", 1),    # 1-bit Black & White
-                    "L": ("L", bit_depth),    # 8-bit Grayscale
-                    "P": ("P", 8),    # 8-bit Palette
-                    "RGB": ("RGB", bit_depth), # 24-bit RGB (8 per channel)
-                    "RGBA": ("RGBA", bit_depth), # 32-bit RGBA (8 per channel)
-                    "I": ("I", 32),  # 32-bit Integer
-                    "F": ("F", 32),  # 32-bit Float
-                    "I;16": ("L", 16)
-                }
-                img_type, bits_per_channel = mode_to_info.get(img.mode, (None, None))
-                return img_type, bits_per_channel
-
-        elif ext in [".tga", ".dds"]:
-            img = iio.imread(image_path)
-            
-            # Check the number of channels to determine if it's RGBA or RGB
-            num_channels = img.shape[-1] if len(img.shape) > 2 else 1
-
-            dtype_to_info = {
-                "uint8": (8, "RGB"),
-                "uint16": (16, "RGB"),
-                "float16": (16, "F16"),
-                "float32": (32, "F32"),
-            }
-
-            # Determine bit depth and type from dtype
-            bit_depth, img_type = dtype_to_info.get(str(img.dtype), (None, None))
-
-            # If it's more than 3 channels, we assume it's RGBA
-            if num_channels == 4:
-                img_type = "RGBA"
-
-            return img_type, bit_depth
-        
-        elif ext == ".exr":
-            file = OpenEXR.InputFile(path.as_posix())
-            header = file.header()
-            channels = header['channels']
-            # print(header)
-            # print(channels)
-            
-            # Extract image data type (based on channels and type)
-            channel_types = set()
-            # print("hello")
-            channel_info = {}
-            overall_bit_depth = 0
-            prefix = ""
-            for channel_name, channel_data in channels.items():
-                # print(f"Channel: {channel_name}, Data: {channel_data}")  # Check the channel data type
-                # print(channel_data.type)
-                
-                pixel_type = channel_data.type
-                # print(pixel_type)
-                # print(Imath.PixelType.FLOAT)
-                # print(Imath.PixelType(Imath.PixelType.HALF))
-                if pixel_type == Imath.PixelType(Imath.PixelType.HALF):
-                    # print(f"Channel '{channel_name}' is of type HALF.")
-                    prefix = "F"
-                    bit_depth = 16
-                    # numpy_type = np.float16
-                elif pixel_type == Imath.PixelType(Imath.PixelType.FLOAT):
-                    # print(f"Channel '{channel_name}' is of type FLOAT.")
-                    prefix = "F"
-                    bit_depth = 32
-                    # numpy_type = np.float32
-                elif pixel_type == Imath.PixelType(Imath.PixelType.UINT):
-                    # print(f"Channel '{channel_name}' is of type UINT.")
-                    bit_depth = 32
-                    prefix = "I"
-                    # numpy_type = np.uint32
-                else:
-                    bit_depth = ""
-                    # print(f"Channel '{channel_name}' has an unknown type.")
-                    # numpy_type = None
-                overall_bit_depth = bit_depth
-
-                channel_info[channel_name] = {
-                "bit_depth": bit_depth,
-                # "numpy_type": numpy_type,
-                "pixel_type": pixel_type,
-            }
-
-            # print(channel_info)
-            # print("CHANNEL INFO")
-            # for channel_name, channel_details in channel_info.items():
-                # print(f"Channel: {channel_name}, Data: {channel_details}")  # Check the channel data type
-                # Now check the data_type
-                # if data_type_str == "FLOAT":
-                #     channel_types.add('float32')
-                # elif data_type_str == "HALF":
-                #     channel_types.add('float16')
-                # elif data_type_str == "UINT":
-                #     channel_types.add('uint8')
-                # else:
-                #     print(f"Unknown data type for {channel_name}: {data_type_str}")
-            
-            # print("hello")
-            # print(channel_types)  # Print out the collected types
-            # colorChannels = ['R', 'G', 'B', 'A'] if 'A' in header['channels'] else ['R', 'G', 'B']
-            img_type = 'RGBA' if len(channels) == 4 else 'RGB'
-            bit_depth = overall_bit_depth
-            # If only one type exists, set the img_type and bit depth
-            # if len(channel_types) == 1:
-            #     img_type = 'RGBA' if len(channels) == 4 else 'RGB'
-            #     bit_depth = channel_types.pop()  # Get the data type of the channels
-            # else:
-            #     img_type = "Unknown"
-            #     bit_depth = "Unknown"
-
-            # If you have only 1 channel, it can be grayscale
-            if len(channels) == 1:
-                img_type = "L"
-                # bit_depth = overall_bit_depth
-
-            bit_depth = f"{prefix}{bit_depth}"
-
-            return img_type, bit_depth
-        else:
-            return None, None
+def _get_image_info(path):
+    probe = probe_image(path)
+    if probe is None:
+        return None, None
+    if probe.error is not None:
+        return "Error", probe.error
+    return probe.mode, probe.bit_depth
 
-    except Exception as e:
-        return "Error", str(e)
 
 def add_resolution(name, values, ignore_extension, path):
     """Add a suffix to filenames before the extension."""
-    file_path = path.resolve()
-    # print(file_path)
     width, height = _get_texture_resolution(path)
     type = values[0]
 
@@ -218,8 +269,6 @@ def add_resolution(name, values, ignore_extension, path):
 
 def add_image_info(name, values, ignore_extension, path):
     """Add a suffix to filenames before the extension."""
-    file_path = path.resolve()
-    # print(file_path)
     img_type, bits_per_channel = _get_image_info(path)
     if img_type is None or bits_per_channel is None:
         print(f"Skipping {name}: Unsupported format or error.")
@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from .scan_cache import user_cache_dir
+
+PROBE_CACHE_FILE_NAME = "image_probes.sqlite3"
+FLUSH_EVERY = 500  # Probes buffered before they are written to the database
+MAX_STORED_PROBES = 200_000  # Rows kept in the database, the oldest written go first
+
+
+class ImageProbe:
+    """What the image commands read from an image's header."""
+    __slots__ = ("width", "height", "mode", "bit_depth", "channels", "error")
+
+    def __init__(self, width=None, height=None, mode=None, bit_depth=None, channels=(), error: str = None):
+        self.width = width
+        self.height = height
+        self.mode = mode  # As img-info-add names it: "RGB", "RGBA", "L", ...
+        self.bit_depth = bit_depth  # Bits per channel, or a string such as "F16" for EXR
+        self.channels = tuple(channels)  # Channel layout, e.g. ("R", "G", "B", "A")
+        self.error = error  # Set when the header couldn't be read
+
+    def __repr__(self):
+        return f"ImageProbe({self.width}x{self.height} {self.mode} {self.bit_depth} {self.channels})"
+
+    def to_row(self) -> tuple:
+        return self.width, self.height, json.dumps([self.mode, self.bit_depth, self.channels])
+
+    @classmethod
+    def from_row(cls, width, height, info: str) -> "ImageProbe":
+        mode, bit_depth, channels = json.loads(info)
+        return cls(width, height, mode, bit_depth, channels)
+
+
+def probe_key(path, ext: str):
+    """(device, inode, size, mtime_ns, ext) of the file at path, or None if it can't be stat'ed."""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns, ext
+
+
+class ProbeCache:
+    """
+    Image probes keyed by the device, inode, size and mtime of the file, and the extension
+    that picked the reader. The device keeps apart files on different drives and shares,
+    whose inodes can be the same.
+
+    A file that is renamed keeps its probe; one that is rewritten gets a new key. Probes
+    that failed aren't kept, their message names the path. With a db_path the probes are
+    also stored in SQLite, and a probe that isn't in memory is looked up there, so later
+    sessions find them without loading the whole table. Safe to use from several threads.
+    """
+
+    def __init__(self, db_path: Path = None):
+        self._lock = threading.Lock()
+        self._probes = {}
+        self._pending = []
+        self._pinned = {}  # path -> probe, prefetched for the run in progress
+        self._connection = None
+        self.hits = 0
+        self.misses = 0
+
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(db_path, check_same_thread=False)
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(probes)")]
+            if columns and "dev" not in columns:
+                self._connection.execute("DROP TABLE probes")  # Keyed without the device, start over
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " dev INTEGER NOT NULL, inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " ext TEXT NOT NULL, width INTEGER, height INTEGER, info TEXT NOT NULL,"
+                " PRIMARY KEY (dev, inode, size, mtime_ns, ext))"
+            )
+            self._connection.commit()
+
+    def get(self, key) -> ImageProbe:
+        probe = self._probes.get(key)
+        if probe is None and self._connection is not None:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT width, height, info FROM probes"
+                    " WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ? AND ext = ?",
+                    key,
+                ).fetchone()
+            if row is not None:
+                probe = self._probes[key] = ImageProbe.from_row(*row)
+        if probe is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return probe
+
+    def pinned(self, path: str) -> ImageProbe:
+        """The probe prefetched for path, which needs no stat to find."""
+        return self._pinned.get(path)
+
+    def pin(self, probes: dict) -> None:
+        self._pinned.update(probes)
+
+    def unpin(self, probes: dict) -> None:
+        for path in probes:
+            self._pinned.pop(path, None)
+
+    def put(self, key, probe: ImageProbe) -> None:
+        if probe.error is not None:
+            return
+        with self._lock:
+            self._probes[key] = probe
+            if self._connection is None:
+                return
+            self._pending.append(key + probe.to_row())
+            should_flush = len(self._pending) >= FLUSH_EVERY
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered probes to the database."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO probes (dev, inode, size, mtime_ns, ext, width, height, info)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                pending,
+            )
+            (stored,) = self._connection.execute("SELECT COUNT(*) FROM probes").fetchone()
+            if stored > MAX_STORED_PROBES:
+                self._connection.execute(
+                    "DELETE FROM probes WHERE rowid IN (SELECT rowid FROM probes ORDER BY rowid LIMIT ?)",
+                    (stored - MAX_STORED_PROBES,),
+                )
+            self._connection.commit()
+
+    def purge(self) -> int:
+        """Forget every probe, in memory and stored. Returns the number of stored probes removed."""
+        with self._lock:
+            self._probes = {}
+            self._pending = []
+            if self._connection is None:
+                return 0
+            cursor = self._connection.execute("DELETE FROM probes")
+            self._connection.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+
+
+_probe_cache = ProbeCache()  # Memory only until the app installs a persistent one
+
+
+def probe_cache() -> ProbeCache:
+    return _probe_cache
+
+
+def set_probe_cache(cache: ProbeCache) -> None:
+    """Share cache between the image commands of this process, e.g. one stored on disk."""
+    global _probe_cache
+    _probe_cache = cache
+
+
+def open_probe_cache() -> ProbeCache:
+    """A ProbeCache stored in the user cache directory."""
+    return ProbeCache(user_cache_dir() / PROBE_CACHE_FILE_NAME)
@@ -13,6 +13,8 @@ class InfoDisplay(Static):
         self.redo_count = 0
         self.pending_changes = 0
         self.pending_folder_changes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.refresh_display_signal = Signal()
         self.refresh_display_signal.connect(self.on_refresh_display)
         self.expand = True
@@ -27,6 +29,7 @@ class InfoDisplay(Static):
             "folders": "Folders:",
             "files": "Files:",
             "undo": "Undo:",
+            "cache": "Cache:",
         }
 
         # Determine the maximum width for all categories based on labels
@@ -50,6 +53,10 @@ class InfoDisplay(Static):
         
         undo_padding = " " * (pending_max_width + 0)
 
+        # Transform cache hits over lookups, for the pure parts of the pipelines run so far
+        cache_lookups = self.cache_hits + self.cache_misses
+        cache_rate = round(100 * self.cache_hits / cache_lookups) if cache_lookups else 0
+
         # Update the display with aligned labels and numbers
         self.update(
             f"[bold #5E81AC]{labels['folders']:<{label_width}}[/bold #5E81AC] "
@@ -58,6 +65,8 @@ class InfoDisplay(Static):
             f"{self.amount_of_enabled_files:>{max_width}}:[bold #EBCB8B]{self.pending_changes:>{pending_max_width}}[/bold #EBCB8B] / {self.amount_of_files}\n"
             f"[bold #BF616A]{labels['undo']:<{label_width}}[/bold #BF616A] "
             f"{' ' * max_width} {self.undo_count:>{pending_max_width}} / {self.redo_count}\n"
+            f"[bold #B48EAD]{labels['cache']:<{label_width}}[/bold #B48EAD] "
+            f"{cache_rate:>{max_width}}% {self.cache_hits} / {cache_lookups}\n"
         )
 
     def on_refresh_display(self, display_data):
@@ -70,6 +79,10 @@ class InfoDisplay(Static):
         self.redo_count = len(display_data["redo_stack"])
         self.pending_changes = display_data["pending_changes_count"]
         self.pending_folder_changes = display_data["pending_folder_changes_count"]
+        transform_cache = display_data.get("transform_cache")
+        if transform_cache is not None:
+            self.cache_hits = transform_cache.hits
+            self.cache_misses = transform_cache.misses
 
         self.update_display()
 
@@ -0,0 +1,171 @@
+import time
+from pathlib import Path
+
+from .command.pipeline import run_columns
+from .image_info import prefetched_probes
+
+PREVIEW_CHUNK_SIZE = 200  # About a screen of rows, shown before the rest is processed
+RUN_CHUNK_SIZE = 5_000
+BACKGROUND_RUN_THRESHOLD = 2_000  # Fewer files than this are processed directly, it's instant anyway
+
+
+class RunCheckpoints:
+    """
+    The intermediate names of the last file run: the input column and one column per step.
+    A column is a list of names, or a NameColumn for a step that only changed the bases.
+
+    When the next command only differs from this one after its first steps, the run can
+    resume from the column of the last step they share instead of starting over.
+    """
+    __slots__ = ("files", "inputs", "signatures", "columns", "transaction")
+
+    def __init__(self, files: list, inputs: list, signatures: list, columns: list, transaction=None):
+        self.files = files
+        self.inputs = inputs
+        self.signatures = signatures  # One per step, in order
+        self.columns = columns
+        self.transaction = transaction  # The undo step the run was recorded as, if it changed anything
+
+    @property
+    def outputs(self) -> list:
+        return self.columns[-1] if self.columns else self.inputs
+
+    def resume_point(self, pipeline, files: list, history) -> int:
+        """
+        Number of leading steps pipeline can take from this run, or 0 to run from scratch.
+
+        Used for --revise. Only a revision of the last run resumes: the same files, their
+        names untouched since, and its undo step still the latest. The exact same command
+        has nothing to revise and is applied on top as usual.
+        """
+        signatures = [step.signature for step in pipeline.steps]
+        shared = 0
+        for old, new in zip(self.signatures, signatures):
+            if old is None or old != new:
+                break
+            shared += 1
+        if shared == 0 or signatures == self.signatures:
+            return 0
+        if self.transaction is not None and (not history.undo_stack or history.undo_stack[-1] is not self.transaction):
+            return 0
+        if len(files) != len(self.files) or any(a is not b for a, b in zip(files, self.files)):
+            return 0
+        if any(file.new_name != name for file, name in zip(files, self.outputs)):
+            return 0
+        return shared
+
+
+class NameRun:
+    """
+    One pass of a compiled pipeline over a list of files, computed in chunks.
+
+    chunks() runs on a worker thread and only reads the files; the new names are written
+    to the model on the UI thread by DataManager.apply_name_chunk. The first chunk is
+    small so the first page of rows can be previewed while the rest is processed.
+
+    inputs and start resume a revised command from the checkpoint column of the last
+    step it shares with the previous run.
+    """
+
+    def __init__(self, files: list, pipeline, needs_path: bool = True, parallel_runner=None, inputs: list = None, start: int = 0):
+        self.files = files
+        self.pipeline = pipeline
+        self.needs_path = needs_path
+        self.parallel_runner = parallel_runner
+        self.inputs = inputs if inputs is not None else [file.new_name for file in files]
+        self.start = start
+        self.columns = []  # Filled in by DataManager.apply_name_chunk
+        self.total = len(files)
+        self.done = 0
+        self.changes = []  # (file, old_name, new_name) written to the model so far
+        self.original_inputs = self.inputs  # Names before the first step, kept for the next checkpoints
+        self.checkpoint_columns = []  # Columns of the steps taken from the previous run
+        self.revised = None  # Undo step of the run this one revises, undone while it runs
+        self.started = time.monotonic()
+        self.last_progress = self.started
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def rate(self) -> float:
+        """Files processed per second so far."""
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def cancel(self) -> None:
+        """Stop after the chunk that is being computed."""
+        self._cancelled = True
+
+    def chunks(self):
+        """Yield (files, new_names, columns) per chunk until every file is done or the run is cancelled."""
+        # Image headers are prefetched here a chunk at a time, the steps then run in this process
+        probes_images = self.needs_path and self.pipeline.probes_images(self.start)
+        parallel = not probes_images and self.parallel_runner is not None and self.parallel_runner.should_run(self.total)
+        begin = 0
+        chunk_size = PREVIEW_CHUNK_SIZE
+        while begin < self.total and not self._cancelled:
+            end = begin + chunk_size
+            files = self.files[begin:end]
+            names = self.inputs[begin:end]
+            begin += len(files)
+            chunk_size = RUN_CHUNK_SIZE * (self.parallel_runner.max_workers if parallel else 1)
+
+            paths = [file.abs_path for file in files] if self.needs_path else None
+            current_names = [file.current_name for file in files]
+            if parallel and len(files) > PREVIEW_CHUNK_SIZE:
+                columns = self.parallel_runner.map(self.pipeline, names, paths, current_names, self.start)
+            elif probes_images:
+                with prefetched_probes(paths):
+                    columns = run_columns(self.pipeline, names, paths, current_names, self.start)
+            else:
+                columns = run_columns(self.pipeline, names, paths, current_names, self.start)
+            yield files, columns[-1] if columns else names, columns
+
+
+class NamePreview:
+    """
+    A pipeline kept as a pending transform instead of being run over every file.
+
+    New names are computed when a row is shown and memoized per file, together with the
+    name they were computed from so an edit or undo of that file invalidates its entry.
+    The model is not changed until the preview is materialized with a normal run.
+    """
+
+    def __init__(self, pipeline, file_filter, needs_path: bool = True):
+        self.pipeline = pipeline
+        self.file_filter = file_filter
+        self.needs_path = needs_path
+        self.error = None
+        self._names = {}  # file id -> (source name, previewed name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def peek(self, file):
+        """Return the memoized preview name for file, or None if it hasn't been computed."""
+        cached = self._names.get(file.id)
+        if cached is not None and cached[0] == file.new_name:
+            return cached[1]
+        return None
+
+    def name_for(self, file) -> str:
+        """Return the name file would get, computing and memoizing it if needed."""
+        name = self.peek(file)
+        if name is not None:
+            return name
+
+        name = file.new_name
+        if (
+            file.is_enabled
+            and file.folder.is_enabled
+            and self.file_filter.filter_file(file, name)
+        ):
+            try:
+                name = self.pipeline(name, Path(file.abs_path) if self.needs_path else None, file.current_name)
+            except Exception as e:
+                self.error = e  # The row keeps its name, the error comes up again when the preview is materialized
+        self._names[file.id] = (file.new_name, name)
+        return name
@@ -0,0 +1,6 @@
+def name_extension(name: str) -> str:
+    """Extension of a name, same rules as Path.suffix."""
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[i:]
+    return ""
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .command.pipeline import extend_columns, run_columns
+from .command.transform_cache import shared_cache
+
+DEFAULT_PARALLEL_THRESHOLD = 20_000  # Fewer names than this run serially, process start-up isn't worth it
+DEFAULT_CHUNK_SIZE = 4_000
+
+_start_lock = threading.Lock()
+
+
+def _silence_worker() -> None:
+    """Worker processes share the terminal with the UI, keep stray prints out of it."""
+    sys.stdout = sys.stderr = open(os.devnull, "w")
+
+
+def _ready() -> None:
+    """
+    Does nothing. The pool spawns a worker per task submitted while none is idle, and a
+    new worker takes far longer to start than the submits, so one each spawns them all.
+    """
+
+
+def run_chunk(pipeline, names: list, paths: list = None, current_names: list = None, start: int = 0) -> tuple:
+    """
+    run_columns for one chunk of names. Runs in a worker process, which runs one chunk at
+    a time, and also returns the hits and misses of the worker's transform cache meanwhile.
+    """
+    hits, misses = shared_cache.hits, shared_cache.misses
+    columns = run_columns(pipeline, names, paths, current_names, start)
+    return columns, shared_cache.hits - hits, shared_cache.misses - misses
+
+
+def _slice(column, begin: int, end: int):
+    return column[begin:end] if column is not None else None
+
+
+class ParallelRunner:
+    """
+    Runs a compiled pipeline over large batches of names in a pool of worker processes.
+
+    The names are split into chunks that are sent to the workers together with the
+    pipeline, and the columns of step outputs come back in the original order. The pool is started on
+    first use and kept for later runs. Workers are spawned rather than forked so they
+    don't inherit the UI's threads.
+
+    Spawning a worker needs the real sys.stderr, see start(), so the pool is only started
+    on the main thread. A map() from another thread before that runs serially.
+    """
+
+    def __init__(self, max_workers: int = None, threshold: int = DEFAULT_PARALLEL_THRESHOLD, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self._executor = None
+
+    def should_run(self, item_count: int) -> bool:
+        return self.max_workers > 1 and item_count >= self.threshold
+
+    def start(self) -> None:
+        """
+        Start the pool and spawn every worker. Call it on the main thread, e.g. before
+        handing a run to a background thread that will call map().
+        """
+        if self._executor is not None:
+            return
+        with _start_lock:
+            if self._executor is not None:
+                return
+            # Textual swaps sys.stderr for an object without a real file descriptor, which
+            # multiprocessing hands to its helper process. Use the real one while workers start,
+            # on the main thread, which is the one Textual writes from.
+            captured_stderr, sys.stderr = sys.stderr, sys.__stderr__
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_silence_worker,
+                )
+                for _ in range(self.max_workers):
+                    executor.submit(_ready)
+            finally:
+                sys.stderr = captured_stderr
+            self._executor = executor
+
+    def map(self, pipeline, names: list, paths: list = None, current_names: list = None, start: int = 0) -> list:
+        """Same as run_columns(pipeline, names, paths, current_names, start), split over the workers."""
+        # Aim for a few chunks per worker so a slow chunk doesn't hold up the others
+        chunk_size = max(1, min(self.chunk_size, -(-len(names) // (self.max_workers * 4))))
+        bounds = [(i, i + chunk_size) for i in range(0, len(names), chunk_size)]
+        if not bounds:
+            return run_columns(pipeline, names, paths, current_names, start)  # Still one empty column per step
+
+        if self._executor is None:
+            if threading.current_thread() is not threading.main_thread():
+                return run_columns(pipeline, names, paths, current_names, start)
+            self.start()
+
+        futures = [
+            self._executor.submit(
+                run_chunk, pipeline, names[begin:end], _slice(paths, begin, end), _slice(current_names, begin, end), start
+            )
+            for begin, end in bounds
+        ]
+
+        columns = []
+        try:
+            for future in futures:
+                chunk_columns, hits, misses = future.result()
+                extend_columns(columns, chunk_columns)
+                shared_cache.add_counts(hits, misses)  # So the cache stats include the workers
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return columns
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
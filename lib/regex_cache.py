@@ -0,0 +1,36 @@
+import re
+from functools import lru_cache
+
+# Dynamic patterns built from command arguments. Bounded, and separate from re's own cache
+# so user patterns and the rename functions don't evict each other.
+PATTERN_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compiled_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    """Compile a regex once and reuse it for every name."""
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def leading_run_pattern(text: str) -> re.Pattern:
+    """Matches one or more repetitions of text at the start of a name."""
+    return re.compile(f'^{re.escape(text)}+')
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def trailing_run_pattern(text: str) -> re.Pattern:
+    """Matches one or more repetitions of text at the end of a name."""
+    return re.compile(f'{re.escape(text)}+$')
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def connected_repeat_pattern(text: str) -> re.Pattern:
+    """Matches text repeated two or more times in a row, with the first copy in group 1."""
+    return re.compile(rf"({re.escape(text)})\1+")
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def character_run_pattern(text: str) -> re.Pattern:
+    """Matches one or more repetitions of text anywhere in a name."""
+    return re.compile(rf'{re.escape(text)}+')
@@ -1,17 +1,24 @@
 import re
 import os
 
+from .regex_cache import leading_run_pattern, trailing_run_pattern, character_run_pattern
+
+_REPEATED_SEQUENCE = re.compile(r'(\w+)\1')
+_SPACES_UNDERSCORES = re.compile(r'[_\s]+')
+_DIGITS = re.compile(r'\d+')
+_SPECIAL_CHARACTERS = re.compile(r'[^a-zA-Z0-9._]')
+
 
 def remove_duplicate_words(name, ignore_extension):
     """Remove duplicate words or repeated patterns in the filename."""
 
     # Detect and remove repeated sequences like "testtest" -> "test"
     def remove_repeated_patterns(text):
-        return re.sub(r'(\w+)\1', r'\1', text)  # Only remove full repeated sequences
+        return _REPEATED_SEQUENCE.sub(r'\1', text)  # Only remove full repeated sequences
 
     # Remove separate duplicate words (e.g., "test test test" -> "test", "test_test_test" -> "test")
     def remove_duplicate_whole_words(text):
-        words = re.split(r'[_\s]+', text)  # Split by underscores or spaces
+        words = _SPACES_UNDERSCORES.split(text)  # Split by underscores or spaces
         seen = []
         for word in words:
             if word not in seen:
@@ -45,11 +52,12 @@ def remove_leading(name, values, ignore_extension):
     if not char:
         return name  # If no character is provided, return the original name
     
+    pattern = leading_run_pattern(char)
     if ignore_extension:
-        return re.sub(f'^{re.escape(char)}+', '', name)
+        return pattern.sub('', name)
 
     base_name, ext = os.path.splitext(name)
-    new_base_name = re.sub(f'^{re.escape(char)}+', '', base_name)
+    new_base_name = pattern.sub('', base_name)
     
     return new_base_name + ext
 
@@ -59,11 +67,12 @@ def remove_trailing(name, values, ignore_extension):
     if not char:
         return name  # If no character is provided, return the original name
     
+    pattern = trailing_run_pattern(char)
     if ignore_extension:
-        return re.sub(f'{re.escape(char)}+$', '', name)
+        return pattern.sub('', name)
 
     base_name, ext = os.path.splitext(name)
-    new_base_name = re.sub(f'{re.escape(char)}+$', '', base_name)
+    new_base_name = pattern.sub('', base_name)
     
     return new_base_name + ext
 
@@ -130,7 +139,7 @@ def remove_repeating_connected(name, values, ignore_extension=False):
         part_to_modify = base_name  # Only modify the base name
 
     # Use regex to remove consecutive occurrences of the character(s)
-    modified_name = re.sub(rf'{re.escape(char)}+', char, part_to_modify)  # Replace consecutive `char` with a single instance
+    modified_name = character_run_pattern(char).sub(char, part_to_modify)  # Replace consecutive `char` with a single instance
 
     # After modifying, we need to reassemble the final name
     if ignore_extension:
@@ -142,10 +151,10 @@ def remove_repeating_connected(name, values, ignore_extension=False):
 def remove_numbers(name, ignore_extension):
     """Remove all digits from the filename."""
     if ignore_extension:
-        new_name = re.sub(r'\d+', '', name)
+        new_name = _DIGITS.sub('', name)
     else:
         base_name, ext = os.path.splitext(name)
-        new_base_name = re.sub(r'\d+', '', base_name)
+        new_base_name = _DIGITS.sub('', base_name)
         new_name = new_base_name + ext
     return new_name
 
@@ -153,9 +162,9 @@ def remove_numbers(name, ignore_extension):
 def remove_special_characters(name, ignore_extension):
     """Remove all characters except letters, numbers, dots, and underscores."""
     if ignore_extension:
-        new_name = re.sub(r'[^a-zA-Z0-9._]', '', name)
+        new_name = _SPECIAL_CHARACTERS.sub('', name)
     else:
         base_name, ext = os.path.splitext(name)
-        new_base_name = re.sub(r'[^a-zA-Z0-9._]', '', base_name)
+        new_base_name = _SPECIAL_CHARACTERS.sub('', base_name)
         new_name = new_base_name + ext
     return new_name
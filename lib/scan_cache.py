@@ -0,0 +1,163 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .scanner import ScanBatch
+
+CACHE_FILE_NAME = "scan_cache.sqlite3"
+FLUSH_EVERY = 500  # Directories buffered before they are written to the database
+# A directory modified this recently could still change within the same mtime tick, so it isn't cached
+MIN_DIRECTORY_AGE = 2.0
+
+
+def user_cache_dir() -> Path:
+    """Platform cache directory for namnbyte."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base) / "namnbyte"
+
+
+class CachedStat:
+    """The part of os.stat_result the model reads."""
+    __slots__ = ("st_size", "st_mtime")
+
+    def __init__(self, st_size: int, st_mtime: float):
+        self.st_size = st_size
+        self.st_mtime = st_mtime
+
+
+class CachedEntry:
+    """Stands in for os.DirEntry when a directory listing comes from the cache."""
+    __slots__ = ("name", "_parent", "_stat", "_inode", "_is_dir")
+
+    def __init__(self, name: str, parent: str, is_dir: bool, stat: CachedStat = None, inode: int = 0):
+        self.name = name
+        self._parent = parent
+        self._is_dir = is_dir
+        self._stat = stat
+        self._inode = inode
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._parent, self.name)
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._is_dir
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return not self._is_dir
+
+    def stat(self, follow_symlinks: bool = True) -> CachedStat:
+        return self._stat
+
+    def inode(self) -> int:
+        return self._inode
+
+
+class ScanCache:
+    """
+    Persistent cache of directory listings for one root folder, stored in SQLite.
+
+    Each directory is stored with its mtime. A listing is only reused while the directory's
+    mtime is unchanged, which covers files and folders being added, removed or renamed.
+    File sizes and mtimes are not revalidated, use --rescan to refresh them. The cache is
+    safe to use from the scanner's worker threads.
+    """
+
+    def __init__(self, root_path, cache_dir: Path = None):
+        self.root_path = os.fspath(root_path)
+        cache_dir = Path(cache_dir) if cache_dir else user_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = cache_dir / CACHE_FILE_NAME
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS directories ("
+            " root TEXT NOT NULL, path TEXT NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " folders TEXT NOT NULL, files TEXT NOT NULL, PRIMARY KEY (root, path))"
+        )
+        self._connection.commit()
+
+        # One query for the whole root, the rows are decoded when a directory is asked for
+        rows = self._connection.execute(
+            "SELECT path, mtime_ns, folders, files FROM directories WHERE root = ?", (self.root_path,)
+        )
+        self._rows = {path: (mtime_ns, folders, files) for path, mtime_ns, folders, files in rows}
+
+    def get(self, path: str, mtime_ns: int):
+        """Return the cached ScanBatch for path if the directory hasn't changed since, else None."""
+        row = self._rows.get(path)
+        with self._lock:  # get() runs on the scanner's threads
+            if row is None or row[0] != mtime_ns:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        _, folders, files = row
+        folder_entries = [CachedEntry(name, path, True) for name in json.loads(folders)]
+        file_entries = [
+            CachedEntry(name, path, False, CachedStat(size, mtime), inode)
+            for name, size, mtime, inode in json.loads(files)
+        ]
+        return ScanBatch(path, folder_entries, file_entries)
+
+    def put(self, batch, mtime_ns: int) -> None:
+        """Store a listing that was just read from disk."""
+        if time.time() - mtime_ns / 1e9 < MIN_DIRECTORY_AGE:
+            return
+
+        folders = json.dumps([entry.name for entry in batch.folders])
+        files = []
+        for entry in batch.files:
+            try:
+                stat_result = entry.stat()
+                files.append((entry.name, stat_result.st_size, stat_result.st_mtime, entry.inode()))
+            except OSError:
+                # Kept with unknown stat values, as the scanner leaves a File it can't stat
+                files.append((entry.name, 0, 0.0, 0))
+        files = json.dumps(files)
+
+        with self._lock:
+            self._rows[batch.path] = (mtime_ns, folders, files)
+            self._pending.append((self.root_path, batch.path, mtime_ns, folders, files))
+            should_flush = len(self._pending) >= FLUSH_EVERY
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered listings to the database."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO directories (root, path, mtime_ns, folders, files) VALUES (?, ?, ?, ?, ?)",
+                pending,
+            )
+            self._connection.commit()
+
+    def purge(self) -> int:
+        """Remove every cached listing for this root. Returns the number of directories removed."""
+        with self._lock:
+            self._pending = []
+            self._rows = {}
+            cursor = self._connection.execute("DELETE FROM directories WHERE root = ?", (self.root_path,))
+            self._connection.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
@@ -0,0 +1,112 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+DEFAULT_SCAN_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+
+class ScanBatch:
+    """The subfolders and files found by one os.scandir pass over a directory."""
+    __slots__ = ("path", "folders", "files")
+
+    def __init__(self, path: str, folders: list, files: list):
+        self.path = path
+        self.folders = folders  # os.DirEntry
+        self.files = files  # os.DirEntry
+
+    def __repr__(self):
+        return f"ScanBatch(path={self.path!r}, folders={len(self.folders)}, files={len(self.files)})"
+
+
+def scan_directory(path, cache=None, refresh: bool = False) -> ScanBatch:
+    """
+    Read a directory once with os.scandir and split the entries into folders and files.
+
+    DirEntry caches the type information returned by the directory read, and the stat
+    result of each file is fetched here once and cached on its entry, so the model can
+    take size and mtime from it without touching the disk again. Entries are sorted by
+    name so the tree and tables keep a stable order.
+
+    With a ScanCache, the directory is only read when its mtime differs from the cached
+    listing, or when refresh is set. The cache is updated with what was read.
+    """
+    path = os.fspath(path)
+    if cache is not None:
+        mtime_ns = os.stat(path).st_mtime_ns
+        batch = None if refresh else cache.get(path, mtime_ns)
+        if batch is not None:
+            return batch
+
+    folders, files = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry)
+                elif entry.is_file():
+                    entry.stat()  # Cache size and mtime on the entry while still off the UI thread
+                    files.append(entry)
+            except OSError:
+                continue  # Entry vanished or is unreadable
+    folders.sort(key=lambda entry: entry.name)
+    files.sort(key=lambda entry: entry.name)
+    batch = ScanBatch(path, folders, files)
+    if cache is not None:
+        cache.put(batch, mtime_ns)
+    return batch
+
+
+class DirectoryScanner:
+    """
+    Walks a directory tree with a pool of threads and yields one ScanBatch per directory.
+
+    Batches are yielded as soon as each directory has been read, so the caller can merge
+    them into the model incrementally. A running scan stops at the next batch after
+    cancel() is called.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_SCAN_WORKERS, cache=None):
+        self.max_workers = max_workers
+        self.cache = cache
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def scan(self, root: Path, recursive: bool = True, should_descend=None):
+        """
+        Yield a ScanBatch for root and, when recursive, for every folder below it.
+
+        should_descend(entry) can return False to skip a subfolder, for example one that
+        has already been populated.
+        """
+        self._cancelled.clear()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scan")
+        try:
+            pending = {executor.submit(scan_directory, root, self.cache)}
+            while pending and not self.cancelled:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        batch = future.result()
+                    except OSError as e:
+                        print(f"Error scanning directory: {e}")
+                        continue
+
+                    if recursive:
+                        for entry in batch.folders:
+                            if should_descend is None or should_descend(entry):
+                                pending.add(executor.submit(scan_directory, entry.path, self.cache))
+
+                    yield batch
+                    if self.cancelled:
+                        break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.cache is not None:
+                self.cache.flush()
@@ -1,4 +1,5 @@
 from .file_renamer import FileRenamer
+from .command.transform_cache import shared_cache
 
 # TODO: Decouple
 class SignalConnector:
@@ -35,6 +36,26 @@ class SignalConnector:
             self.file_table.update_table.emit(file_data, update_type="file_data")
         elif data_type == "summary":
             self.emit_display_data()
+        elif data_type == "preview":
+            self.file_table.update_table.emit(updated_data["preview"], update_type="preview")
+        elif data_type == "file_added":
+            self.file_table.update_table.emit(updated_data["file_data"], update_type="file_added")
+        elif data_type == "file_removed":
+            self.file_table.update_table.emit(updated_data["file_data"], update_type="file_removed")
+        elif data_type == "folder_added":
+            folder_data = updated_data["folder_data"]
+            self.folder_table.update_table.emit(folder_data, update_type="folder_added")
+            self.toggle_tree.add_folder_node(folder_data)
+        elif data_type == "folder_removed":
+            # The whole subtree is gone, drop its rows from both tables
+            stack = [updated_data["folder_data"]]
+            while stack:
+                folder = stack.pop()
+                self.folder_table.update_table.emit(folder, update_type="folder_removed")
+                for file in folder.files:
+                    self.file_table.update_table.emit(file, update_type="file_removed")
+                stack.extend(folder.folders)
+            self.toggle_tree.remove_folder_node(updated_data["folder_data"])
         elif data_type == "batch_update_done":
             self.file_table.update_table.emit(folders_data, update_type="folders_data")
             self.folder_table.update_table.emit(folders_data, update_type="folders_data")
@@ -101,6 +122,7 @@ class SignalConnector:
             "undo_stack": undo_stack,
             "redo_stack": redo_stack,
             "pending_changes_count": pending_changes_count,
-            "pending_folder_changes_count": pending_folder_changes_count
+            "pending_folder_changes_count": pending_folder_changes_count,
+            "transform_cache": shared_cache,
         }
         self.info_display.refresh_display_signal.emit(display_data)
\ No newline at end of file
@@ -1,4 +1,6 @@
+import os
 from textual.widgets import Tree
+from textual.widgets.tree import UnknownNodeID
 from pathlib import Path
 from textual.binding import Binding
 from .signal import Signal, InformationSignal
@@ -25,6 +27,7 @@ class ToggleTree(Tree[bool]):
     Binding("ctrl+t", "isolate_folder", "Isolate Folder", show=True),
     Binding("right", "expand_selected", "Expand selected", show=True),
     Binding("left", "collapse_selected", "Collapse selected", show=True),
+    Binding("escape", "cancel_scan", "Cancel scan", show=True),
     ]
 
     def __init__(self, data_manager: DataManager, directory_path: Path, *args, **kwargs):
@@ -35,6 +38,9 @@ class ToggleTree(Tree[bool]):
         self.toggle_signal = Signal()
         self.refresh_nodes_signal = Signal()
         self.refresh_nodes_signal.connect(self.on_refresh_nodes)
+        self._scan_nodes = {}
+        self._folder_nodes = {}  # folder_id -> node, kept up to date as nodes are added and removed
+        self.is_scanning = False
 
 
     def on_mount(self):
@@ -96,8 +102,7 @@ class ToggleTree(Tree[bool]):
         node.styles = color
 
     def action_toggle_expand_all(self):
-        self._populate_all_subfolders(self.root)
-        self.root.expand_all()
+        self.scan_in_background(self.root, on_finished=self.root.expand_all)
 
     def action_toggle_collapse_all(self):
         self.root.collapse_all()
@@ -124,15 +129,18 @@ class ToggleTree(Tree[bool]):
         self.end_batch_update()
     
     def action_enable_all(self):
-        self.start_batch_update()
-        self._set_node_state_recursive(self.root, enable=True)  # Enable all nodes
-        self.end_batch_update()
+        def enable_all():
+            self.start_batch_update()
+            self._set_node_state_recursive(self.root, enable=True)  # Enable all nodes
+            self.end_batch_update()
+
+        # Read the whole tree in the background first so enabling doesn't block on disk access
+        self.scan_in_background(self.root, on_finished=enable_all)
 
     def action_expand_selected_recursive(self):
         node = self.cursor_node
-        self._populate_all_subfolders(node)
         if node:
-            node.expand_all()
+            self.scan_in_background(node, on_finished=node.expand_all)
 
     def action_collapse_selected_recursive(self):
         node = self.cursor_node
@@ -154,9 +162,12 @@ class ToggleTree(Tree[bool]):
     def action_enable_selected_recursive(self):
         node = self.cursor_node
         if node:
-            self.start_batch_update()
-            self._set_node_state_recursive(node, True)
-            self.end_batch_update()
+            def enable_selected():
+                self.start_batch_update()
+                self._set_node_state_recursive(node, True)
+                self.end_batch_update()
+
+            self.scan_in_background(node, on_finished=enable_selected)
 
     def action_disable_selected_recursive(self):
         node = self.cursor_node
@@ -222,7 +233,109 @@ class ToggleTree(Tree[bool]):
             self._populate_all_subfolders(child)
 
     def _populate_folders_recursive(self):
-        self._populate_all_subfolders(self.root)
+        self.scan_in_background(self.root)
+
+    def action_cancel_scan(self):
+        if self.is_scanning:
+            self.data_manager.scanner.cancel()
+        else:
+            self.data_manager.cancel_name_run()  # Esc also stops a pipeline run while the tree has focus
+
+    def scan_in_background(self, node, on_finished=None):
+        """
+        Read every folder below node on worker threads and merge the results as they arrive.
+
+        The tree and tables fill in while the scan runs. on_finished is called on the UI
+        thread once the whole subtree has been read, but not when the scan is cancelled.
+        """
+        folder_id = node.data.get("folder_id", None)
+        folder = self.data_manager.registry.get(folder_id)
+        if folder is None:
+            return
+        if self.is_scanning:
+            self.data_manager.information_signal.emit_warning("A scan is already running", context="scan")
+            return
+
+        self.is_scanning = True
+        self._scan_nodes = {folder.folder_path: node}
+        self.data_manager.start_scan()
+        self.run_worker(
+            lambda: self._scan_worker(folder.folder_path, on_finished),
+            thread=True,
+            group="scan",
+            description=f"Scanning {folder.folder_path}",
+        )
+
+    def _scan_worker(self, root_path: str, on_finished=None):
+        """Runs on a worker thread. Every batch is handed to the UI thread to be merged."""
+        scanner = self.data_manager.scanner
+        for batch in scanner.scan(root_path):
+            self.app.call_from_thread(self._apply_scan_batch, batch)
+        self.app.call_from_thread(self._finish_scan, scanner.cancelled, on_finished)
+
+    def _apply_scan_batch(self, batch):
+        node = self._scan_nodes.pop(batch.path, None)
+        if node is None:
+            return
+        self.data_manager.apply_scan_batch(node, batch)
+        for child in node.children:
+            self._scan_nodes[os.fspath(child.path)] = child
+
+    def _finish_scan(self, cancelled: bool, on_finished=None):
+        self.is_scanning = False
+        self._scan_nodes = {}
+        self.data_manager.finish_scan(cancelled=cancelled)
+        if on_finished is not None and not cancelled:
+            on_finished()
+
+    def register_folder_node(self, node):
+        """Index a node that shows a folder, called wherever one is created."""
+        self._folder_nodes[node.data["folder_id"]] = node
+
+    def find_node(self, folder_id, node=None):
+        """Find the tree node that shows the given folder."""
+        found = self._folder_nodes.get(folder_id)
+        if found is not None:
+            try:
+                return self.get_node_by_id(found.id)
+            except UnknownNodeID:
+                del self._folder_nodes[folder_id]  # Removed with its parent, or the tree was cleared
+
+        # Not indexed, e.g. the root: walk once, indexing what is passed on the way
+        stack = [node or self.root]
+        while stack:
+            current = stack.pop()
+            current_id = current.data.get("folder_id") if current.data else None
+            if current_id is not None:
+                self._folder_nodes[current_id] = current
+                if current_id == folder_id:
+                    return current
+            stack.extend(current.children)
+        return None
+
+    def add_folder_node(self, folder):
+        """Add a node for a folder that appeared on disk under an already loaded folder."""
+        parent_node = self.find_node(folder.parent.id) if folder.parent else None
+        if parent_node is None:
+            return
+        folder_icon = ENABLED_FOLDER if folder.is_enabled else DISABLED_FOLDER
+        folder_node = parent_node.add(f"{folder_icon} {folder.current_name}")
+        folder_node.auto_expand = False
+        folder_node.path = Path(folder.folder_path)
+        folder_node.is_enabled = folder.is_enabled
+        folder_node.data = {"folder_id": folder.id}
+        self.register_folder_node(folder_node)
+
+    def remove_folder_node(self, folder):
+        node = self.find_node(folder.id)
+        if node is not None and node is not self.root:
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                if current.data:
+                    self._folder_nodes.pop(current.data.get("folder_id"), None)
+                stack.extend(current.children)
+            node.remove()
 
     def on_refresh_nodes(self, data=None):
         self.refresh_nodes()
\ No newline at end of file
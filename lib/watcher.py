@@ -0,0 +1,122 @@
+import os
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # Optional, fall back to polling directory mtimes
+    Observer = None
+    FileSystemEventHandler = object
+
+DEFAULT_WATCH_INTERVAL = 1.0  # Seconds between polls, and between flushes of native events
+
+
+class _ChangedDirectoryHandler(FileSystemEventHandler):
+    """Turns watchdog events into the set of directories whose listing changed."""
+
+    def __init__(self, watcher: "FolderWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("created", "deleted", "moved"):
+            self.watcher._mark_changed(os.path.dirname(os.fsdecode(event.src_path)))
+            if event.event_type == "moved":
+                self.watcher._mark_changed(os.path.dirname(os.fsdecode(event.dest_path)))
+        elif event.event_type == "modified" and not event.is_directory:
+            # Size and mtime changed, the parent listing is re-read to pick up the new stat
+            self.watcher._mark_changed(os.path.dirname(os.fsdecode(event.src_path)))
+
+
+class FolderWatcher:
+    """
+    Reports which directories under a root changed on disk.
+
+    Uses native filesystem events (inotify on Linux) through the optional watchdog package,
+    and otherwise polls the mtime of every directory, which costs one stat per folder per
+    interval rather than a directory read. Changes are collected and handed to on_change
+    as a list of directory paths at most once per interval, from a background thread.
+    """
+
+    def __init__(self, root_path, on_change, interval: float = DEFAULT_WATCH_INTERVAL):
+        self.root_path = os.fspath(root_path)
+        self.on_change = on_change
+        self.interval = interval
+        self.backend = "native" if Observer is not None else "polling"
+
+        self._changed = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+        self._mtimes = {}  # Polling only: directory path -> st_mtime_ns
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self.backend == "native":
+            self._observer = Observer()
+            self._observer.schedule(_ChangedDirectoryHandler(self), self.root_path, recursive=True)
+            self._observer.start()
+            target = self._run_native
+        else:
+            target = self._run_polling
+        self._thread = threading.Thread(target=target, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _mark_changed(self, path: str) -> None:
+        with self._lock:
+            self._changed.add(path)
+
+    def _flush(self) -> None:
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        if changed:
+            self.on_change(sorted(changed))
+
+    def _run_native(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._flush()
+
+    def _run_polling(self) -> None:
+        self._discover(self.root_path)
+        while not self._stop.wait(self.interval):
+            self._poll()
+            self._flush()
+
+    def _poll(self) -> None:
+        for path, old_mtime in list(self._mtimes.items()):
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                # Removed or moved away, its parent reports the change
+                del self._mtimes[path]
+                continue
+            if mtime != old_mtime:
+                self._mark_changed(path)
+                self._discover(path)
+
+    def _discover(self, path: str) -> None:
+        """Record the mtime of path and of any folder below it that isn't tracked yet."""
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                self._mtimes[current] = os.stat(current).st_mtime_ns
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and entry.path not in self._mtimes:
+                            stack.append(entry.path)
+            except OSError:
+                self._mtimes.pop(current, None)
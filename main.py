@@ -1,3 +1,4 @@
+import asyncio
 import os, sys
 from textual import on
 from textual.app import App, ComposeResult
@@ -11,6 +12,7 @@ from textual.widgets import MarkdownViewer
 from lib import DataManager, ToggleTree, InfoDisplay, OutputDisplay, FileTable, EditCellRequested
 from lib import FileTableColumns, FolderTableColumns, EditCellScreen, process_names, CommandSuggester, CommandPipelineHandler
 from lib import SignalConnector, FolderTable, FlexSplitHorizontal, FlexSplitVertical, generate_markdown, generate_readme_markdown
+from lib import FolderWatcher
 ENABLED_FOLDER = f"[#A3BE8C]✓[/#A3BE8C]"
 class Namnbyte(App[None]):
     BINDINGS = [
@@ -26,13 +28,16 @@ class Namnbyte(App[None]):
         Binding("ctrl+y", "redo", "Redo Action", show=True),
         Binding("up", "history_up", "Previous Command", show=True),
         Binding("down", "history_down", "Next Command", show=True),
+        Binding("escape", "cancel", "Cancel", show=True),
     ]
 
     CSS_PATH = "lib/assets/main.tcss"
     ENABLE_COMMAND_PALETTE = False
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, watch: bool = False):
         super().__init__()
         self.current_directory = path
+        self.watch_disk = watch
+        self.watcher = None
         self.data_manager = DataManager(path)
         self.command_pipeline_handler = CommandPipelineHandler()
 
@@ -112,8 +117,49 @@ class Namnbyte(App[None]):
             command_pipeline_handler=self.command_pipeline_handler
         )
         signal_connector.connect_signals()
+        self.data_manager.check_interrupted_apply()
+        self.data_manager.name_run_signal.connect(self.start_name_run)
+        self.data_manager.background_runs = True
         self.loading = False
 
+        if self.watch_disk:
+            self.start_watcher()
+
+    def start_watcher(self) -> None:
+        """Keep the model in sync with changes made on disk while the app is open."""
+        # Hand changes to the event loop without waiting, so stopping the watcher can't deadlock
+        loop = asyncio.get_running_loop()
+        self.watcher = FolderWatcher(
+            self.current_directory,
+            on_change=lambda paths: loop.call_soon_threadsafe(self.data_manager.sync_directories, paths),
+        )
+        self.watcher.start()
+        self.output_display.update_display(f"Watching for changes ({self.watcher.backend})")
+
+    def start_name_run(self, run) -> None:
+        """Compute the new names on a worker thread so the UI stays responsive."""
+        self.run_worker(lambda: self._name_run_worker(run), thread=True, group="names", description="Processing names")
+
+    def _name_run_worker(self, run) -> None:
+        """Runs on a worker thread. Every chunk is handed to the UI thread to be merged."""
+        error = None
+        try:
+            for files, new_names, columns in run.chunks():
+                self.call_from_thread(self.data_manager.apply_name_chunk, run, files, new_names, columns)
+        except Exception as e:
+            error = e
+        self.call_from_thread(self.data_manager.finish_name_run, run, error)
+
+    def action_cancel(self) -> None:
+        """Cancel a running pipeline run, or else a running scan."""
+        if not self.data_manager.cancel_name_run():
+            self.toggle_tree.action_cancel_scan()
+
+    def on_unmount(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.data_manager.shutdown()
+
     def action_test(self) -> None:
         print("Starting action test...")
         self.data_manager.set_file_name("test", "2", "pop")
@@ -252,15 +298,18 @@ class Namnbyte(App[None]):
 
 def main():
     try:
-        if len(sys.argv) > 1:
-            provided_path = Path(sys.argv[1]).resolve()
+        args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+        watch = "--watch" in sys.argv[1:]
+
+        if args:
+            provided_path = Path(args[0]).resolve()
             if not provided_path.exists():
                 print(f"Warning: Provided path '{provided_path}' does not exist. Falling back to current directory.")
                 provided_path = Path.cwd()
         else:
             provided_path = Path.cwd()
 
-        Namnbyte(path=provided_path).run()
+        Namnbyte(path=provided_path, watch=watch).run()
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         sys.exit(1)